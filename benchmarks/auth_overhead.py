@@ -0,0 +1,87 @@
+"""
+Per-request authentication and middleware overhead, measured in process
+(django.test.Client, no HTTP server or network): an authenticated
+``GET /api/history/?limit=1`` for a user without history, under each profile
+of API_ONLY_MIDDLEWARE / JWT_USER_CACHE_TTL / JWT_STATELESS_USER.
+
+    python -m benchmarks.auth_overhead --requests 5000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+
+PROFILES = {
+    "baseline": {"API_ONLY_MIDDLEWARE": False, "JWT_USER_CACHE_TTL": 0, "JWT_STATELESS_USER": False},
+    "api_only": {"API_ONLY_MIDDLEWARE": True, "JWT_USER_CACHE_TTL": 0, "JWT_STATELESS_USER": False},
+    "api_only+user_cache": {"API_ONLY_MIDDLEWARE": True, "JWT_USER_CACHE_TTL": 60, "JWT_STATELESS_USER": False},
+    "api_only+stateless": {"API_ONLY_MIDDLEWARE": True, "JWT_USER_CACHE_TTL": 0, "JWT_STATELESS_USER": True},
+}
+
+
+def measure(token, requests, warmup=50, **overrides):
+    """Latency summary and queries per request for one settings profile."""
+    from django.db import connection
+    from django.test import Client, override_settings
+
+    from benchmarks.run import summarize
+    from career.authentication import user_cache
+
+    queries = [0]
+
+    def count(execute, sql, params, many, context):
+        queries[0] += 1
+        return execute(sql, params, many, context)
+
+    user_cache.clear()
+    with override_settings(**overrides):
+        client = Client(headers={"Authorization": f"Bearer {token}"})  # loads this profile's middleware
+        for _ in range(warmup):
+            assert client.get("/api/history/", {"limit": 1}).status_code == 200
+        latencies = []
+        with connection.execute_wrapper(count):
+            started = time.perf_counter()
+            for _ in range(requests):
+                before = time.perf_counter()
+                client.get("/api/history/", {"limit": 1})
+                latencies.append(time.perf_counter() - before)
+            elapsed = time.perf_counter() - started
+    summary = summarize(latencies, 0, elapsed)
+    summary["queries_per_request"] = round(queries[0] / requests, 2)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure JWT auth and middleware overhead per request.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--profiles", default=",".join(PROFILES))
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+
+    from benchmarks.scenarios import bench_users, seed_history
+
+    (username, token), = bench_users(1)
+    seed_history([username], 0)
+
+    results = {}
+    for name in args.profiles.split(","):
+        results[name] = measure(token, args.requests, **PROFILES[name])
+        print(
+            f"{name:<22} p50 {results[name]['p50_ms']} ms  p95 {results[name]['p95_ms']} ms  "
+            f"{results[name]['throughput_rps']} rps  {results[name]['queries_per_request']} queries/request",
+            flush=True,
+        )
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark: career.parsing.extract_json vs the previous regex-based
+extract_json on well-formed, large and malformed completions.
+
+    python -m benchmarks.bench_parsing [--repeat 5] [--json results.json]
+"""
+import argparse
+import json
+import re
+import sys
+import timeit
+
+from career.parsing import extract_json
+
+
+# The implementation extract_json replaced, kept here as the baseline
+def legacy_extract_json(text):
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except Exception:
+        match = re.search(r'(\{.*\})', text, re.S)
+        if match:
+            try:
+                return json.loads(match.group(1))
+            except Exception:
+                return None
+    return None
+
+
+def career_path(i):
+    return {
+        "title": f"Career {i}",
+        "description": "A description with {braces} and \"quotes\". " * 4,
+        "required_skills": [f"skill {j}" for j in range(8)],
+        "roadmap": {stage: [f"step {j}" for j in range(5)] for stage in ("short_term", "medium_term", "long_term")},
+    }
+
+
+def cases():
+    typical = json.dumps({"career_paths": [career_path(i) for i in range(3)]}, indent=2)
+    large = json.dumps({"career_paths": [career_path(i) for i in range(300)]})
+    return {
+        "typical": typical,
+        "fenced_with_chatter": f"Here you go!\n```json\n{typical}\n```\nLet me know if you need more.",
+        "large": large,
+        "large_fenced": f"```json\n{large}\n```",
+        # Chatter after the object that contains a brace: the greedy regex overshoots
+        "trailing_braces": f"{typical}\nNote: use {{placeholders}} where needed.",
+        # Truncated at max_tokens: no balanced object at all
+        "truncated": large[: len(large) // 2],
+        # No closing brace: the regex rescans to the end from every "{" (quadratic)
+        "many_open_braces": "{" * 20000 + " no json here",
+    }
+
+
+def bench(fn, text, repeat, number):
+    return min(timeit.repeat(lambda: fn(text), repeat=repeat, number=number)) / number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20)
+    parser.add_argument("--json", help="Write results to this file.")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'case':<20}{'bytes':>9}{'legacy (ms)':>13}{'scanner (ms)':>14}{'speedup':>9}  parsed (legacy/scanner)")
+    for name, text in cases().items():
+        legacy = bench(legacy_extract_json, text, args.repeat, args.number)
+        current = bench(extract_json, text, args.repeat, args.number)
+        parsed = (legacy_extract_json(text) is not None, extract_json(text) is not None)
+        results.append({
+            "case": name, "bytes": len(text), "legacy_s": legacy, "scanner_s": current,
+            "legacy_parsed": parsed[0], "scanner_parsed": parsed[1],
+        })
+        print(
+            f"{name:<20}{len(text):>9}{legacy * 1e3:>13.3f}{current * 1e3:>14.3f}{legacy / current:>8.1f}x"
+            f"  {parsed[0]}/{parsed[1]}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    sys.exit(main() and 0)
@@ -0,0 +1,125 @@
+"""
+Cold-start report: for each startup profile, boots gunicorn from nothing and
+times how long it takes to listen and to answer the first successful request
+(a /api/predict/ through the fake OpenAI server). It also reports the
+`-X importtime` cumulative import time of career_project.wsgi.
+
+    python -m benchmarks.cold_start --profiles default,lean,preload,lean+preload --runs 3
+
+Profiles: "lean" sets LEAN_STARTUP=1, "preload" runs gunicorn with --preload
+(warmed up by gunicorn.conf.py before the workers fork).
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.run import free_port, server_command, stop_server
+
+
+def import_times(module, env=None):
+    """``{module name: cumulative seconds}`` of everything importing ``module`` loads in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def first_response(profile, env, workers, threads, request, timeout=120):
+    """Seconds from spawning gunicorn until it listens and until ``request`` first returns 200."""
+    port = free_port()
+    command = server_command("sync", workers, port, threads)
+    if "preload" in profile:
+        command.append("--preload")
+    env = {**env, "CAREER_VIEW_MODE": "sync", "LEAN_STARTUP": "1" if "lean" in profile else "0"}
+    method, path, kwargs = request
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=env)
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {process.returncode}")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.01)
+        listening = time.perf_counter() - started
+        # Requests queue in the listen backlog until a worker is up to accept them
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            while time.perf_counter() - started < timeout:
+                if client.request(method, path, **kwargs).status_code == 200:
+                    return listening, time.perf_counter() - started
+                time.sleep(0.01)
+        raise RuntimeError(f"No successful response within {timeout}s")
+    finally:
+        stop_server(process)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time gunicorn's cold start to the first successful request.")
+    parser.add_argument("--profiles", default="default,lean,preload,lean+preload")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+
+    from benchmarks.fake_openai import FakeOpenAIServer
+    from benchmarks.scenarios import PredictScenario, bench_users
+
+    users = bench_users(1)
+    fake = FakeOpenAIServer(latency="0").start()
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "benchmarks.settings",
+        "OPENAI_BASE_URL": fake.url,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "fake"),
+    }
+    report = {}
+    try:
+        for profile in args.profiles.split(","):
+            lean = {**env, "LEAN_STARTUP": "1" if "lean" in profile else "0"}
+            imports = [import_times("career_project.wsgi", lean)["career_project.wsgi"] for _ in range(args.runs)]
+            listening, first = [], []
+            for _ in range(args.runs):
+                # A new profile per run: the first request must reach the LLM, not a cache
+                request = PredictScenario(users).request(0)
+                listen_s, first_s = first_response(profile, env, args.workers, args.threads, request)
+                listening.append(listen_s)
+                first.append(first_s)
+            report[profile] = {
+                "wsgi_import_s": round(statistics.median(imports), 3),
+                "listening_s": round(statistics.median(listening), 3),
+                "first_response_s": round(statistics.median(first), 3),
+                "first_response_max_s": round(max(first), 3),
+            }
+            print(profile, json.dumps(report[profile]), flush=True)
+    finally:
+        fake.stop()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Offline Google Sign-In for load runs: ID tokens are real RS256 JWTs signed
+with a local key, and FakeGoogleKeySource publishes its public half to
+career/google_auth.py (GOOGLE_KEY_SOURCE) so /api/auth/google/ verifies them
+exactly as it would Google's. BENCH_GOOGLE_LATENCY (seconds) is spent on each
+key fetch, standing in for the HTTPS round trip the key cache avoids.
+
+The key is generated once under benchmarks/.data/ and shared by the load
+runner (which signs) and the app server workers (which verify).
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+
+AUDIENCE = "bench-google-client"
+KEY_ID = "bench-key"
+KEY_PATH = Path(__file__).resolve().parent / ".data" / "fake_google_key.pem"
+
+_private_key = None
+
+
+def private_key():
+    global _private_key
+    if _private_key is None:
+        if not KEY_PATH.exists():
+            key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+            pem = key.private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+            )
+            KEY_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp = KEY_PATH.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(pem)
+            if not KEY_PATH.exists():
+                os.replace(tmp, KEY_PATH)
+            else:
+                tmp.unlink()  # another process won the race
+        _private_key = serialization.load_pem_private_key(KEY_PATH.read_bytes(), password=None)
+    return _private_key
+
+
+def jwks():
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key().public_key()))
+    return {"keys": [{**jwk, "kid": KEY_ID, "alg": "RS256", "use": "sig"}]}
+
+
+def fake_google_token(email, name="Bench User", audience=AUDIENCE, lifetime=3600):
+    now = int(time.time())
+    claims = {
+        "iss": "https://accounts.google.com", "aud": audience, "sub": email,
+        "email": email, "name": name, "iat": now, "exp": now + lifetime,
+    }
+    return jwt.encode(claims, private_key(), algorithm="RS256", headers={"kid": KEY_ID})
+
+
+class FakeGoogleKeySource:
+    """GOOGLE_KEY_SOURCE for load runs and tests."""
+
+    def __init__(self, max_age=3600):
+        self.max_age = max_age
+        self.fetches = 0
+
+    def fetch(self):
+        self.fetches += 1
+        time.sleep(float(os.getenv("BENCH_GOOGLE_LATENCY", "0")))
+        return jwks(), self.max_age
+
@@ -0,0 +1,266 @@
+"""
+A local OpenAI-compatible chat completions server for tests and load runs.
+
+    python -m benchmarks.fake_openai [--port 8765] [--latency lognormal:0.8:0.3] [--error-rate 0.05]
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python manage.py runserver
+
+It answers ``POST /v1/chat/completions`` (JSON or ``stream: true`` SSE) with
+a canned career payload after the configured latency, and fails a
+configurable share of requests with ``error_status``. Tests can script the
+next responses exactly with ``server.script(503, 503, 200)``.
+
+Latency specs: ``0.8`` (constant), ``uniform:LOW:HIGH``, ``normal:MEAN:SD``,
+``lognormal:MEDIAN:SIGMA`` or ``exp:MEAN``, all in seconds.
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+PREDICTION = {
+    "career_paths": [
+        {
+            "title": "Data Analyst",
+            "description": "Turns raw data into decisions.",
+            "required_skills": ["SQL", "Excel", "Statistics"],
+            "roadmap": {
+                "short_term": ["Learn SQL"],
+                "medium_term": ["Build dashboards"],
+                "long_term": ["Lead an analytics team"],
+            },
+        }
+    ]
+}
+
+CAREER_DETAILS = {
+    "career": "Data Analyst",
+    "required_skills": ["SQL", "Excel", "Statistics"],
+    "free_courses": [{"title": "SQL Basics", "platform": "Khan Academy", "url": "https://example.com/sql"}],
+    "roadmap": {"short_term": ["Learn SQL"], "medium_term": ["Build dashboards"], "long_term": ["Lead a team"]},
+}
+
+
+def parse_latency(spec, rng=None):
+    """Turn a latency spec (see the module docstring) into a zero-argument sampler."""
+    rng = rng or random.Random()
+    name, _, args = str(spec).partition(":")
+    try:
+        if not args:
+            value = float(name)
+            return lambda: value
+        params = [float(arg) for arg in args.split(":")]
+        if name == "uniform":
+            low, high = params
+            return lambda: rng.uniform(low, high)
+        if name == "normal":
+            mean, sd = params
+            return lambda: max(rng.gauss(mean, sd), 0.0)
+        if name == "lognormal":
+            median, sigma = params
+            return lambda: median * math.exp(rng.gauss(0, sigma))
+        if name == "exp":
+            mean, = params
+            return lambda: rng.expovariate(1 / mean)
+    except ValueError:
+        pass
+    raise ValueError(f"Bad latency spec: {spec!r}")
+
+
+def default_content(request):
+    # Career details prompts ask for "free_courses"; everything else is a prediction
+    prompt = " ".join(str(m.get("content", "")) for m in request.get("messages", []))
+    return json.dumps(CAREER_DETAILS if "free_courses" in prompt else PREDICTION)
+
+
+class FakeOpenAIServer:
+    """
+    ``latency`` is seconds per response (or a zero-argument callable returning
+    seconds); ``content`` is a string or ``request -> string`` callable.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, error_status=503,
+                 content=default_content, chunk_size=24, chunk_delay=0.0, seed=None):
+        self.random = random.Random(seed)
+        self.latency = parse_latency(latency, self.random) if isinstance(latency, str) else latency
+        self.chunk_delay = chunk_delay
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.content = content
+        self.chunk_size = chunk_size
+        self.requests = []
+        self._script = []
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def script(self, *statuses):
+        """Answer the next requests with these HTTP statuses, in order."""
+        with self._lock:
+            self._script.extend(statuses)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- request handling ---
+    def _next_status(self):
+        with self._lock:
+            if self._script:
+                return self._script.pop(0)
+            return self.error_status if self.random.random() < self.error_rate else 200
+
+    def _latency(self):
+        return self.latency() if callable(self.latency) else self.latency
+
+    def _content(self, request):
+        return self.content(request) if callable(self.content) else self.content
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, body, headers=()):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    return self.send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+                with server._lock:
+                    server.requests.append(request)
+                status = server._next_status()
+                time.sleep(max(server._latency(), 0))
+
+                if status != 200:
+                    headers = [("Retry-After", "0")] if status == 429 else []
+                    return self.send_json(status, {"error": {"message": f"Fake error {status}", "type": "server_error"}}, headers)
+
+                content = server._content(request)
+                model = request.get("model", "gpt-4o-mini")
+                prompt_tokens = sum(len(str(m.get("content", ""))) for m in request.get("messages", [])) // 4
+                completion_tokens = len(content) // 4
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                }
+                if request.get("stream"):
+                    include_usage = (request.get("stream_options") or {}).get("include_usage")
+                    return self.stream(model, content, usage if include_usage else None)
+
+                self.send_json(200, {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": usage,
+                })
+
+            def stream(self, model, content, usage=None):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+                pieces = [content[i:i + server.chunk_size] for i in range(0, len(content), server.chunk_size)]
+                for index, piece in enumerate(pieces + [None]):
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{
+                            "index": 0,
+                            "delta": {"content": piece} if piece is not None else {},
+                            "finish_reason": None if piece is not None else "stop",
+                        }],
+                    }
+                    self.write_chunk(f"data: {json.dumps(chunk)}\n\n")
+                    if server.chunk_delay and piece is not None:
+                        time.sleep(server.chunk_delay)
+                if usage is not None:
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [],
+                        "usage": usage,
+                    }
+                    self.write_chunk(f"data: {json.dumps(chunk)}\n\n")
+                self.write_chunk("data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def write_chunk(self, text):
+                data = text.encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="0", help="Seconds before each response, or a distribution spec.")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Seconds between streamed chunks.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail.")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    server = FakeOpenAIServer(args.host, args.port, latency=args.latency, chunk_delay=args.chunk_delay,
+                              error_rate=args.error_rate, error_status=args.error_status, seed=args.seed)
+    print(f"Fake OpenAI server on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
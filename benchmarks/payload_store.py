@@ -0,0 +1,138 @@
+"""
+Payload store benchmark: synthetic prediction rows whose generated payloads
+repeat across users (``--distinct`` payloads over ``--rows`` rows), stored
+three ways: JSON per row (the old columns), content-addressed deflate blobs,
+and blobs compressed with a dictionary trained on them. Reports the bytes
+each layout needs and the per-read cost of turning a stored payload back
+into a dict (json.loads of the column vs inflate + json.loads).
+
+    python -m benchmarks.payload_store --rows 100000 --distinct 5000
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+
+from benchmarks.run import percentile
+from benchmarks.similarity import random_profile
+
+
+TITLES = [
+    "Data Analyst", "Data Scientist", "Machine Learning Engineer", "Backend Developer", "Product Manager",
+    "Financial Analyst", "UX Designer", "DevOps Engineer", "Business Analyst", "Cloud Architect",
+    "Marketing Analyst", "Research Scientist", "Embedded Engineer", "Security Analyst", "Actuary",
+]
+WORDS = (
+    "build analyse design lead model data systems teams products insights pipelines customers "
+    "experiments dashboards infrastructure reports strategy research quality scale"
+).split()
+SKILLS = ["Python", "SQL", "Excel", "Statistics", "Java", "Docker", "Kubernetes", "Figma", "Tableau", "AWS", "Go"]
+
+
+def random_prediction(rng):
+    def sentence(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+    return {
+        "career_paths": [
+            {
+                "title": title,
+                "description": sentence(14),
+                "required_skills": rng.sample(SKILLS, 4),
+                "roadmap": {
+                    "short_term": [sentence(5) for _ in range(2)],
+                    "medium_term": [sentence(6) for _ in range(2)],
+                    "long_term": [sentence(6)],
+                },
+            }
+            for title in rng.sample(TITLES, 3)
+        ]
+    }
+
+
+def _compact(value):
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def run(rows, distinct, reads=2000, seed=0, dictionary_samples=2000):
+    from career import payloads
+
+    rng = random.Random(seed)
+    predictions = [random_prediction(rng) for _ in range(distinct)]
+    table = [(random_profile(rng), rng.randrange(distinct)) for _ in range(rows)]
+
+    # Old layout: both payloads as JSON text in every row
+    json_bytes = sum(len(json.dumps(profile)) + len(json.dumps(predictions[i])) for profile, i in table)
+
+    # New layout: one blob per distinct payload plus two 64-char digests per row
+    blobs = {}
+    for profile, i in table:
+        for value in (profile, predictions[i]):
+            blobs.setdefault(hashlib.sha256(payloads.canonical(value).encode("utf-8")).hexdigest(), _compact(value))
+    zdict = payloads.train_dictionary(
+        [json.loads(raw) for raw in rng.sample(list(blobs.values()), min(dictionary_samples, len(blobs)))]
+    )
+    header = payloads.HEADER.size
+    plain = {key: payloads.deflate(raw) for key, raw in blobs.items()}
+    trained = {key: payloads.deflate(raw, zdict) for key, raw in blobs.items()}
+    references = rows * 2 * 64
+
+    def read_cost(decode, stored):
+        keys = list(stored)
+        latencies = []
+        for _ in range(reads):
+            data = stored[rng.choice(keys)]
+            started = time.perf_counter()
+            decode(data)
+            latencies.append(time.perf_counter() - started)
+        latencies.sort()
+        return round(percentile(latencies, 0.50) * 1e6, 2), round(percentile(latencies, 0.99) * 1e6, 2)
+
+    text = {key: json.dumps(json.loads(raw)) for key, raw in blobs.items()}
+    json_read = read_cost(json.loads, text)
+    plain_read = read_cost(lambda body: json.loads(payloads.inflate(body)), plain)
+    trained_read = read_cost(lambda body: json.loads(payloads.inflate(body, zdict)), trained)
+
+    plain_bytes = sum(len(body) + header for body in plain.values()) + references
+    trained_bytes = sum(len(body) + header for body in trained.values()) + references + len(zdict)
+    return {
+        "rows": rows,
+        "distinct_payloads": len(blobs),
+        "dictionary_bytes": len(zdict),
+        "json_mb": round(json_bytes / 2**20, 2),
+        "blobs_mb": round(plain_bytes / 2**20, 2),
+        "blobs_dict_mb": round(trained_bytes / 2**20, 2),
+        "saving_blobs": round(1 - plain_bytes / json_bytes, 4),
+        "saving_blobs_dict": round(1 - trained_bytes / json_bytes, 4),
+        "avg_blob_ratio": round(sum(map(len, plain.values())) / sum(map(len, blobs.values())), 4),
+        "avg_blob_dict_ratio": round(sum(map(len, trained.values())) / sum(map(len, blobs.values())), 4),
+        "read_json_p50_us": json_read[0],
+        "read_json_p99_us": json_read[1],
+        "read_blob_p50_us": plain_read[0],
+        "read_blob_p99_us": plain_read[1],
+        "read_blob_dict_p50_us": trained_read[0],
+        "read_blob_dict_p99_us": trained_read[1],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the content-addressed payload store.")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--distinct", type=int, default=2000, help="Distinct generated predictions.")
+    parser.add_argument("--reads", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    import django
+
+    django.setup()
+    print(json.dumps(run(args.rows, args.distinct, args.reads, args.seed), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""
+Load-test runner: starts the fake OpenAI server, seeds a local database,
+boots the app under gunicorn (sync) and/or uvicorn (ASGI) with each worker
+count, drives every scenario and reports throughput and p50/p95/p99.
+
+    python -m benchmarks.run --scenarios predict,history --modes sync,asgi \\
+        --workers 1,4 --history-sizes 0,1000 --requests 500 --concurrency 32 \\
+        --latency lognormal:0.8:0.3 --output benchmarks/results/$(git rev-parse --short HEAD).json
+    python -m benchmarks.run ... --compare benchmarks/results/<older>.json
+
+Results are JSON so runs on different commits can be compared; --compare
+exits non-zero when a p95 regressed by more than --threshold.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def summarize(latencies, errors, elapsed):
+    """Throughput and latency percentiles (milliseconds) for one load run."""
+    values = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 2) if seconds is not None else None  # noqa: E731
+    return {
+        "requests": len(values) + errors,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": ms(percentile(values, 0.50)),
+        "p95_ms": ms(percentile(values, 0.95)),
+        "p99_ms": ms(percentile(values, 0.99)),
+        "mean_ms": ms(sum(values) / len(values)) if values else None,
+        "max_ms": ms(values[-1]) if values else None,
+    }
+
+
+def drive(base_url, scenario, requests, concurrency, warmup=0, timeout=120):
+    """Send ``requests`` scenario requests from ``concurrency`` threads; 2xx responses count as successes."""
+    lock = threading.Lock()
+    counter = iter(range(warmup + requests))
+    latencies, errors = [], [0]
+
+    def worker():
+        with httpx.Client(base_url=base_url, timeout=timeout) as client:
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                method, path, kwargs = scenario.request(i)
+                started = time.perf_counter()
+                try:
+                    ok = client.request(method, path, **kwargs).is_success
+                except httpx.HTTPError:
+                    ok = False
+                latency = time.perf_counter() - started
+                if i < warmup:
+                    continue
+                with lock:
+                    if ok:
+                        latencies.append(latency)
+                    else:
+                        errors[0] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+
+# --- app server ---
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_command(mode, workers, port, threads):
+    if mode == "sync":
+        return [
+            sys.executable, "-m", "gunicorn", "benchmarks.server:wsgi",
+            "-w", str(workers), "--threads", str(threads), "-b", f"127.0.0.1:{port}",
+            "--timeout", "120", "--log-level", "warning",
+        ]
+    if mode == "asgi":
+        return [
+            sys.executable, "-m", "uvicorn", "benchmarks.server:asgi",
+            "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+        ]
+    raise ValueError(f"Unknown mode: {mode}")
+
+
+def start_server(mode, workers, threads, env, ready_timeout=60):
+    port = free_port()
+    env = {**env, "CAREER_VIEW_MODE": "async" if mode == "asgi" else "sync"}
+    process = subprocess.Popen(server_command(mode, workers, port, threads), env=env)
+    deadline = time.monotonic() + ready_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{mode} server exited with {process.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return process, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{mode} server did not start within {ready_timeout}s")
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+# --- comparison ---
+def result_key(result):
+    return (result["scenario"], result["mode"], result["workers"], result["history_size"])
+
+
+def compare(baseline, results, threshold):
+    """Print p95/throughput deltas against ``baseline``; return the regressions."""
+    previous = {result_key(result): result for result in baseline["results"]}
+    regressions = []
+    print(f"\n{'scenario':<12} {'mode':<5} {'w':>3} {'history':>8} {'p95 ms':>18} {'rps':>18}")
+    for result in results:
+        before = previous.get(result_key(result))
+        if before is None or not before["p95_ms"] or not result["p95_ms"]:
+            continue
+        change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"]
+        print(
+            f"{result['scenario']:<12} {result['mode']:<5} {result['workers']:>3} {result['history_size']:>8} "
+            f"{before['p95_ms']:>8} -> {result['p95_ms']:<7} {before['throughput_rps']:>8} -> {result['throughput_rps']:<7}"
+            + ("  REGRESSION" if change > threshold else "")
+        )
+        if change > threshold:
+            regressions.append(result)
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def csv_list(cast=str):
+    return lambda value: [cast(item) for item in value.split(",") if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the career API against a fake OpenAI server.")
+    parser.add_argument("--scenarios", type=csv_list(), default=["predict", "career", "history", "login", "auth_google"])
+    parser.add_argument("--modes", type=csv_list(), default=["sync", "asgi"])
+    parser.add_argument("--workers", type=csv_list(int), default=[1, 4])
+    parser.add_argument("--threads", type=int, default=8, help="Threads per gunicorn sync worker.")
+    parser.add_argument("--history-sizes", type=csv_list(int), default=[0, 1000])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--distinct", type=int, default=0, help="Distinct profiles/careers per run (0: every request unique).")
+    parser.add_argument("--latency", default="lognormal:0.8:0.3", help="Fake OpenAI latency spec.")
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="Write results JSON here.")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p95 regression ratio that fails --compare.")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+
+    from benchmarks.fake_openai import FakeOpenAIServer
+    from benchmarks.scenarios import SCENARIOS, bench_users, seed_history
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    fake = FakeOpenAIServer(latency=args.latency, chunk_delay=args.chunk_delay, error_rate=args.error_rate).start()
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "benchmarks.settings",
+        "OPENAI_BASE_URL": fake.url,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "fake"),
+    }
+    users = bench_users(args.users)
+    results = []
+    try:
+        for history_size in args.history_sizes:
+            seed_history([username for username, _ in users], history_size)
+            for mode in args.modes:
+                for workers in args.workers:
+                    process, base_url = start_server(mode, workers, args.threads, env)
+                    try:
+                        for name in args.scenarios:
+                            scenario = SCENARIOS[name](users, distinct=args.distinct)
+                            summary = drive(base_url, scenario, args.requests, args.concurrency, args.warmup)
+                            result = {
+                                "scenario": name, "mode": mode, "workers": workers,
+                                "history_size": history_size, "concurrency": args.concurrency, **summary,
+                            }
+                            results.append(result)
+                            print(
+                                f"{name:<12} {mode:<5} w={workers:<3} history={history_size:<6} "
+                                f"{result['throughput_rps']:>8} rps  p50 {result['p50_ms']} ms  "
+                                f"p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  errors {result['errors']}",
+                                flush=True,
+                            )
+                    finally:
+                        stop_server(process)
+    finally:
+        fake.stop()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "database": settings.DATABASES["default"]["ENGINE"],
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(report, indent=2))
+        print(f"Saved {args.output}")
+
+    if args.compare:
+        regressions = compare(json.loads(Path(args.compare).read_text()), results, args.threshold)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Load scenarios for benchmarks/run.py: each describes request ``i`` as
+``(method, path, httpx kwargs)``. ``bench_users`` and ``seed_history``
+prepare the database through the ORM before a run.
+"""
+import random
+import uuid
+
+from benchmarks.fake_google import fake_google_token
+
+
+PASSWORD = "bench-pass-123"
+
+
+def bench_users(count):
+    """Create (or reuse) ``count`` bench users and return ``[(username, access_token)]``."""
+    from django.contrib.auth import get_user_model
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    User = get_user_model()
+    users = []
+    for n in range(count):
+        username = f"bench-{n}"
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            user = User.objects.create_user(username=username, email=f"{username}@example.com", password=PASSWORD)
+        users.append((username, str(RefreshToken.for_user(user).access_token)))
+    return users
+
+
+def seed_history(usernames, size, chunk_size=1000):
+    """Give every bench user exactly ``size`` saved predictions."""
+    from django.contrib.auth import get_user_model
+    from benchmarks.fake_openai import PREDICTION
+    from career.models import CareerPrediction
+
+    for user in get_user_model().objects.filter(username__in=usernames):
+        CareerPrediction.objects.filter(user=user).delete()
+        rows = (
+            CareerPrediction(
+                user=user,
+                user_input={"ug_course": f"Course {i}", "skills": ["Python", "SQL"]},
+                prediction=PREDICTION,
+                career_titles=CareerPrediction.titles_from(PREDICTION),
+            )
+            for i in range(size)
+        )
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                CareerPrediction.store_payloads(batch)
+                CareerPrediction.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            CareerPrediction.store_payloads(batch)
+            CareerPrediction.objects.bulk_create(batch)
+
+
+class Scenario:
+    name = None
+
+    def __init__(self, users, distinct=0):
+        self.users = users
+        self.distinct = distinct
+        # Fresh keys per run, so the caches of an earlier run don't answer this one
+        self.run_id = uuid.uuid4().hex[:8]
+
+    def key(self, i):
+        return i % self.distinct if self.distinct else i
+
+    def auth(self, i):
+        _, token = self.users[i % len(self.users)]
+        return {"Authorization": f"Bearer {token}"}
+
+    def request(self, i):
+        raise NotImplementedError
+
+
+class PredictScenario(Scenario):
+    name = "predict"
+
+    def request(self, i):
+        profile = {
+            "ug_course": f"Course {self.run_id}-{self.key(i)}",
+            "skills": random.sample(["Python", "SQL", "Excel", "Design", "Writing", "Statistics"], 3),
+            "ug_cgpa": 7.5,
+        }
+        return "POST", "/api/predict/", {"json": profile, "headers": self.auth(i)}
+
+
+class PredictSimilarScenario(Scenario):
+    """Variants of ``distinct`` (default 20) base profiles: exercises SIMILARITY_REUSE_THRESHOLD."""
+
+    name = "predict_similar"
+    SKILLS = ["Python", "SQL", "Excel", "Design", "Writing", "Statistics", "Tableau", "Java"]
+
+    def request(self, i):
+        base = i % (self.distinct or 20)
+        skills = self.SKILLS[base % 4:base % 4 + 4]
+        skills[random.randrange(4)] = random.choice(self.SKILLS)
+        profile = {
+            "ug_course": f"Course {self.run_id}-{base}",
+            "skills": skills,
+            "ug_cgpa": round(7.0 + random.choice((0, 0.1, 0.2)), 1),
+        }
+        return "POST", "/api/predict/", {"json": profile, "headers": self.auth(i)}
+
+
+class CareerScenario(Scenario):
+    name = "career"
+
+    def request(self, i):
+        body = {"career": f"Career {self.run_id}-{self.key(i)}"}
+        return "POST", "/api/career/", {"json": body, "headers": self.auth(i)}
+
+
+class HistoryScenario(Scenario):
+    name = "history"
+
+    def request(self, i):
+        return "GET", "/api/history/", {"params": {"limit": 20}, "headers": self.auth(i)}
+
+
+class LoginScenario(Scenario):
+    name = "login"
+
+    def request(self, i):
+        username, _ = self.users[i % len(self.users)]
+        return "POST", "/api/login/", {"json": {"username": username, "password": PASSWORD}}
+
+
+class GoogleAuthScenario(Scenario):
+    name = "auth_google"
+
+    def request(self, i):
+        name = f"bench-google-{self.key(i) % 50}"
+        token = fake_google_token(f"{name}@example.com", name=name)
+        return "POST", "/api/auth/google/", {"json": {"credential": token}}
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (PredictScenario, PredictSimilarScenario, CareerScenario, HistoryScenario, LoginScenario, GoogleAuthScenario)
+}
@@ -0,0 +1,18 @@
+"""
+WSGI/ASGI entry points for load runs, started by benchmarks/run.py:
+
+    gunicorn benchmarks.server:wsgi -w 4
+    CAREER_VIEW_MODE=async uvicorn benchmarks.server:asgi --workers 4
+
+/api/auth/google/ verifies the locally signed tokens from benchmarks/fake_google.py
+(see GOOGLE_KEY_SOURCE in benchmarks/settings.py).
+"""
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+
+from django.core.asgi import get_asgi_application  # noqa: E402
+from django.core.wsgi import get_wsgi_application  # noqa: E402
+
+wsgi = get_wsgi_application()
+asgi = get_asgi_application()
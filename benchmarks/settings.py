@@ -0,0 +1,43 @@
+"""
+Settings for load runs (``DJANGO_SETTINGS_MODULE=benchmarks.settings``):
+the project settings with a local database and the LLM pointed at
+benchmarks/fake_openai.py.
+
+BENCH_DATABASE_URL picks the database (default: a SQLite file under
+benchmarks/.data/); use a local PostgreSQL for numbers that mean anything.
+"""
+import os
+
+import dj_database_url
+
+from career_project.settings import *  # noqa: F401,F403
+from career_project.settings import BASE_DIR
+
+
+BENCH_DATA_DIR = BASE_DIR / "benchmarks" / ".data"
+BENCH_DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+DATABASES = {
+    "default": dj_database_url.parse(
+        os.getenv("BENCH_DATABASE_URL", f"sqlite:///{BENCH_DATA_DIR / 'bench.sqlite3'}"),
+        conn_max_age=600,
+    )
+}
+if DATABASES["default"]["ENGINE"].endswith("sqlite3"):
+    DATABASES["default"]["OPTIONS"] = {"timeout": 30, "transaction_mode": "IMMEDIATE"}
+
+DEBUG = False
+ALLOWED_HOSTS = ["*"]
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "http://127.0.0.1:8765/v1")
+
+# Sign-in tokens from benchmarks/fake_google.py, verified against its local key set
+GOOGLE_KEY_SOURCE = "benchmarks.fake_google.FakeGoogleKeySource"
+GOOGLE_CLIENT_ID = "bench-google-client"
+
+# BENCH_FAST_HASHER=1 takes PBKDF2 out of /api/login/ to measure the view alone
+if os.getenv("BENCH_FAST_HASHER", "").lower() in ("1", "true"):
+    PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+# Load users loop on the generation endpoints: leave the per-user bucket off
+# unless a run sets ADMISSION_USER_RATE to measure it
+ADMISSION_USER_RATE = float(os.getenv("ADMISSION_USER_RATE", "0"))
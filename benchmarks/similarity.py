@@ -0,0 +1,102 @@
+"""
+Similar-profile index benchmark: fills a ProfileIndex with synthetic
+profiles, then reports append throughput, top-k query latency and, at the
+reuse threshold, how often a near-duplicate profile (one skill swapped, CGPA
++0.1) is answered by its original (reuse rate) and how often an unrelated
+profile would wrongly be (false reuse rate).
+
+    python -m benchmarks.similarity --rows 100000 --queries 2000 --threshold 0.85
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.run import percentile
+
+from career.similarity import ProfileIndex
+
+
+COURSES = ["BSc", "BTech", "BCom", "BA", "BBA", "BCA", "BE", "BDes", "BPharm", "LLB"]
+SPECIALIZATIONS = [
+    "Computer Science", "Mechanical", "Finance", "Economics", "Marketing", "Physics",
+    "Chemistry", "Psychology", "Civil", "Electronics", "Biology", "History",
+]
+SKILLS = [f"skill-{n}" for n in range(400)]
+INTERESTS = [f"interest-{n}" for n in range(150)]
+CERTIFICATIONS = [f"cert-{n}" for n in range(80)]
+
+
+def random_profile(rng):
+    return {
+        "ug_course": rng.choice(COURSES),
+        "ug_specialization": rng.choice(SPECIALIZATIONS),
+        "skills": rng.sample(SKILLS, rng.randint(3, 8)),
+        "interests": rng.sample(INTERESTS, rng.randint(1, 4)),
+        "certifications": rng.sample(CERTIFICATIONS, rng.randint(0, 2)),
+        "ug_cgpa": round(rng.uniform(5.5, 9.8), 1),
+        "experience_years": rng.randint(0, 5),
+    }
+
+
+def near_duplicate(profile, rng):
+    """The same profile with one skill swapped and the CGPA nudged by 0.1."""
+    skills = list(profile["skills"])
+    skills[rng.randrange(len(skills))] = rng.choice([s for s in SKILLS if s not in skills])
+    return {**profile, "skills": skills, "ug_cgpa": round(profile["ug_cgpa"] + 0.1, 1)}
+
+
+def run(rows, queries, threshold, dim=256, k=5, seed=0, directory=None):
+    rng = random.Random(seed)
+    profiles = [random_profile(rng) for _ in range(rows)]
+    with tempfile.TemporaryDirectory() as tmp:
+        index = ProfileIndex(directory or tmp, dim)
+        started = time.perf_counter()
+        for start in range(0, rows, 1000):
+            index.add((pk + 1, profile) for pk, profile in enumerate(profiles[start:start + 1000], start))
+        build = time.perf_counter() - started
+
+        latencies, reused, false_reused = [], 0, 0
+        for _ in range(queries):
+            target = rng.randrange(rows)
+            started = time.perf_counter()
+            hits = index.query(near_duplicate(profiles[target], rng), k)
+            latencies.append(time.perf_counter() - started)
+            if hits and hits[0][1] >= threshold and hits[0][0] == target + 1:
+                reused += 1
+            hits = index.query(random_profile(rng), k)
+            if hits and hits[0][1] >= threshold:
+                false_reused += 1
+
+    latencies.sort()
+    return {
+        "rows": rows,
+        "dim": dim,
+        "threshold": threshold,
+        "index_mb": round(rows * dim * 4 / 2**20, 1),
+        "build_rows_per_s": round(rows / build),
+        "query_p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "query_p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "query_p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "reuse_rate": round(reused / queries, 4),
+        "false_reuse_rate": round(false_reused / queries, 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the similar-profile index.")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.rows, args.queries, args.threshold, args.dim, args.k, args.seed), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
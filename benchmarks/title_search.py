@@ -0,0 +1,109 @@
+"""
+Career-title search benchmark: fills a TitleIndex with synthetic titles
+(seniority x field x role), then reports build time, snapshot size and load
+time, and per-query latency for three kinds of input: a prefix being typed,
+a title with a typo and an abbreviation ("ml engineer").
+
+    python -m benchmarks.title_search --titles 20000 --queries 3000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.run import percentile
+
+
+SENIORITY = ["", "Junior", "Senior", "Lead", "Principal", "Associate", "Chief", "Head of"]
+FIELDS = [
+    "Data", "Machine Learning", "Backend", "Frontend", "Cloud", "Security", "Product", "Marketing", "Financial",
+    "Clinical", "Research", "Supply Chain", "Human Resources", "Embedded", "Game", "Quantitative", "Legal", "UX",
+]
+ROLES = [
+    "Analyst", "Engineer", "Scientist", "Manager", "Architect", "Designer", "Consultant", "Specialist",
+    "Developer", "Strategist", "Coordinator", "Administrator", "Researcher", "Officer", "Technician",
+]
+
+
+def random_title(rng):
+    return " ".join(part for part in (rng.choice(SENIORITY), rng.choice(FIELDS), rng.choice(ROLES)) if part)
+
+
+def typo(rng, title):
+    chars = list(title)
+    i = rng.randrange(1, len(chars) - 2)
+    chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return "".join(chars)
+
+
+def abbreviate(title):
+    words = title.split()
+    return " ".join(["".join(word[0] for word in words[:-1]).lower(), words[-1]]) if len(words) > 2 else title
+
+
+def run(titles, queries, seed=0):
+    from career.titles import TitleIndex
+
+    rng = random.Random(seed)
+    # Extra suffixes ("II", "- Remote", numbered teams) make the distinct-title count reachable
+    names = [f"{random_title(rng)} {rng.choice(['', 'II', 'III', '- Remote', f'Team {rng.randint(1, 999)}'])}".strip() for _ in range(titles)]
+    index = TitleIndex()
+    started = time.perf_counter()
+    index.add(names)
+    build = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "titles.npz")
+        index.save(path)
+        size = os.path.getsize(path)
+        started = time.perf_counter()
+        index = TitleIndex.load(path)
+        load = time.perf_counter() - started
+
+    kinds = {
+        "prefix": lambda title: title[: rng.randint(3, len(title))],
+        "typo": lambda title: typo(rng, title),
+        "abbreviation": abbreviate,
+    }
+    result = {
+        "titles": len(index),
+        "build_s": round(build, 3),
+        "snapshot_kb": round(size / 1024, 1),
+        "load_s": round(load, 3),
+    }
+    for kind, make in kinds.items():
+        latencies, found = [], 0
+        for _ in range(queries):
+            title = rng.choice(names)
+            query = make(title)
+            started = time.perf_counter()
+            results = index.search(query, 10)
+            latencies.append(time.perf_counter() - started)
+            found += any(match == " ".join(title.split()) for match, _, _ in results)
+        latencies.sort()
+        result[f"{kind}_p50_us"] = round(percentile(latencies, 0.50) * 1e6, 1)
+        result[f"{kind}_p99_us"] = round(percentile(latencies, 0.99) * 1e6, 1)
+        result[f"{kind}_recall_at_10"] = round(found / queries, 4)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the career-title search index.")
+    parser.add_argument("--titles", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    import django
+
+    django.setup()
+    print(json.dumps(run(args.titles, args.queries, args.seed), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,42 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import CareerTitleRollup, SkillCourseRollup, TokenUsageRollup
+
+
+class RollupAdmin(admin.ModelAdmin):
+    """Read-only changelists over the rollup tables (career/rollups.py); they never touch the history tables."""
+
+    date_hierarchy = "day"
+    list_filter = ("day",)
+    show_full_result_count = False  # no COUNT(*) of the unfiltered table per page
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CareerTitleRollup)
+class CareerTitleRollupAdmin(RollupAdmin):
+    list_display = ("day", "title", "predictions", "suggestions")
+    search_fields = ("key",)
+    ordering = ("-day", "-predictions")
+
+
+@admin.register(SkillCourseRollup)
+class SkillCourseRollupAdmin(RollupAdmin):
+    list_display = ("day", "course", "skill", "predictions")
+    search_fields = ("course", "skill")
+    ordering = ("-day", "course", "-predictions")
+
+
+@admin.register(TokenUsageRollup)
+class TokenUsageRollupAdmin(RollupAdmin):
+    list_display = ("day", "endpoint", "llm_model", "rows", "generations", "prompt_tokens", "completion_tokens")
+    list_filter = ("day", "endpoint", "llm_model")
+    ordering = ("-day", "endpoint", "llm_model")
@@ -0,0 +1,415 @@
+import asyncio
+import functools
+import heapq
+import itertools
+import json
+import math
+import os
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Least
+from django.db.models.lookups import GreaterThanOrEqual
+from django.http import HttpResponse
+from rest_framework.response import Response
+
+from . import metrics
+from .models import RateBucket
+
+
+# Admission control for the LLM-backed endpoints. A request decorated with
+# ``@admit(lane)`` first spends a token from its user's bucket and from the
+# global bucket (ADMISSION_USER_RATE / ADMISSION_GLOBAL_RATE, requests per
+# minute); the buckets live in the database so every worker shares them. An
+# empty user bucket answers 429, an empty global one 503, both with Retry-After.
+#
+# It then takes one of this process's ADMISSION_MAX_ACTIVE generation slots. When
+# all are busy it waits in a bounded queue where the interactive lane goes before
+# the bulk lane. A request that would not get a slot within ADMISSION_MAX_WAIT
+# (estimated from recent slot hold times) is shed with 503 at once instead of
+# holding a worker thread until it times out. Reads such as /api/history/ never
+# pass through here; the queue bound keeps worker threads free for them.
+
+LANES = {"interactive": 0, "bulk": 1}
+
+
+class Rejected(Exception):
+    def __init__(self, status, retry_after, message):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    def response(self, is_async):
+        body = {"error": str(self), "retry_after": math.ceil(self.retry_after)}
+        if is_async:
+            response = HttpResponse(json.dumps(body), status=self.status, content_type="application/json")
+        else:
+            response = Response(body, status=self.status)
+        response["Retry-After"] = str(max(math.ceil(self.retry_after), 1))
+        return response
+
+
+# --- token buckets ---
+class LocalBucketStore:
+    """Buckets in this process only: the stand-in for tests and single-process runs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def take(self, key, rate, burst, cost=1, now=None):
+        """Spend ``cost`` tokens; returns 0 or the seconds until they would be available."""
+        now = time.time() if now is None else now
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (cost - tokens) / rate
+
+    def refund(self, key, burst, cost=1):
+        with self._lock:
+            if key in self._buckets:
+                tokens, updated = self._buckets[key]
+                self._buckets[key] = (min(burst, tokens + cost), updated)
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class DatabaseBucketStore:
+    """Buckets in the RateBucket table. A grant is one conditional UPDATE, so workers never race."""
+
+    def take(self, key, rate, burst, cost=1, now=None):
+        now = time.time() if now is None else now
+        refilled = Least(Value(burst), F("tokens") + (Value(now) - F("updated")) * Value(rate), output_field=FloatField())
+        taken = RateBucket.objects.filter(GreaterThanOrEqual(refilled, cost), key=key).update(
+            tokens=refilled - cost, updated=now
+        )
+        if taken:
+            return 0.0
+        bucket = RateBucket.objects.filter(key=key).first()
+        if bucket is None:
+            try:
+                with transaction.atomic():
+                    RateBucket.objects.create(key=key, tokens=burst - cost, updated=now)
+                return 0.0
+            except IntegrityError:
+                return self.take(key, rate, burst, cost, now)  # another worker created it first
+        tokens = min(burst, bucket.tokens + (now - bucket.updated) * rate)
+        # Refilled between the UPDATE and the read: a retry soon will succeed
+        return max((cost - tokens) / rate, 0.01)
+
+    def refund(self, key, burst, cost=1):
+        RateBucket.objects.filter(key=key).update(tokens=Least(Value(burst), F("tokens") + cost, output_field=FloatField()))
+
+    def clear(self):
+        RateBucket.objects.all().delete()
+
+
+_stores = {}
+
+
+def get_store():
+    name = getattr(settings, "ADMISSION_BUCKET_STORE", "db")
+    store = _stores.get(name)
+    if store is None:
+        store = _stores[name] = LocalBucketStore() if name == "local" else DatabaseBucketStore()
+    return store
+
+
+def _buckets(user):
+    # (key, tokens per second, burst) of every enabled bucket, the user's first
+    buckets = []
+    user_rate = getattr(settings, "ADMISSION_USER_RATE", 0)
+    if user_rate > 0 and user is not None and user.pk is not None:
+        buckets.append((f"user:{user.pk}", user_rate / 60, getattr(settings, "ADMISSION_USER_BURST", 10)))
+    global_rate = getattr(settings, "ADMISSION_GLOBAL_RATE", 0)
+    if global_rate > 0:
+        buckets.append(("global", global_rate / 60, getattr(settings, "ADMISSION_GLOBAL_BURST", 100)))
+    return buckets
+
+
+def take_quota(user, cost=1):
+    """Spend ``cost`` from the user's and the global bucket; returns what to ``refund`` on a later rejection."""
+    store = get_store()
+    spent = []
+    for key, rate, burst in _buckets(user):
+        amount = min(cost, burst)
+        wait = store.take(key, rate, burst, amount)
+        if wait:
+            refund(spent)
+            if key == "global":
+                raise Rejected(503, wait, "The service is at capacity, try again shortly.")
+            raise Rejected(429, wait, "Too many generation requests, slow down.")
+        spent.append((key, burst, amount))
+    return spent
+
+
+def refund(spent):
+    store = get_store()
+    for key, burst, amount in spent:
+        store.refund(key, burst, amount)
+
+
+# --- wait queue ---
+class _Waiter:
+    __slots__ = ("priority", "notify", "granted")
+
+    def __init__(self, priority, notify):
+        self.priority = priority
+        self.notify = notify
+        self.granted = False
+
+
+class Ticket:
+    """A held generation slot; ``release`` hands it to the next waiter (idempotent)."""
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.started = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.queue.release(time.monotonic() - self.started)
+
+
+class AdmissionQueue:
+    """
+    ``slots`` concurrent holders; up to ``max_queue`` more wait, lower lane
+    priority first and FIFO within a lane. Shared by the sync views' threads
+    and the async views' event loop of one process.
+    """
+
+    def __init__(self, slots, max_queue, smoothing=0.2):
+        self.slots = slots
+        self.max_queue = max_queue
+        self.smoothing = smoothing
+        self.service_time = None  # moving average of slot hold times, seconds
+        self.active = 0
+        self._waiting = []  # heap of (priority, seq, waiter)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.counters = {"admitted": 0, "queued": 0, "shed": 0, "expired": 0}
+
+    def estimated_wait(self, priority):
+        # Everyone ahead in this lane or a better one, drained by `slots` holders
+        ahead = sum(1 for entry in self._waiting if entry[0] <= priority)
+        return (ahead + 1) / self.slots * (self.service_time or 0.0)
+
+    def _enqueue(self, lane, deadline, notify):
+        """``None`` with a slot taken now, else the queued waiter; raises ``Rejected`` to shed."""
+        priority = LANES[lane]
+        with self._lock:
+            if self.active < self.slots and not self._waiting:
+                self.active += 1
+                self.counters["admitted"] += 1
+                return None
+            estimate = self.estimated_wait(priority)
+            if len(self._waiting) >= self.max_queue or time.monotonic() + estimate > deadline:
+                self.counters["shed"] += 1
+                raise Rejected(503, max(estimate, 1.0), "The service is busy, try again shortly.")
+            waiter = _Waiter(priority, notify)
+            heapq.heappush(self._waiting, (priority, next(self._seq), waiter))
+            self.counters["queued"] += 1
+            return waiter
+
+    def _cancel(self, waiter):
+        """Take a waiter out of the queue; False if it was granted a slot meanwhile."""
+        with self._lock:
+            if waiter.granted:
+                return False
+            self._waiting = [entry for entry in self._waiting if entry[2] is not waiter]
+            heapq.heapify(self._waiting)
+            self.counters["expired"] += 1
+            return True
+
+    def _expired(self, lane):
+        return Rejected(503, max(self.estimated_wait(LANES[lane]), 1.0), "The service is busy, try again shortly.")
+
+    def acquire(self, lane, deadline):
+        event = threading.Event()
+        waiter = self._enqueue(lane, deadline, event.set)
+        if waiter is not None and not event.wait(max(deadline - time.monotonic(), 0)) and self._cancel(waiter):
+            raise self._expired(lane)
+        return Ticket(self)
+
+    async def aacquire(self, lane, deadline):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def grant():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(True))
+
+        waiter = self._enqueue(lane, deadline, grant)
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(future), max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                if self._cancel(waiter):
+                    raise self._expired(lane)
+            except asyncio.CancelledError:
+                # The client went away: give up the place, or the slot it was just handed
+                if not self._cancel(waiter):
+                    self.release(None)
+                raise
+        return Ticket(self)
+
+    def release(self, held):
+        with self._lock:
+            if held is not None:
+                if self.service_time is None:
+                    self.service_time = held
+                else:
+                    self.service_time += self.smoothing * (held - self.service_time)
+            if self._waiting:
+                # The slot passes straight to the next waiter: `active` is unchanged
+                waiter = heapq.heappop(self._waiting)[2]
+                waiter.granted = True
+                waiter.notify()
+            else:
+                self.active -= 1
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, "active": self.active, "waiting": len(self._waiting), "service_time": self.service_time}
+
+
+_queue = {"pid": None, "queue": None}
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """This process's queue (a forked worker starts with an empty one); ``None`` when disabled."""
+    with _queue_lock:
+        if _queue["pid"] != os.getpid():
+            slots = getattr(settings, "ADMISSION_MAX_ACTIVE", 0)
+            _queue["queue"] = AdmissionQueue(slots, getattr(settings, "ADMISSION_QUEUE_SIZE", 0)) if slots > 0 else None
+            _queue["pid"] = os.getpid()
+        return _queue["queue"]
+
+
+def reset():
+    """Forget this process's queue and in-process buckets (settings changed, tests)."""
+    with _queue_lock:
+        _queue["pid"] = None
+    _stores.pop("local", None)
+
+
+# --- views ---
+def _held(response, ticket):
+    # A streamed body keeps generating after the view returns: release when it closes
+    if not response.streaming:
+        ticket.release()
+        return response
+    stream = _AsyncReleasingStream if response.is_async else _ReleasingStream
+    response.streaming_content = stream(response.streaming_content, ticket)
+    return response
+
+
+class _Releasing:
+    def __init__(self, content, ticket):
+        self.content = content
+        self.ticket = ticket
+
+    def close(self):
+        # Also runs when the client left before the body was read
+        self.ticket.release()
+
+
+class _ReleasingStream(_Releasing):
+    def __iter__(self):
+        try:
+            yield from self.content
+        finally:
+            self.ticket.release()
+
+
+# No __iter__: StreamingHttpResponse would take anything iterable as a sync body
+class _AsyncReleasingStream(_Releasing):
+    async def __aiter__(self):
+        try:
+            async for chunk in self.content:
+                yield chunk
+        finally:
+            self.ticket.release()
+
+
+# Decorator: quota and queue for a DRF ``post`` method or an async view's coroutine
+# handler. ``cost(request)`` is the number of bucket tokens the request spends.
+def admit(lane, cost=None):
+    def deadline():
+        return time.monotonic() + getattr(settings, "ADMISSION_MAX_WAIT", 10)
+
+    def record(result):
+        metrics.record_admission(lane, result)
+
+    def decorator(method):
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, request, *args, **kwargs):
+                queue = get_queue()
+                try:
+                    # No buckets configured: skip the thread hop
+                    spent = await sync_to_async(take_quota)(request.user, cost(request) if cost else 1) if _buckets(request.user) else []
+                except Rejected as e:
+                    record("quota")
+                    return e.response(is_async=True)
+                if queue is None:
+                    record("admitted")
+                    return await method(self, request, *args, **kwargs)
+                try:
+                    with metrics.phase("queue"):
+                        ticket = await queue.aacquire(lane, deadline())
+                except Rejected as e:
+                    await sync_to_async(refund)(spent)
+                    record("shed")
+                    return e.response(is_async=True)
+                record("admitted")
+                try:
+                    response = await method(self, request, *args, **kwargs)
+                except BaseException:
+                    ticket.release()
+                    raise
+                return _held(response, ticket)
+
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            queue = get_queue()
+            try:
+                spent = take_quota(request.user, cost(request) if cost else 1)
+            except Rejected as e:
+                record("quota")
+                return e.response(is_async=False)
+            if queue is None:
+                record("admitted")
+                return method(self, request, *args, **kwargs)
+            try:
+                with metrics.phase("queue"):
+                    ticket = queue.acquire(lane, deadline())
+            except Rejected as e:
+                refund(spent)
+                record("shed")
+                return e.response(is_async=False)
+            record("admitted")
+            try:
+                response = method(self, request, *args, **kwargs)
+            except BaseException:
+                ticket.release()
+                raise
+            return _held(response, ticket)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,285 @@
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_datetime
+
+
+# Cold archive for old CareerPrediction/CareerSuggestion rows (`manage.py
+# archive_history`). Rows are moved out of the database into per-month segments
+# under ARCHIVE_DIR/<kind>/: an append-only data file of zlib-compressed JSONL
+# frames (one frame per user per archival batch, rows newest first, each row as
+# the API serializes it) and a fixed-width index of (user, newest, oldest,
+# offset, length, count) records that readers memory-map and scan with numpy.
+#
+# Archival moves the oldest rows first, so every archived row of a user is older
+# than their rows still in the database: /api/history/ pages through the table and
+# only then through the segments, newest month first, with the same cursor.
+# Each process caches the directory listing (until the directory's mtime changes)
+# and the user ids of each index, so reaching the end of the table costs a user
+# with nothing archived a stat and a set lookup per segment.
+#
+# Writers hold a per-kind flock. Data is fsynced before its index records are
+# appended, so readers never see a frame that is not fully on disk. Compaction
+# (dropping deleted users) writes the next generation of a segment and only then
+# removes the old one; readers pick the newest generation with an index file.
+
+KINDS = ("predictions", "suggestions")
+COMPRESSION_LEVEL = 9  # written once, read rarely
+
+INDEX_DTYPE = np.dtype([
+    ("user", "<i8"),
+    ("newest", "<f8"),  # created_at timestamps of the frame's first and last row
+    ("oldest", "<f8"),
+    ("offset", "<i8"),
+    ("length", "<i8"),
+    ("count", "<i8"),
+])
+
+_SEGMENT = re.compile(r"^(\d{4}-\d{2})\.(\d+)\.idx$")
+_indexes = {}  # index path -> ((inode, records), memmap, user ids)
+_segment_lists = {}  # kind directory -> (mtime_ns, segments)
+_indexes_lock = threading.Lock()
+# A directory listing is reused while the directory's mtime is unchanged, but not
+# within this many seconds of it: a second change in the same clock tick would
+# leave the mtime as it was
+MTIME_GRANULARITY = 1.0
+
+
+def directory(kind):
+    return Path(getattr(settings, "ARCHIVE_DIR", "/tmp/elevare-archive")) / kind
+
+
+def month_of(created_at):
+    return created_at.strftime("%Y-%m")
+
+
+class Segment:
+    """One generation of one month's archive: ``<month>.<generation>.jsonl.z`` plus its ``.idx``."""
+
+    def __init__(self, kind, month, generation):
+        self.kind = kind
+        self.month = month
+        self.generation = generation
+        base = directory(kind)
+        self.data_path = base / f"{month}.{generation}.jsonl.z"
+        self.index_path = base / f"{month}.{generation}.idx"
+
+    def _mapped(self):
+        # The index records, memory-mapped (re-mapped when appends grew the file), and their user ids
+        stat = os.stat(self.index_path)
+        count = stat.st_size // INDEX_DTYPE.itemsize
+        key = str(self.index_path)
+        with _indexes_lock:
+            cached = _indexes.get(key)
+            # A recreated file (same name after compaction) has a new inode
+            if cached is None or cached[0] != (stat.st_ino, count):
+                mapped = np.memmap(self.index_path, dtype=INDEX_DTYPE, mode="r", shape=(count,)) if count else np.zeros(0, INDEX_DTYPE)
+                cached = _indexes[key] = ((stat.st_ino, count), mapped, frozenset(np.unique(mapped["user"]).tolist()))
+        return cached
+
+    def entries(self):
+        """The index records, memory-mapped."""
+        return self._mapped()[1]
+
+    def has_user(self, user_id):
+        return user_id in self._mapped()[2]
+
+    def read_frame(self, entry):
+        with open(self.data_path, "rb") as f:
+            f.seek(int(entry["offset"]))
+            body = f.read(int(entry["length"]))
+        return [json.loads(line) for line in zlib.decompress(body).decode("utf-8").splitlines()]
+
+    def user_frames(self, user_id):
+        entries = self.entries()
+        return entries[entries["user"] == user_id]
+
+    def archived_ids(self, user_id, rows):
+        """Ids of ``user_id``'s frames overlapping the time span of ``rows``."""
+        times = [_key(row)[0].timestamp() for row in rows]
+        frames = self.user_frames(user_id)
+        frames = frames[(frames["oldest"] <= max(times)) & (frames["newest"] >= min(times))]
+        return {row["id"] for entry in frames for row in self.read_frame(entry)}
+
+
+def segments(kind):
+    """The newest generation of each month's segment, newest month first."""
+    path = directory(kind)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    with _indexes_lock:
+        cached = _segment_lists.get(str(path))
+    if cached is not None and cached[0] == mtime_ns:
+        return list(cached[1])
+    latest = {}
+    for name in os.listdir(path):
+        match = _SEGMENT.match(name)
+        if match:
+            month, generation = match.group(1), int(match.group(2))
+            latest[month] = max(latest.get(month, 0), generation)
+    listed = [Segment(kind, month, latest[month]) for month in sorted(latest, reverse=True)]
+    if time.time() - mtime_ns / 1e9 > MTIME_GRANULARITY:
+        with _indexes_lock:
+            _segment_lists[str(path)] = (mtime_ns, listed)
+    return list(listed)
+
+
+def _key(row):
+    return parse_datetime(row["created_at"]), row["id"]
+
+
+# --- reading ---
+def history(kind, user_id, after=None, limit=50):
+    """
+    Up to ``limit`` archived rows of ``user_id``, newest first, strictly after
+    ``after`` ((created_at, id) of the previous page's last row) in that order.
+    """
+    rows = []
+    after_ts = after[0].timestamp() if after else None
+    for segment in segments(kind):
+        try:
+            # Most users have nothing archived: skip the scan (and the read) on a miss
+            if not segment.has_user(user_id):
+                continue
+            frames = segment.user_frames(user_id)
+            if after_ts is not None:
+                # Frames entirely newer than the cursor; the exact filter below handles ties
+                frames = frames[frames["oldest"] <= after_ts]
+            found = [row for entry in frames for row in segment.read_frame(entry)]
+        except FileNotFoundError:
+            # Compacted under us: the next generation has the same rows
+            with _indexes_lock:
+                _indexes.pop(str(segment.index_path), None)
+            return history(kind, user_id, after, limit)
+        if after is not None:
+            found = [row for row in found if _key(row) < after]
+        rows.extend(sorted(found, key=_key, reverse=True))
+        # Months partition created_at: older segments only hold older rows
+        if len(rows) >= limit:
+            break
+    return rows[:limit]
+
+
+def iter_history(kind, user_id, after=None, chunk_size=500):
+    """Every archived row of ``user_id`` after ``after``, newest first, read ``chunk_size`` rows at a time."""
+    while True:
+        rows = history(kind, user_id, after, chunk_size)
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        after = _key(rows[-1])
+
+
+# --- writing ---
+@contextmanager
+def lock(kind):
+    """Exclusive, cross-process lock on ``kind``'s segments; held around append() and compaction."""
+    path = directory(kind)
+    path.mkdir(parents=True, exist_ok=True)
+    with open(path / "lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _frame(rows):
+    lines = "".join(json.dumps(row, cls=DjangoJSONEncoder, separators=(",", ":")) + "\n" for row in rows)
+    return zlib.compress(lines.encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def append(kind, month, frames):
+    """
+    Append ``frames`` ({user_id: rows}) to ``month``'s segment. Rows are serialized
+    dicts with ``id`` and ``created_at``. Callers hold lock(kind).
+
+    Rows already in the segment are skipped: a batch whose delete did not commit
+    after its frames were written is selected again by the next run.
+    """
+    segment = next((segment for segment in segments(kind) if segment.month == month), None) or Segment(kind, month, 1)
+    records = []
+    with open(segment.data_path, "ab") as data:
+        offset = data.tell()
+        for user_id, rows in frames.items():
+            archived = segment.archived_ids(user_id, rows) if segment.index_path.exists() else set()
+            rows = sorted((row for row in rows if row["id"] not in archived), key=_key, reverse=True)
+            if not rows:
+                continue
+            body = _frame(rows)
+            data.write(body)
+            records.append((user_id, _key(rows[0])[0].timestamp(), _key(rows[-1])[0].timestamp(), offset, len(body), len(rows)))
+            offset += len(body)
+        data.flush()
+        os.fsync(data.fileno())
+    if not records:
+        return segment
+    with open(segment.index_path, "ab") as index:
+        # Drop a record torn by a crash mid-append before adding whole ones
+        index.truncate(index.tell() - index.tell() % INDEX_DTYPE.itemsize)
+        index.seek(0, os.SEEK_END)
+        index.write(np.array(records, dtype=INDEX_DTYPE).tobytes())
+        index.flush()
+        os.fsync(index.fileno())
+    return segment
+
+
+def compact(kind, existing_users):
+    """
+    Rewrite the segments holding frames of users that no longer exist.
+    ``existing_users(ids)`` returns the subset of ``ids`` still present.
+    Returns (segments rewritten, frames dropped, bytes freed).
+    """
+    rewritten = dropped = freed = 0
+    with lock(kind):
+        for segment in segments(kind):
+            entries = np.array(segment.entries())
+            users = {int(user) for user in np.unique(entries["user"])}
+            gone = users - set(existing_users(users))
+            if not gone:
+                continue
+            keep = entries[~np.isin(entries["user"], list(gone))]
+            dropped += len(entries) - len(keep)
+            freed += int(entries["length"].sum() - keep["length"].sum())
+            rewritten += 1
+            if len(keep):
+                _rewrite(segment, keep)
+            segment.index_path.unlink()
+            segment.data_path.unlink(missing_ok=True)
+            with _indexes_lock:
+                _indexes.pop(str(segment.index_path), None)
+    return rewritten, dropped, freed
+
+
+def _rewrite(segment, keep):
+    # Next generation: data first, then the index under its final name, atomically
+    target = Segment(segment.kind, segment.month, segment.generation + 1)
+    records = keep.copy()
+    with open(segment.data_path, "rb") as source, open(target.data_path, "wb") as data:
+        offset = 0
+        for i, record in enumerate(keep):
+            source.seek(int(record["offset"]))
+            body = source.read(int(record["length"]))
+            data.write(body)
+            records["offset"][i] = offset
+            offset += len(body)
+        data.flush()
+        os.fsync(data.fileno())
+    tmp = target.index_path.parent / f"{target.index_path.name}.tmp"
+    with open(tmp, "wb") as index:
+        index.write(records.tobytes())
+        index.flush()
+        os.fsync(index.fileno())
+    os.replace(tmp, target.index_path)
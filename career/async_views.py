@@ -0,0 +1,215 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+
+from . import catalog, jobs, llm, services, titles
+from .admission import admit
+from .authentication import TimedJWTAuthentication
+from .cache import prediction_cache, profile_key
+from .llm import LLMUnavailable
+from .models import CareerPrediction, CareerSuggestion, GenerationJob
+from .prompts import get_prompt
+from .serializers import CareerInputSerializer
+from .singleflight import GenerationError, idempotent
+from .streaming import (
+    JSONEventScanner, career_details_event, career_details_event_path, delta_text, payload_events,
+    prediction_event, prepare_sse_response, sse, wants_stream,
+)
+from .parsing import parse_career_details
+from .services import Usage
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    return JsonResponse(data, status=status, encoder=DjangoJSONEncoder, safe=False)
+
+
+async def accepted_job(request, kind, payload):
+    job = await GenerationJob.objects.acreate(user=request.user, kind=kind, payload=payload)
+    body = jobs.accepted_body(request, job)
+    response = json_response(body, status=status.HTTP_202_ACCEPTED)
+    response["Location"] = body["status_url"]
+    return response
+
+
+def unavailable_response(error):
+    response = json_response({"error": str(error)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    if error.retry_after:
+        response["Retry-After"] = str(int(error.retry_after))
+    return response
+
+
+class AsyncAPIView(View):
+    """
+    Async stand-in for DRF's APIView (which cannot run async handlers):
+    JWT authentication, a parsed JSON ``request.data`` and JSON errors.
+    """
+
+    authentication_class = TimedJWTAuthentication
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            authentication = self.authentication_class()
+            if authentication.is_stateless():
+                auth = authentication.authenticate(request)  # no query: skip the thread hop
+            else:
+                auth = await sync_to_async(authentication.authenticate)(request)
+        except exceptions.AuthenticationFailed as e:
+            return json_response(e.detail, status=status.HTTP_401_UNAUTHORIZED)
+        if auth is None:
+            return json_response(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        request.user, request.auth = auth
+
+        try:
+            request.data = json.loads(request.body or b"{}")
+        except ValueError:
+            return json_response({"detail": "JSON parse error."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(request.data, dict):
+            return json_response({"detail": "Expected a JSON object."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return await super().dispatch(request, *args, **kwargs)
+
+
+# --- Career Prediction API (async) ---
+class AsyncCareerPredictView(AsyncAPIView):
+
+    @idempotent("predict")
+    @admit("interactive")
+    async def post(self, request):
+        try:
+            input_serializer = CareerInputSerializer(data=request.data)
+            if not input_serializer.is_valid():
+                return json_response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            user_data = request.data
+            if jobs.wants_job(request):
+                return await accepted_job(request, GenerationJob.KIND_PREDICT, user_data)
+            if wants_stream(request):
+                cache_key = profile_key(input_serializer.validated_data)
+                cached, cache_tier = await prediction_cache.aget(cache_key)
+                return self.stream(request, user_data, cache_key, cached, cache_tier)
+
+            prediction, cache_tier = await services.apredict(request.user, user_data, input_serializer.validated_data)
+
+            response = json_response(services.prediction_body(prediction))
+            response["X-Cache"] = "HIT" if cache_tier else "MISS"
+            if cache_tier:
+                response["X-Cache-Tier"] = cache_tier
+            return response
+
+        except LLMUnavailable as e:
+            return unavailable_response(e)
+        except GenerationError as e:
+            return json_response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except Exception as e:
+            return json_response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def stream(self, request, user_data, cache_key, cached, cache_tier):
+        user = request.user
+
+        async def events():
+            try:
+                stream = services.PredictionStream(user_data, cache_key, prediction_event, cached, cache_tier)
+                async for event in stream.aevents():
+                    yield event
+                prediction = await CareerPrediction.objects.acreate(
+                    user=user,
+                    user_input=user_data,
+                    prediction=stream.payload,
+                    **stream.usage.fields()
+                )
+                yield sse("done", {"id": prediction.id, "created_at": prediction.created_at})
+
+            except Exception as e:
+                yield sse("error", {"error": str(e)})
+
+        response = StreamingHttpResponse(events(), content_type="text/event-stream")
+        response["X-Cache"] = "HIT" if cached is not None else "MISS"
+        return prepare_sse_response(response)
+
+
+# --- Career Details API (async) ---
+class AsyncCareerDetailsView(AsyncAPIView):
+
+    @idempotent("career")
+    @admit("interactive")
+    async def post(self, request):
+        try:
+            career_name = request.data.get("career")
+            if not career_name:
+                return json_response({"error": "Career field is required."}, status=status.HTTP_400_BAD_REQUEST)
+            career_name = await sync_to_async(titles.snap)(career_name)
+
+            if jobs.wants_job(request):
+                return await accepted_job(request, GenerationJob.KIND_CAREER, {"career": career_name})
+
+            if wants_stream(request):
+                return self.stream(request, career_name, await catalog.alookup(career_name))
+
+            suggestion, cache_tier = await services.acareer_details(request.user, career_name)
+
+            response = json_response(services.career_details_body(suggestion))
+            response["X-Cache"] = "HIT" if cache_tier else "MISS"
+            if cache_tier:
+                response["X-Cache-Tier"] = cache_tier
+            return response
+
+        except LLMUnavailable as e:
+            return unavailable_response(e)
+        except GenerationError as e:
+            return json_response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except Exception as e:
+            return json_response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def stream(self, request, career_name, entry):
+        user = request.user
+
+        async def events():
+            usage = Usage()
+            try:
+                catalog_entry = entry
+                if catalog_entry is not None:
+                    for event in payload_events(catalog_entry.payload, career_details_event_path, career_details_event):
+                        yield event
+                else:
+                    scanner = JSONEventScanner(career_details_event_path)
+                    prompt = get_prompt("career_details")
+                    usage.prompt_version = prompt.id
+                    chunks = await llm.gateway.achat(prompt.messages({"career_name": career_name}), stream=True)
+                    async for chunk in chunks:
+                        usage.add(chunk)
+                        for path, value in scanner.feed(delta_text(chunk)):
+                            yield career_details_event(path, value)
+
+                    usage.finish()
+                    parsed_json = parse_career_details(scanner.text).payload
+                    if not parsed_json:
+                        yield sse("error", {"error": "Failed to parse JSON from OpenAI response."})
+                        return
+                    catalog_entry = await catalog.astore(career_name, parsed_json)
+
+                suggestion = await CareerSuggestion.objects.acreate(
+                    user=user,
+                    career=career_name,
+                    catalog=catalog_entry,
+                    **usage.fields()
+                )
+                yield sse("done", {"id": suggestion.id, "created_at": suggestion.created_at})
+
+            except Exception as e:
+                yield sse("error", {"error": str(e)})
+
+        response = StreamingHttpResponse(events(), content_type="text/event-stream")
+        response["X-Cache"] = "HIT" if entry is not None else "MISS"
+        return prepare_sse_response(response)
@@ -0,0 +1,96 @@
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import metrics
+from .cache import LRUCache
+
+
+# JWT authentication without a User query on every request:
+#   JWT_STATELESS_USER   a read-only User built from the signed claims that
+#                        issue_tokens() adds (id, username, email, is_active,
+#                        is_staff, is_superuser). It can be assigned to foreign keys
+#                        and used in filters but not saved, and the flags are as of
+#                        when the refresh token was issued.
+#   JWT_USER_CACHE_TTL   otherwise, full User rows are kept in a bounded per-process
+#                        LRU for this many seconds (0: query every time). Saves and
+#                        deletes drop the entry (career/signals.py); other workers
+#                        see the change within the TTL.
+
+user_cache = LRUCache(maxsize=getattr(settings, "JWT_USER_CACHE_SIZE", 10000))
+
+USER_CLAIMS = ("username", "email", "is_active", "is_staff", "is_superuser")
+
+
+def issue_tokens(user):
+    """A refresh token for ``user`` (its access tokens copy the claims) carrying USER_CLAIMS."""
+    refresh = RefreshToken.for_user(user)
+    for claim in USER_CLAIMS:
+        refresh[claim] = getattr(user, claim)
+    return refresh
+
+
+def _read_only(*args, **kwargs):
+    raise TypeError("This user was built from token claims and is read-only; load it from the database to change it.")
+
+
+def token_user(validated_token):
+    """A read-only User built from the token's claims, without touching the database."""
+    try:
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken("Token contained no recognizable user identification")
+    # Tokens issued without the flags (before issue_tokens) get no staff rights
+    if not validated_token.get("is_active", True):
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    User = get_user_model()
+    user = User(**{api_settings.USER_ID_FIELD: user_id})
+    for claim in USER_CLAIMS:
+        if claim in validated_token:
+            setattr(user, claim, validated_token[claim])
+    user.save = user.delete = _read_only
+    user._state.adding = False
+    user._state.db = "default"
+    return user
+
+
+def invalidate_user(user_id):
+    user_cache.delete(str(user_id))
+
+
+class TimedJWTAuthentication(JWTAuthentication):
+    """simplejwt authentication, timed as the "auth" phase of the request."""
+
+    @staticmethod
+    def is_stateless():
+        # True when authenticate() never queries the database (async views skip the thread hop)
+        return getattr(settings, "JWT_STATELESS_USER", False)
+
+    def authenticate(self, request):
+        with metrics.phase("auth"):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if self.is_stateless():
+            return token_user(validated_token)
+        ttl = getattr(settings, "JWT_USER_CACHE_TTL", 0)
+        if not ttl:
+            return super().get_user(validated_token)
+
+        key = str(validated_token.get(api_settings.USER_ID_CLAIM))
+        user = user_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(key, user, ttl=ttl)
+        elif api_settings.CHECK_REVOKE_TOKEN:
+            # simplejwt's password-change revocation check, against the cached row
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+        # A copy per request: views must not share (or mutate) one cached instance
+        return copy.copy(user)
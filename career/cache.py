@@ -0,0 +1,207 @@
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from . import metrics
+from .models import PredictionCacheEntry
+
+
+LIST_FIELDS = ("skills", "interests", "certifications")
+
+
+# Helper: canonical form of a validated CareerInputSerializer payload.
+# Strings are lowercased/stripped, list fields sorted and deduplicated and the
+# CGPA is floored into buckets, so equivalent profiles map to the same key.
+def normalize_profile(validated_data):
+    bucket = getattr(settings, "PREDICTION_CACHE_CGPA_BUCKET", 0.5)
+    profile = {}
+    for field, value in validated_data.items():
+        if value is None or value == "" or value == []:
+            continue
+        if field in LIST_FIELDS:
+            value = sorted({" ".join(str(v).split()).lower() for v in value if str(v).strip()})
+            if not value:
+                continue
+        elif field == "ug_cgpa":
+            value = math.floor(float(value) / bucket) * bucket if bucket else float(value)
+            value = round(value, 2)
+        elif isinstance(value, str):
+            value = " ".join(value.split()).lower()
+        profile[field] = value
+    return profile
+
+
+def profile_key(validated_data):
+    canonical = json.dumps(normalize_profile(validated_data), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU mapping whose entries expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class PredictionCache:
+    """
+    Two-tier cache for prediction payloads: an in-process LRU in front of
+    the shared ``PredictionCacheEntry`` table, so every gunicorn worker
+    benefits from a generation done by any other.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        self.ttl = ttl if ttl is not None else getattr(settings, "PREDICTION_CACHE_TTL", 86400)
+        self.local = LRUCache(
+            maxsize=maxsize if maxsize is not None else getattr(settings, "PREDICTION_CACHE_MAX_ENTRIES", 1024),
+            ttl=self.ttl,
+        )
+        self._lock = threading.Lock()
+        self.counters = {"hits_memory": 0, "hits_db": 0, "misses": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def get(self, key):
+        """Return ``(payload, tier)``; ``tier`` is ``"memory"``, ``"db"`` or ``None`` on a miss."""
+        payload = self.local.get(key)
+        if payload is not None:
+            self._count("hits_memory")
+            metrics.record_cache("prediction", "memory")
+            return payload, "memory"
+
+        entry = PredictionCacheEntry.objects.filter(key=key, expires_at__gt=timezone.now()).first()
+        if entry is not None:
+            PredictionCacheEntry.objects.filter(pk=entry.pk).update(hits=F("hits") + 1)
+            remaining = (entry.expires_at - timezone.now()).total_seconds()
+            self.local.set(key, entry.payload, ttl=max(remaining, 0))
+            self._count("hits_db")
+            metrics.record_cache("prediction", "db")
+            return entry.payload, "db"
+
+        self._count("misses")
+        metrics.record_cache("prediction", "miss")
+        return None, None
+
+    async def aget(self, key):
+        payload = self.local.get(key)
+        if payload is not None:
+            self._count("hits_memory")
+            metrics.record_cache("prediction", "memory")
+            return payload, "memory"
+
+        entry = await PredictionCacheEntry.objects.filter(key=key, expires_at__gt=timezone.now()).afirst()
+        if entry is not None:
+            await PredictionCacheEntry.objects.filter(pk=entry.pk).aupdate(hits=F("hits") + 1)
+            remaining = (entry.expires_at - timezone.now()).total_seconds()
+            self.local.set(key, entry.payload, ttl=max(remaining, 0))
+            self._count("hits_db")
+            metrics.record_cache("prediction", "db")
+            return entry.payload, "db"
+
+        self._count("misses")
+        metrics.record_cache("prediction", "miss")
+        return None, None
+
+    # Expired entries are kept until overwritten or purged; served only while the LLM is down
+    def get_stale(self, key):
+        entry = PredictionCacheEntry.objects.filter(key=key).only("payload").first()
+        return entry.payload if entry is not None else None
+
+    async def aget_stale(self, key):
+        entry = await PredictionCacheEntry.objects.filter(key=key).only("payload").afirst()
+        return entry.payload if entry is not None else None
+
+    def set(self, key, payload):
+        self.local.set(key, payload)
+        PredictionCacheEntry.objects.update_or_create(
+            key=key,
+            defaults={
+                "payload": payload,
+                "expires_at": timezone.now() + timedelta(seconds=self.ttl),
+                "hits": 0,
+            },
+        )
+
+    async def aset(self, key, payload):
+        self.local.set(key, payload)
+        await PredictionCacheEntry.objects.aupdate_or_create(
+            key=key,
+            defaults={
+                "payload": payload,
+                "expires_at": timezone.now() + timedelta(seconds=self.ttl),
+                "hits": 0,
+            },
+        )
+
+    def purge_expired(self, batch_size=1000):
+        """Delete entries expired more than PREDICTION_CACHE_STALE_DAYS ago; returns how many."""
+        cutoff = timezone.now() - timedelta(days=getattr(settings, "PREDICTION_CACHE_STALE_DAYS", 7))
+        expired = PredictionCacheEntry.objects.filter(expires_at__lt=cutoff)
+        deleted = 0
+        while True:
+            ids = list(expired.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += PredictionCacheEntry.objects.filter(pk__in=ids, expires_at__lt=cutoff).delete()[0]
+
+    def clear(self):
+        self.local.clear()
+        with self._lock:
+            for name in self.counters:
+                self.counters[name] = 0
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = sum(counters.values())
+        hits = counters["hits_memory"] + counters["hits_db"]
+        counters["hit_rate"] = hits / lookups if lookups else 0.0
+        counters["memory_entries"] = len(self.local)
+        return counters
+
+
+prediction_cache = PredictionCache()
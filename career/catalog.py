@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import metrics
+from .models import CareerCatalogEntry
+
+
+# Helper: "Data Scientist", " data  scientist " and "DATA SCIENTIST" share one entry
+def normalize_career_name(name):
+    return " ".join(str(name).split()).casefold()[:255]
+
+
+def is_fresh(entry):
+    ttl = getattr(settings, "CAREER_CATALOG_TTL", 60 * 60 * 24 * 30)
+    version = getattr(settings, "CAREER_CATALOG_VERSION", 1)
+    return entry.version >= version and entry.generated_at > timezone.now() - timedelta(seconds=ttl)
+
+
+def _fresh_or_none(entry):
+    if entry is not None and is_fresh(entry):
+        metrics.record_cache("catalog", "hit")
+        return entry
+    metrics.record_cache("catalog", "miss" if entry is None else "expired")
+    return None
+
+
+def lookup(career_name):
+    """Return the catalog entry for ``career_name`` if it exists and has not expired."""
+    entry = _fresh_or_none(CareerCatalogEntry.objects.filter(key=normalize_career_name(career_name)).first())
+    return served(entry) if entry is not None else None
+
+
+async def alookup(career_name):
+    entry = _fresh_or_none(await CareerCatalogEntry.objects.filter(key=normalize_career_name(career_name)).afirst())
+    return await aserved(entry) if entry is not None else None
+
+
+# Helper: the first request answered by a prefetched entry counts as a prefetch hit
+def _first_use(entry):
+    return entry.prefetched_at is not None and entry.prefetch_used_at is None
+
+
+def served(entry):
+    """Record that ``entry`` answered a request; returns it."""
+    if _first_use(entry):
+        entry.prefetch_used_at = timezone.now()
+        if CareerCatalogEntry.objects.filter(pk=entry.pk, prefetch_used_at=None).update(prefetch_used_at=entry.prefetch_used_at):
+            metrics.record_prefetch("hit")
+    return entry
+
+
+async def aserved(entry):
+    if _first_use(entry):
+        entry.prefetch_used_at = timezone.now()
+        if await CareerCatalogEntry.objects.filter(pk=entry.pk, prefetch_used_at=None).aupdate(prefetch_used_at=entry.prefetch_used_at):
+            metrics.record_prefetch("hit")
+    return entry
+
+
+# Expired or outdated entries still beat an error while the LLM is down
+def lookup_stale(career_name):
+    return CareerCatalogEntry.objects.filter(key=normalize_career_name(career_name)).first()
+
+
+async def alookup_stale(career_name):
+    return await CareerCatalogEntry.objects.filter(key=normalize_career_name(career_name)).afirst()
+
+
+def _store_kwargs(career_name, payload, prefetch_tokens=None):
+    defaults = {
+        "payload": payload,
+        "generated_at": timezone.now(),
+        "version": getattr(settings, "CAREER_CATALOG_VERSION", 1),
+        # A regular generation replaces a prefetched entry's bookkeeping too
+        "prefetched_at": timezone.now() if prefetch_tokens is not None else None,
+        "prefetch_tokens": prefetch_tokens,
+        "prefetch_used_at": None,
+    }
+    return {
+        "key": normalize_career_name(career_name),
+        "defaults": defaults,
+        "create_defaults": {**defaults, "career": " ".join(str(career_name).split())[:255]},
+    }
+
+
+def store(career_name, payload, prefetch_tokens=None):
+    """Create or refresh the shared catalog entry for ``career_name`` (``prefetch_tokens``: a prefetch's cost)."""
+    entry, _ = CareerCatalogEntry.objects.update_or_create(**_store_kwargs(career_name, payload, prefetch_tokens))
+    return entry
+
+
+async def astore(career_name, payload):
+    entry, _ = await CareerCatalogEntry.objects.aupdate_or_create(**_store_kwargs(career_name, payload))
+    return entry
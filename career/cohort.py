@@ -0,0 +1,148 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, connection, transaction
+
+from . import rollups, services, similarity
+from .cache import profile_key
+from .llm import LLMUnavailable
+from .models import CareerPrediction
+from .serializers import CareerInputSerializer
+
+
+# Bulk cohort prediction: a university uploads hundreds of student profiles at once.
+# Identical profiles are generated once, unique ones fan out to the LLM on a bounded
+# thread pool, and finished rows are written with bulk_create in chunks. Results are
+# yielded per item as soon as their chunk is saved, so callers can stream them.
+
+
+# Helper: a cohort item is either a bare profile or {"ref": ..., "profile": {...}}
+def split_item(item):
+    if isinstance(item, dict) and isinstance(item.get("profile"), dict):
+        return item.get("ref"), item["profile"]
+    return None, item
+
+
+def _resolve(profile, cache_key):
+    # Runs on a pool thread with its own connection. A lock timeout or dropped
+    # connection is retried on a fresh one, so it doesn't fail the item: a
+    # prediction generated before the error is served from the cache on retry.
+    retries = getattr(settings, "COHORT_DB_RETRIES", 3)
+    try:
+        for attempt in range(retries + 1):
+            usage = services.Usage()
+            try:
+                payload, cache_tier = services.resolve_prediction(profile, cache_key, usage)
+                return payload, cache_tier, usage
+            except OperationalError:
+                if attempt == retries:
+                    raise
+                connection.close()
+                time.sleep(0.05 * 2 ** attempt)
+    finally:
+        close_old_connections()
+
+
+def _result(index, ref, **fields):
+    result = {"index": index, **fields}
+    if ref is not None:
+        result["ref"] = ref
+    return result
+
+
+def predict_cohort(user, items, concurrency=None, chunk_size=None, flush_interval=0.5):
+    """
+    Predict every profile in ``items`` for ``user``, yielding one result dict
+    per item (``status`` ``"ok"``, ``"invalid"`` or ``"error"``) in completion
+    order, then a final ``{"summary": ...}``. At most ``concurrency`` LLM
+    calls run at once; saved rows are flushed every ``chunk_size`` results or
+    after ``flush_interval`` seconds without a completion.
+    """
+    concurrency = max(concurrency or getattr(settings, "COHORT_CONCURRENCY", 8), 1)
+    chunk_size = max(chunk_size or getattr(settings, "COHORT_BULK_CHUNK", 100), 1)
+    started = time.monotonic()
+    counts = {"total": 0, "ok": 0, "invalid": 0, "error": 0, "unique": 0, "generated": 0}
+
+    # Validate and group identical profiles under one cache key
+    groups = {}
+    for index, item in enumerate(items):
+        counts["total"] += 1
+        ref, profile = split_item(item)
+        serializer = CareerInputSerializer(data=profile if isinstance(profile, dict) else {})
+        if not serializer.is_valid():
+            counts["invalid"] += 1
+            yield _result(index, ref, status="invalid", errors=serializer.errors)
+            continue
+        groups.setdefault(profile_key(serializer.validated_data), []).append((index, ref, profile))
+    counts["unique"] = len(groups)
+
+    pending_rows = []
+
+    def flush():
+        rows = pending_rows[:]
+        pending_rows.clear()
+        with transaction.atomic():
+            # bulk_create skips save(): store the payload blobs first, one INSERT for the chunk
+            CareerPrediction.store_payloads([row for row, _ in rows])
+            CareerPrediction.objects.bulk_create([row for row, _ in rows], batch_size=chunk_size)
+            rollups.record_predictions([row for row, _ in rows])  # no post_save either
+        if similarity.enabled():
+            # bulk_create sends no post_save: index the generated rows here
+            similarity.get_index().add((row.pk, row.user_input) for row, _ in rows if row.llm_model)
+        for row, result in rows:
+            counts["ok"] += 1
+            yield {**result, "id": row.id, "created_at": row.created_at}
+
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="cohort")
+    try:
+        futures = {
+            pool.submit(_resolve, members[0][2], cache_key): members
+            for cache_key, members in groups.items()
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=flush_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                members = futures.pop(future)
+                try:
+                    payload, cache_tier, usage = future.result()
+                except Exception as e:
+                    for index, ref, _ in members:
+                        counts["error"] += 1
+                        yield _result(index, ref, status="error", error=str(e), retryable=isinstance(e, LLMUnavailable))
+                    continue
+
+                if cache_tier is None:
+                    counts["generated"] += 1
+                first_index = members[0][0]
+                for index, ref, profile in members:
+                    row = CareerPrediction(
+                        user=user,
+                        user_input=profile,
+                        prediction=payload,
+                        career_titles=CareerPrediction.titles_from(payload),  # bulk_create skips save()
+                        # The tokens were spent once, for the first member
+                        **(usage.fields() if index == first_index else {}),
+                    )
+                    result = _result(
+                        index, ref,
+                        status="ok",
+                        cache=cache_tier,
+                        career_paths=payload["career_paths"],
+                    )
+                    if index != first_index:
+                        result["duplicate_of"] = first_index
+                    pending_rows.append((row, result))
+
+            # Flush full chunks, and whatever is ready when completions pause
+            if len(pending_rows) >= chunk_size or (pending_rows and (not done or not pending)):
+                yield from flush()
+    finally:
+        # A dropped client closes the generator: don't generate the rest
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    if pending_rows:
+        yield from flush()
+    counts["elapsed"] = round(time.monotonic() - started, 3)
+    yield {"summary": counts}
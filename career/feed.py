@@ -0,0 +1,121 @@
+import heapq
+import math
+from itertools import islice
+
+from django.db.models import BinaryField, CharField, F, IntegerField, JSONField, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_datetime
+
+from . import archive
+from .models import CareerPrediction, CareerSuggestion
+from .payloads import decode_or
+from .pagination import decode_cursor
+
+
+# Unified, time-ordered activity feed over career_predictions and
+# career_suggestions, built as one UNION ALL query ordered in the database.
+# Rows are ordered by (-created_at, -kind_rank, -id); kind_rank breaks ties
+# between the two tables, whose ids overlap. Rows moved to the archive
+# (career/archive.py) are merged in by the same order, so the feed and the
+# export still cover a user's whole history.
+
+KIND_RANKS = {"prediction": 1, "suggestion": 0}
+ARCHIVE_KINDS = {"prediction": "predictions", "suggestion": "suggestions"}
+
+
+def _prediction_rows(user, full):
+    columns = {
+        "kind": Value("prediction", output_field=CharField()),
+        "kind_rank": Value(KIND_RANKS["prediction"], output_field=IntegerField()),
+        "career_name": Value(None, output_field=CharField()),
+        "titles": F("career_titles"),
+    }
+    if full:
+        # Compressed blobs (or the JSON of rows not yet backfilled), decoded by feed_item
+        columns["input"] = F("user_input_json")
+        columns["input_data"] = F("input_blob__data")
+        columns["payload"] = F("prediction_json")
+        columns["payload_data"] = F("prediction_blob__data")
+    return CareerPrediction.objects.filter(user=user).annotate(**columns)
+
+
+def _suggestion_rows(user, full):
+    columns = {
+        "kind": Value("suggestion", output_field=CharField()),
+        "kind_rank": Value(KIND_RANKS["suggestion"], output_field=IntegerField()),
+        "career_name": F("career"),
+        "titles": Value(None, output_field=JSONField()),
+    }
+    if full:
+        columns["input"] = Value(None, output_field=JSONField())
+        columns["input_data"] = Value(None, output_field=BinaryField())
+        columns["payload"] = Coalesce(F("suggestion_json"), F("catalog__payload"), output_field=JSONField())
+        columns["payload_data"] = F("suggestion_blob__data")
+    return CareerSuggestion.objects.filter(user=user).annotate(**columns)
+
+
+def _after(queryset, rank, cursor):
+    if cursor is None:
+        return queryset
+    created_at, cursor_rank, pk = cursor
+    same_instant = Q(created_at=created_at)
+    if rank == cursor_rank:
+        same_instant &= Q(id__lt=pk)
+    elif rank > cursor_rank:
+        same_instant = Q(pk__in=[])
+    return queryset.filter(Q(created_at__lt=created_at) | same_instant)
+
+
+def _archived(user_id, kind, cursor, full):
+    """The user's archived rows of ``kind`` after ``cursor``, as rows of the UNION query."""
+    rank = KIND_RANKS[kind]
+    after = None
+    if cursor is not None:
+        created_at, cursor_rank, pk = cursor
+        # archive.history keeps rows before (created_at, id): at the cursor's instant all, some or none
+        after = (created_at, pk if rank == cursor_rank else 0 if rank > cursor_rank else math.inf)
+    for data in archive.iter_history(ARCHIVE_KINDS[kind], user_id, after):
+        row = {
+            "kind": kind, "kind_rank": rank, "id": data["id"], "created_at": parse_datetime(data["created_at"]),
+            "career_name": data.get("career"), "titles": data.get("career_titles"),
+        }
+        if full:
+            payload = data["prediction"] if kind == "prediction" else data["suggestion"]
+            row.update(input=data.get("user_input"), input_data=None, payload=payload, payload_data=None)
+        yield row
+
+
+def _order(row):
+    return row["created_at"], row["kind_rank"], row["id"]
+
+
+def activity(user, cursor=None, full=False, limit=None, chunk_size=2000):
+    """
+    Iterator over the user's predictions and suggestions, newest first, the
+    database's merged with the archive's. Each row has kind, id, created_at,
+    career_name and titles; ``full`` adds the input and payload for exports.
+    Raises InvalidCursor before reading anything.
+    """
+    cursor = decode_cursor(cursor, keys=2) if cursor else None
+    fields = ["kind", "kind_rank", "id", "created_at", "career_name", "titles"]
+    if full:
+        fields += ["input", "input_data", "payload", "payload_data"]
+    predictions = _after(_prediction_rows(user, full), KIND_RANKS["prediction"], cursor).values(*fields)
+    suggestions = _after(_suggestion_rows(user, full), KIND_RANKS["suggestion"], cursor).values(*fields)
+    rows = predictions.union(suggestions, all=True).order_by("-created_at", "-kind_rank", "-id")
+    # A page needs at most ``limit`` rows from each source; an export streams through a server-side cursor
+    rows = iter(rows[:limit]) if limit is not None else rows.iterator(chunk_size=chunk_size)
+    archived = [_archived(user.pk, kind, cursor, full) for kind in KIND_RANKS]
+    return islice(heapq.merge(rows, *archived, key=_order, reverse=True), limit)
+
+
+def feed_item(row):
+    item = {"kind": row["kind"], "id": row["id"], "created_at": row["created_at"]}
+    if row["kind"] == "prediction":
+        item["career_titles"] = row["titles"]
+    else:
+        item["career"] = row["career_name"]
+    if "payload" in row:
+        item["input"] = decode_or(row["input_data"], row["input"])
+        item["payload"] = decode_or(row["payload_data"], row["payload"])
+    return item
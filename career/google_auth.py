@@ -0,0 +1,177 @@
+import os
+import re
+import threading
+import time
+
+import jwt
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+# Offline verification of Google Sign-In ID tokens. Google's signing keys (JWKS)
+# are fetched over one pooled HTTPS session and cached for the Cache-Control
+# max-age; shortly before they expire a background thread refreshes them, so a
+# sign-in only costs a local RS256 signature check. GOOGLE_KEY_SOURCE swaps the
+# key source (benchmarks/fake_google.py serves a local key set).
+
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class InvalidGoogleToken(Exception):
+    pass
+
+
+# Helper: seconds from a Cache-Control header, or ``default``
+def max_age(cache_control, default=3600):
+    match = _MAX_AGE.search(cache_control or "")
+    return int(match.group(1)) if match else default
+
+
+class GoogleKeySource:
+    """Google's published JWKS over a pooled ``requests`` session."""
+
+    def __init__(self, url=None, timeout=5):
+        self.url = url or getattr(settings, "GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+        self.timeout = timeout
+        import requests  # only sign-ins need it
+
+        self.session = requests.Session()
+
+    def fetch(self):
+        """Return ``(jwks, max_age_seconds)``."""
+        response = self.session.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json(), max_age(response.headers.get("Cache-Control"))
+
+
+class StaticKeySource:
+    """A fixed key set, for tests."""
+
+    def __init__(self, jwks, max_age=3600):
+        self.jwks = jwks
+        self.max_age = max_age
+
+    def fetch(self):
+        return self.jwks, self.max_age
+
+
+class GoogleTokenVerifier:
+    """
+    Verifies ID tokens against cached keys from ``source``. Keys are refreshed
+    in the background ``refresh_margin`` seconds before they expire, fetched
+    inline only when none are usable, and re-fetched (at most every
+    ``min_refresh_interval`` seconds) when a token names an unknown key id.
+    """
+
+    def __init__(self, source, audience, leeway=10, refresh_margin=300, min_refresh_interval=30, clock=time.time):
+        self.source = source
+        self.audience = audience
+        self.leeway = leeway
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+        self.clock = clock
+        self._keys = {}
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def _load(self):
+        jwks, ttl = self.source.fetch()
+        keys = {}
+        for jwk in jwks.get("keys", []):
+            if jwk.get("kid") and jwk.get("kty") == "RSA":
+                keys[jwk["kid"]] = jwt.PyJWK(jwk, algorithm="RS256")
+        if not keys:
+            raise InvalidGoogleToken("Google returned no signing keys.")
+        now = self.clock()
+        self._keys = keys
+        self._fetched_at = now
+        # A short max-age must still leave room for the background refresh
+        self._expires_at = now + max(ttl, self.refresh_margin * 2)
+
+    def refresh(self, force=False):
+        """Fetch the key set now unless another thread just did."""
+        with self._lock:
+            if not force and self._keys and self.clock() < self._expires_at:
+                return
+            if force and self.clock() - self._fetched_at < self.min_refresh_interval:
+                return
+            try:
+                self._load()
+            except Exception:
+                if not self._keys:
+                    raise
+                # Keep the old keys (Google rotates with overlap) and try again later
+                self._expires_at = self.clock() + self.min_refresh_interval
+
+    def _background_refresh(self):
+        try:
+            self.refresh(force=True)
+        except Exception:
+            pass
+        finally:
+            self._refreshing = False
+
+    def keys(self):
+        now = self.clock()
+        if not self._keys or now >= self._expires_at:
+            self.refresh()
+        elif now >= self._expires_at - self.refresh_margin and not self._refreshing:
+            self._refreshing = True
+            threading.Thread(target=self._background_refresh, name="google-keys", daemon=True).start()
+        return self._keys
+
+    def verify(self, token):
+        """Return the claims of a valid ID token for ``audience``; raise InvalidGoogleToken otherwise."""
+        if not self.audience:
+            raise InvalidGoogleToken("GOOGLE_CLIENT_ID is not configured.")
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.PyJWTError as e:
+            raise InvalidGoogleToken(f"Malformed token: {e}")
+
+        key = self.keys().get(kid)
+        if key is None:
+            # Google may have rotated keys before our cached set expired
+            self.refresh(force=True)
+            key = self._keys.get(kid)
+            if key is None:
+                raise InvalidGoogleToken("Token signed with an unknown key.")
+
+        try:
+            claims = jwt.decode(
+                token, key=key, algorithms=["RS256"], audience=self.audience, leeway=self.leeway,
+                options={"require": ["exp", "iat", "iss", "sub", "aud"]},
+            )
+        except jwt.PyJWTError as e:
+            raise InvalidGoogleToken(str(e))
+        if claims["iss"] not in GOOGLE_ISSUERS:
+            raise InvalidGoogleToken("Wrong issuer.")
+        return claims
+
+
+_verifier = {"pid": None, "instance": None}
+_verifier_lock = threading.Lock()
+
+
+def get_verifier():
+    """The process-wide verifier built from GOOGLE_KEY_SOURCE and GOOGLE_CLIENT_ID (again after a fork)."""
+    with _verifier_lock:
+        if _verifier["instance"] is None or _verifier["pid"] != os.getpid():
+            # A session built before a fork would share its connections with the workers
+            source = import_string(getattr(settings, "GOOGLE_KEY_SOURCE", "career.google_auth.GoogleKeySource"))()
+            _verifier["instance"] = GoogleTokenVerifier(
+                source,
+                audience=settings.GOOGLE_CLIENT_ID,
+                leeway=getattr(settings, "GOOGLE_TOKEN_LEEWAY", 10),
+                refresh_margin=getattr(settings, "GOOGLE_KEYS_REFRESH_MARGIN", 300),
+            )
+            _verifier["pid"] = os.getpid()
+        return _verifier["instance"]
+
+
+def verify_google_token(token):
+    return get_verifier().verify(token)
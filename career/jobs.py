@@ -0,0 +1,152 @@
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+from . import services
+from .models import GenerationJob
+
+
+# Helper: ?mode=job or "Prefer: respond-async" asks for a 202 + job id instead of waiting
+def wants_job(request):
+    return request.GET.get("mode") == "job" or "respond-async" in request.headers.get("Prefer", "")
+
+
+def enqueue(user, kind, payload):
+    return GenerationJob.objects.create(user=user, kind=kind, payload=payload)
+
+
+def job_body(job):
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "result": job.result,
+        "error": job.error or None,
+    }
+
+
+def accepted_body(request, job):
+    status_url = request.build_absolute_uri(reverse("job-detail", args=[job.id]))
+    return {"job_id": job.id, "status": job.status, "status_url": status_url}
+
+
+def accepted_response(request, job):
+    body = accepted_body(request, job)
+    response = Response(body, status=status.HTTP_202_ACCEPTED)
+    response["Location"] = body["status_url"]
+    return response
+
+
+def wait_for(job, timeout):
+    """Long-poll: re-read ``job`` until it finishes or ``timeout`` seconds pass."""
+    deadline = time.monotonic() + min(timeout, getattr(settings, "JOB_MAX_WAIT", 30))
+    interval = getattr(settings, "JOB_POLL_INTERVAL", 0.5)
+    while not job.is_finished and time.monotonic() < deadline:
+        time.sleep(interval)
+        job.refresh_from_db()
+    return job
+
+
+# --- Worker side ---
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def claim(limit, worker=None):
+    """
+    Atomically move up to ``limit`` pending jobs to running and return them.
+    Uses SELECT ... FOR UPDATE SKIP LOCKED where the database supports it
+    (PostgreSQL); elsewhere (SQLite in tests) each row is claimed with a
+    conditional UPDATE so two workers can never run the same job.
+    """
+    worker = worker or worker_id()
+    now = timezone.now()
+    pending = GenerationJob.objects.filter(status=GenerationJob.PENDING).order_by("created_at")
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(pending.select_for_update(skip_locked=True).values_list("id", flat=True)[:limit])
+            GenerationJob.objects.filter(id__in=ids).update(
+                status=GenerationJob.RUNNING, started_at=now, locked_by=worker, attempts=F("attempts") + 1
+            )
+    else:
+        ids = []
+        for job_id in pending.values_list("id", flat=True)[:limit]:
+            claimed = GenerationJob.objects.filter(id=job_id, status=GenerationJob.PENDING).update(
+                status=GenerationJob.RUNNING, started_at=now, locked_by=worker, attempts=F("attempts") + 1
+            )
+            if claimed:
+                ids.append(job_id)
+
+    return list(GenerationJob.objects.filter(id__in=ids).select_related("user").order_by("created_at"))
+
+
+def requeue_stale():
+    """
+    Return jobs whose worker died mid-run (running past JOB_STALE_AFTER) to the
+    queue. Jobs that already used JOB_MAX_ATTEMPTS fail instead: one that kills
+    its worker (OOM, segfault) must not be retried forever.
+    """
+    now = timezone.now()
+    stale = GenerationJob.objects.filter(
+        status=GenerationJob.RUNNING, started_at__lt=now - timedelta(seconds=getattr(settings, "JOB_STALE_AFTER", 300))
+    )
+    max_attempts = getattr(settings, "JOB_MAX_ATTEMPTS", 3)
+    stale.filter(attempts__gte=max_attempts).update(
+        status=GenerationJob.FAILED, locked_by="", finished_at=now, error="The worker running this job stopped."
+    )
+    return stale.filter(attempts__lt=max_attempts).update(status=GenerationJob.PENDING, locked_by="")
+
+
+def purge_finished(batch_size=1000):
+    """Delete jobs finished more than JOB_RETENTION_DAYS ago, with their results; returns how many."""
+    cutoff = timezone.now() - timedelta(days=getattr(settings, "JOB_RETENTION_DAYS", 30))
+    finished = GenerationJob.objects.filter(
+        status__in=(GenerationJob.SUCCEEDED, GenerationJob.FAILED), finished_at__lt=cutoff
+    )
+    deleted = 0
+    while True:
+        ids = list(finished.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += GenerationJob.objects.filter(id__in=ids).delete()[0]
+
+
+def execute(job):
+    if job.kind == GenerationJob.KIND_PREDICT:
+        prediction, _ = services.predict(job.user, job.payload)
+        return services.prediction_body(prediction)
+    if job.kind == GenerationJob.KIND_CAREER:
+        suggestion, _ = services.career_details(job.user, job.payload["career"])
+        return services.career_details_body(suggestion)
+    raise ValueError(f"Unknown job kind: {job.kind}")
+
+
+def run(job):
+    """Run a claimed job and record its outcome; failed generations are retried up to JOB_MAX_ATTEMPTS."""
+    updates = {"locked_by": ""}
+    try:
+        updates.update(result=execute(job), status=GenerationJob.SUCCEEDED, error="")
+    except serializers.ValidationError as e:
+        updates.update(status=GenerationJob.FAILED, error=str(e.detail))
+    except Exception as e:
+        retry = not isinstance(e, ValueError) and job.attempts < getattr(settings, "JOB_MAX_ATTEMPTS", 3)
+        updates.update(status=GenerationJob.PENDING if retry else GenerationJob.FAILED, error=str(e))
+    if updates["status"] != GenerationJob.PENDING:
+        updates["finished_at"] = timezone.now()
+    GenerationJob.objects.filter(pk=job.pk, locked_by=job.locked_by).update(**updates)
+    return updates["status"]
@@ -0,0 +1,528 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from . import metrics
+from .singleflight import GenerationError
+
+
+# Load OpenAI key
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or getattr(settings, "OPENAI_API_KEY", None)
+
+# Shared completion parameters for every career prompt
+CHAT_DEFAULTS = {
+    "model": "gpt-4o-mini",
+    "temperature": 0.7,
+    "max_tokens": 1000,
+}
+
+# JSON mode makes the model emit a syntactically valid object
+if getattr(settings, "OPENAI_JSON_MODE", True):
+    CHAT_DEFAULTS["response_format"] = {"type": "json_object"}
+
+
+# The OpenAI SDK (and httpx under it) is imported on first use: it is most of the
+# app's import time, and gunicorn --preload imports it once in the master instead
+# (career/startup.py).
+
+
+def _http_limits():
+    import httpx
+
+    return httpx.Limits(
+        max_connections=getattr(settings, "OPENAI_MAX_CONNECTIONS", 200),
+        max_keepalive_connections=getattr(settings, "OPENAI_MAX_KEEPALIVE", 50),
+    )
+
+
+def _http_timeout():
+    import httpx
+
+    return httpx.Timeout(getattr(settings, "OPENAI_TIMEOUT", 60), connect=5.0)
+
+
+# Pooled sync client, created on first use in each process: one built before a
+# fork would share its connections with every worker. The SDK's own retries are
+# off: the gateway below owns the retry policy. Setting ``client`` overrides it.
+client = None
+_client = {"pid": None, "client": None}
+_client_lock = threading.Lock()
+
+
+def get_client():
+    if client is not None:
+        return client
+    with _client_lock:
+        if _client["pid"] != os.getpid():
+            import httpx
+            from openai import OpenAI
+
+            _client["client"] = OpenAI(
+                api_key=OPENAI_API_KEY,
+                base_url=getattr(settings, "OPENAI_BASE_URL", None),
+                max_retries=0,
+                http_client=httpx.Client(limits=_http_limits(), timeout=_http_timeout()),
+            )
+            _client["pid"] = os.getpid()
+        return _client["client"]
+
+
+# AsyncOpenAI clients are bound to the event loop that created their connection
+# pool, so keep one pooled client per running loop (one per ASGI process).
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    async_client = _async_clients.get(loop)
+    if async_client is None:
+        import httpx
+        from openai import AsyncOpenAI
+
+        async_client = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            base_url=getattr(settings, "OPENAI_BASE_URL", None),
+            max_retries=0,
+            http_client=httpx.AsyncClient(limits=_http_limits(), timeout=_http_timeout()),
+        )
+        _async_clients[loop] = async_client
+    return async_client
+
+
+class LLMUnavailable(GenerationError):
+    """Raised when the provider is degraded: circuit open, retries exhausted or no free slot."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Helper: errors worth retrying (and counting against the provider)
+def is_retryable(error):
+    import openai
+
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after ``threshold`` consecutive provider failures; open
+    rejects calls for ``reset_timeout`` seconds, then lets a single trial
+    call through (half-open) to decide whether to close again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_at = None  # when the half-open trial call was let through
+        self._lock = threading.Lock()
+
+    def allow(self):
+        if not self.threshold:
+            return True
+        with self._lock:
+            now = self.clock()
+            if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_at = None
+            if self.state == self.HALF_OPEN:
+                # A trial that never recorded an outcome (it timed out waiting for a
+                # slot, was cancelled...) may be retaken after reset_timeout
+                if self._trial_at is not None and now - self._trial_at < self.reset_timeout:
+                    return False
+                self._trial_at = now
+                return True
+            return self.state == self.CLOSED
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = self.CLOSED
+            self._trial_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._trial_at = None
+            self.failures += 1
+            if self.threshold and (self.state == self.HALF_OPEN or self.failures >= self.threshold):
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+    def retry_after(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0
+            return max(self.reset_timeout - (self.clock() - self.opened_at), 1)
+
+
+class LatencyWindow:
+    """Latencies of the last ``size`` successful completions."""
+
+    def __init__(self, size=256):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction, min_samples=20):
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < min_samples:
+            return None
+        return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+def parse_hedge_after(value):
+    """LLM_HEDGE_AFTER as ``None`` (off), ``"p95"`` or seconds; ImproperlyConfigured if malformed."""
+    value = str(value or "").strip().lower()
+    if not value or value == "p95":
+        return value or None
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = -1.0
+    if not 0 <= seconds < float("inf"):
+        raise ImproperlyConfigured(f'LLM_HEDGE_AFTER must be "", "p95" or a number of seconds, not {value!r}.')
+    return seconds
+
+
+class HeldStream:
+    """A streamed completion that holds its concurrency slot until it is exhausted or closed."""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+    def __iter__(self):
+        try:
+            yield from self._stream
+        finally:
+            self.close()
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        finally:
+            await self.aclose()
+
+    def _done(self):
+        with self._lock:
+            release, self._release = self._release, None
+        if release is not None:
+            release()
+        return release is not None
+
+    def close(self):
+        if self._done() and hasattr(self._stream, "close"):
+            self._stream.close()
+
+    async def aclose(self):
+        if self._done() and hasattr(self._stream, "close"):
+            await self._stream.close()
+
+
+class LLMGateway:
+    """
+    The one place that talks to the chat completions API.
+
+    Every call goes through a process-wide concurrency cap, a circuit breaker
+    and jittered retries on 429/5xx/timeouts. Non-streaming calls can be
+    hedged: if the first attempt hasn't answered by ``LLM_HEDGE_AFTER``
+    (seconds, or ``"p95"`` of recent latencies) a second one is sent, to
+    ``LLM_HEDGE_MODEL`` when set, and the first answer wins.
+    """
+
+    def __init__(self, client=None, async_client=None):
+        self._client = client
+        self._async_client = async_client
+        self.breaker = CircuitBreaker(
+            threshold=getattr(settings, "LLM_BREAKER_THRESHOLD", 5),
+            reset_timeout=getattr(settings, "LLM_BREAKER_RESET", 30.0),
+        )
+        self.latency = LatencyWindow()
+        max_concurrency = getattr(settings, "LLM_MAX_CONCURRENCY", 32)
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._async_slots = weakref.WeakKeyDictionary()
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._hedge_after = (None, None)  # (raw LLM_HEDGE_AFTER, parsed)
+        self.hedge_setting()  # a malformed value fails at startup, not on every request
+        self.counters = {"calls": 0, "retries": 0, "hedged": 0, "failures": 0, "short_circuited": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        counters["breaker"] = self.breaker.state
+        counters["p95"] = self.latency.percentile(0.95)
+        return counters
+
+    def sync_client(self):
+        return self._client or get_client()
+
+    def async_client(self):
+        return self._async_client or get_async_client()
+
+    # --- policy ---
+    def _request(self, messages, stream, overrides):
+        kwargs = {**CHAT_DEFAULTS, **overrides, "messages": messages}
+        if stream:
+            kwargs["stream"] = True
+            # A final choice-less chunk carries the token counts for llm_usage_report
+            kwargs.setdefault("stream_options", {"include_usage": True})
+        kwargs.setdefault("timeout", getattr(settings, "OPENAI_TIMEOUT", 60))
+        return kwargs
+
+    def _check_breaker(self):
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise LLMUnavailable("The AI provider is unavailable, try again later.", self.breaker.retry_after())
+
+    def backoff(self, attempt, error=None):
+        # Honour the provider's Retry-After on 429s, otherwise full-jitter exponential backoff
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        max_delay = getattr(settings, "LLM_RETRY_MAX_DELAY", 8.0)
+        if retry_after:
+            try:
+                return min(float(retry_after), max_delay)
+            except ValueError:
+                pass
+        base = getattr(settings, "LLM_RETRY_BASE_DELAY", 0.5)
+        return random.uniform(0, min(max_delay, base * 2 ** attempt))
+
+    def hedge_setting(self):
+        raw = getattr(settings, "LLM_HEDGE_AFTER", "")
+        if raw != self._hedge_after[0]:
+            self._hedge_after = (raw, parse_hedge_after(raw))
+        return self._hedge_after[1]
+
+    def hedge_delay(self):
+        hedge_after = self.hedge_setting()
+        if hedge_after == "p95":
+            return self.latency.percentile(0.95)
+        return hedge_after
+
+    def _hedge_kwargs(self, kwargs):
+        hedge_model = getattr(settings, "LLM_HEDGE_MODEL", "")
+        return {**kwargs, "model": hedge_model} if hedge_model else kwargs
+
+    def _record(self, started, kwargs, error=None):
+        if error is None:
+            self.breaker.record_success()
+            if not kwargs.get("stream"):
+                self.latency.add(time.monotonic() - started)
+        elif is_retryable(error):
+            self._count("failures")
+            self.breaker.record_failure()
+        else:
+            # The provider answered (e.g. a 400): it is up
+            self.breaker.record_success()
+
+    def _exhausted(self, error):
+        return LLMUnavailable(f"The AI provider is unavailable: {error}", self.breaker.retry_after() or None)
+
+    # --- sync ---
+    def chat(self, messages, stream=False, **overrides):
+        """Create a chat completion (or a stream of chunks with ``stream=True``)."""
+        kwargs = self._request(messages, stream, overrides)
+        with metrics.phase("llm"):
+            response = self._retrying(kwargs, stream)
+        if not stream:
+            metrics.record_llm(response, kwargs["model"])
+        return response
+
+    def _retrying(self, kwargs, stream):
+        max_retries = getattr(settings, "LLM_MAX_RETRIES", 2)
+        self._count("calls")
+        attempt = 0
+        while True:
+            self._check_breaker()
+            try:
+                return self._call(kwargs, hedge=not stream)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                if attempt >= max_retries:
+                    raise self._exhausted(e) from e
+                self._count("retries")
+                time.sleep(self.backoff(attempt, e))
+                attempt += 1
+
+    def _attempt(self, kwargs):
+        started = time.monotonic()
+        try:
+            response = self.sync_client().chat.completions.create(**kwargs)
+        except Exception as e:
+            self._record(started, kwargs, e)
+            raise
+        self._record(started, kwargs)
+        return response
+
+    def _pool(self):
+        with self._lock:
+            # A pool from before a fork has no threads in the child
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency * 2, thread_name_prefix="llm")
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _call(self, kwargs, hedge):
+        if not self._slots.acquire(timeout=getattr(settings, "LLM_QUEUE_TIMEOUT", 10)):
+            raise LLMUnavailable("Too many concurrent AI requests, try again later.", 1)
+
+        delay = self.hedge_delay() if hedge else None
+        if delay is None:
+            try:
+                response = self._attempt(kwargs)
+            except BaseException:
+                self._slots.release()
+                raise
+            if kwargs.get("stream"):
+                # Counted against LLM_MAX_CONCURRENCY until the last chunk is read
+                return HeldStream(response, self._slots.release)
+            self._slots.release()
+            return response
+
+        primary = self._pool().submit(self._attempt, kwargs)
+        primary.add_done_callback(lambda future: self._slots.release())
+        try:
+            return primary.result(timeout=delay)
+        except FutureTimeout:
+            pass
+
+        # Only hedge with a spare slot; under load the second request would just add to it
+        if not self._slots.acquire(blocking=False):
+            return primary.result()
+        self._count("hedged")
+        hedged = self._pool().submit(self._attempt, self._hedge_kwargs(kwargs))
+        hedged.add_done_callback(lambda future: self._slots.release())
+
+        pending, error = {primary, hedged}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    # --- async ---
+    def _loop_slots(self):
+        loop = asyncio.get_running_loop()
+        slots = self._async_slots.get(loop)
+        if slots is None:
+            slots = self._async_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        return slots
+
+    async def achat(self, messages, stream=False, **overrides):
+        """Async counterpart of ``chat`` on the per-loop AsyncOpenAI client."""
+        kwargs = self._request(messages, stream, overrides)
+        with metrics.phase("llm"):
+            response = await self._aretrying(kwargs, stream)
+        if not stream:
+            metrics.record_llm(response, kwargs["model"])
+        return response
+
+    async def _aretrying(self, kwargs, stream):
+        max_retries = getattr(settings, "LLM_MAX_RETRIES", 2)
+        self._count("calls")
+        attempt = 0
+        while True:
+            self._check_breaker()
+            try:
+                return await self._acall(kwargs, hedge=not stream)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                if attempt >= max_retries:
+                    raise self._exhausted(e) from e
+                self._count("retries")
+                await asyncio.sleep(self.backoff(attempt, e))
+                attempt += 1
+
+    async def _aattempt(self, kwargs):
+        started = time.monotonic()
+        try:
+            response = await self.async_client().chat.completions.create(**kwargs)
+        except Exception as e:
+            self._record(started, kwargs, e)
+            raise
+        self._record(started, kwargs)
+        return response
+
+    async def _acall(self, kwargs, hedge):
+        slots = self._loop_slots()
+        try:
+            await asyncio.wait_for(slots.acquire(), getattr(settings, "LLM_QUEUE_TIMEOUT", 10))
+        except asyncio.TimeoutError:
+            raise LLMUnavailable("Too many concurrent AI requests, try again later.", 1)
+
+        delay = self.hedge_delay() if hedge else None
+        if delay is None:
+            try:
+                response = await self._aattempt(kwargs)
+            except BaseException:
+                slots.release()
+                raise
+            if kwargs.get("stream"):
+                return HeldStream(response, slots.release)
+            slots.release()
+            return response
+
+        primary = asyncio.ensure_future(self._aattempt(kwargs))
+        primary.add_done_callback(lambda task: slots.release())
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done or slots.locked():
+                return await primary
+
+            await slots.acquire()
+            self._count("hedged")
+            hedged = asyncio.ensure_future(self._aattempt(self._hedge_kwargs(kwargs)))
+            hedged.add_done_callback(lambda task: slots.release())
+
+            pending, error = {primary, hedged}, None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Unlike threads, the losing coroutine can actually be cancelled
+            for task in pending:
+                task.cancel()
+
+
+gateway = LLMGateway()
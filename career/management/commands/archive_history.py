@@ -0,0 +1,67 @@
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from career import archive, payloads
+from career.models import CareerPrediction, CareerSuggestion
+from career.serializers import CareerPredictionSerializer, CareerSuggestionSerializer
+
+
+# kind -> (model, serializer rendering the archived row, relations it reads)
+SOURCES = {
+    "predictions": (CareerPrediction, CareerPredictionSerializer, ("input_blob", "prediction_blob")),
+    "suggestions": (CareerSuggestion, CareerSuggestionSerializer, ("suggestion_blob", "catalog")),
+}
+
+
+def archive_rows(kind, cutoff, batch_size=500):
+    """Move ``kind`` rows created before ``cutoff`` into the archive, oldest first; returns how many."""
+    model, serializer, related = SOURCES[kind]
+    moved = 0
+    while True:
+        # One transaction per batch: the rows are deleted only once their frames are on disk
+        with archive.lock(kind), transaction.atomic():
+            rows = list(
+                model.objects.filter(created_at__lt=cutoff).select_related(*related).order_by("created_at", "id")[:batch_size]
+            )
+            if not rows:
+                break
+            months = defaultdict(lambda: defaultdict(list))
+            for row, data in zip(rows, serializer(rows, many=True).data):
+                months[archive.month_of(row.created_at)][row.user_id].append(data)
+            for month, frames in months.items():
+                archive.append(kind, month, frames)
+            model.objects.filter(pk__in=[row.pk for row in rows]).delete()
+            # The archive holds the payloads now: free the blobs no remaining row shares
+            payloads.delete_unreferenced(
+                getattr(row, f"{prop.blob}_id") for row in rows for prop in model.payload_properties()
+            )
+        moved += len(rows)
+    return moved
+
+
+class Command(BaseCommand):
+    help = (
+        "Move predictions and suggestions older than --days out of the database into compressed "
+        "per-month archive segments (ARCHIVE_DIR). /api/history/ keeps serving them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=float, default=None, help="Age in days (default ARCHIVE_AFTER_DAYS).")
+        parser.add_argument("--batch-size", type=int, default=None, help="Rows per transaction (default ARCHIVE_BATCH_SIZE).")
+        parser.add_argument("--kind", choices=archive.KINDS, action="append", help="Only this kind (repeatable).")
+
+    def handle(self, *args, **options):
+        days = options["days"] if options["days"] is not None else settings.ARCHIVE_AFTER_DAYS
+        if days <= 0:
+            raise CommandError("--days must be positive.")
+        batch_size = options["batch_size"] or settings.ARCHIVE_BATCH_SIZE
+        cutoff = timezone.now() - datetime.timedelta(days=days)
+
+        for kind in options["kind"] or archive.KINDS:
+            moved = archive_rows(kind, cutoff, batch_size)
+            self.stdout.write(f"Archived {moved} {kind} created before {cutoff:%Y-%m-%d %H:%M}.")
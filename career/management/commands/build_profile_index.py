@@ -0,0 +1,44 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from career import similarity
+from career.models import CareerPrediction
+from career.payloads import decode_or
+
+
+class Command(BaseCommand):
+    help = (
+        "Add saved predictions newer than the last indexed id to the similar-profile index "
+        "(SIMILARITY_INDEX_DIR). New generations are indexed as they are saved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Empty the index first.")
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Also index rows without recorded usage (saved before usage accounting, or served from a cache).",
+        )
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        index = similarity.get_index()
+        if options["rebuild"]:
+            index.reset()
+
+        rows = CareerPrediction.objects.filter(pk__gt=index.last_id, reused_from__isnull=True)
+        if not options["all"]:
+            rows = rows.exclude(llm_model="")
+        rows = rows.order_by("pk").values_list("pk", "input_blob__data", "user_input_json")
+
+        started = time.monotonic()
+        added, batch = 0, []
+        for pk, blob, legacy in rows.iterator(chunk_size=options["chunk_size"]):
+            batch.append((pk, decode_or(blob, legacy)))
+            if len(batch) >= options["chunk_size"]:
+                added += index.add(batch)
+                batch = []
+        added += index.add(batch)
+        self.stdout.write(
+            f"Indexed {added} predictions in {time.monotonic() - started:.1f}s ({len(index)} in the index)."
+        )
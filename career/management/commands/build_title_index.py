@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from career import titles
+
+
+class Command(BaseCommand):
+    help = (
+        "Add the career titles of predictions and suggestions saved since the last snapshot to the "
+        "title search index and write a new snapshot (TITLE_INDEX_PATH) for workers to start from."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rebuild", action="store_true", help="Start from an empty index instead of the snapshot.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        index = titles.TitleIndex()
+        if not options["rebuild"]:
+            try:
+                index = titles.TitleIndex.load(titles.snapshot_path())
+            except (OSError, ValueError, KeyError):
+                pass
+        read = index.catch_up()
+        index.save(titles.snapshot_path())
+        self.stdout.write(
+            f"Read {read} rows in {time.monotonic() - started:.1f}s; {len(index)} titles in {titles.snapshot_path()}."
+        )
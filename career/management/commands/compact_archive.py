@@ -0,0 +1,23 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from career import archive
+
+
+def existing_users(ids, chunk_size=500):
+    ids = sorted(ids)
+    User = get_user_model()
+    for start in range(0, len(ids), chunk_size):
+        yield from User.objects.filter(pk__in=ids[start:start + chunk_size]).values_list("pk", flat=True)
+
+
+class Command(BaseCommand):
+    help = "Rewrite archive segments without the rows of users who deleted their accounts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--kind", choices=archive.KINDS, action="append", help="Only this kind (repeatable).")
+
+    def handle(self, *args, **options):
+        for kind in options["kind"] or archive.KINDS:
+            rewritten, dropped, freed = archive.compact(kind, existing_users)
+            self.stdout.write(f"{kind}: rewrote {rewritten} segments, dropped {dropped} frames, {freed} bytes freed.")
@@ -0,0 +1,58 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from career import roster
+from career.models import UserImport
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV (header: name,username,email,password) or JSONL roster, "
+        "writing one NDJSON result per row. An interrupted import continues with --resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Roster file, or - for stdin.")
+        parser.add_argument("--format", choices=("csv", "jsonl"), help="Default: from the file extension (stdin: csv).")
+        parser.add_argument("--resume", metavar="IMPORT_ID", help="Continue this import after its last committed line.")
+        parser.add_argument("--chunk-size", type=int, default=None, help="Rows per transaction (USER_IMPORT_CHUNK).")
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="Password-hashing processes; -1 one per CPU, 0 inline (USER_IMPORT_HASH_WORKERS).",
+        )
+        parser.add_argument("--report", default="-", help="Per-row report file (appended to on --resume), or - for stdout.")
+
+    def handle(self, *args, **options):
+        if options["resume"]:
+            user_import = UserImport.objects.filter(pk=options["resume"]).first()
+            if user_import is None:
+                raise CommandError(f"Unknown import: {options['resume']}")
+            if user_import.status == UserImport.COMPLETED:
+                raise CommandError(f"Import {user_import.pk} already completed.")
+        else:
+            user_import = UserImport.objects.create(source="" if options["path"] == "-" else options["path"][-255:])
+        self.stderr.write(f"Import {user_import.pk} (resume with --resume {user_import.pk})")
+
+        format = options["format"] or ("csv" if options["path"] == "-" else roster.guess_format(options["path"]))
+        source = sys.stdin if options["path"] == "-" else open(options["path"], encoding="utf-8", newline="")
+        report = self.stdout if options["report"] == "-" else open(
+            options["report"], "a" if options["resume"] else "w", encoding="utf-8"
+        )
+        try:
+            results = roster.import_roster(
+                user_import, roster.read_roster(source, format),
+                chunk_size=options["chunk_size"], workers=options["workers"],
+            )
+            for result in results:
+                if "summary" in result:
+                    self.stderr.write(json.dumps(result["summary"]))
+                    continue
+                report.write(json.dumps(result, cls=DjangoJSONEncoder) + "\n")
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if report is not self.stdout:
+                report.close()
@@ -0,0 +1,90 @@
+import datetime
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from career.models import CareerPrediction, CareerSuggestion
+from career.pricing import cost
+
+
+ENDPOINTS = (("predict", CareerPrediction), ("career", CareerSuggestion))
+
+
+def usage_report(since=None):
+    """One row per endpoint, prompt version and model, for rows generated after ``since``."""
+    rows = []
+    for endpoint, model in ENDPOINTS:
+        queryset = model.objects.all()
+        if since is not None:
+            queryset = queryset.filter(created_at__gte=since)
+        total = queryset.count()
+        groups = (
+            queryset.filter(~Q(llm_model=""))
+            .values("prompt_version", "llm_model")
+            .annotate(
+                generations=Count("id"),
+                prompt_tokens=Sum("prompt_tokens"),
+                completion_tokens=Sum("completion_tokens"),
+                avg_latency_ms=Avg("latency_ms"),
+            )
+            .order_by("prompt_version", "llm_model")
+        )
+        for group in groups:
+            prompt_tokens = group["prompt_tokens"] or 0
+            completion_tokens = group["completion_tokens"] or 0
+            generations = group["generations"]
+            usd = cost(group["llm_model"], prompt_tokens, completion_tokens)
+            rows.append({
+                "endpoint": endpoint,
+                "prompt_version": group["prompt_version"],
+                "model": group["llm_model"],
+                "generations": generations,
+                # Rows saved without an LLM call (cache, catalog, duplicates) share the endpoint's total
+                "rows": total,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "avg_prompt_tokens": round(prompt_tokens / generations, 1),
+                "avg_completion_tokens": round(completion_tokens / generations, 1),
+                "avg_latency_ms": round(group["avg_latency_ms"], 1) if group["avg_latency_ms"] is not None else None,
+                "cost_usd": round(usd, 6) if usd is not None else None,
+                "cost_per_generation_usd": round(usd / generations, 8) if usd is not None else None,
+            })
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Tokens, cost and latency of saved generations per endpoint, prompt version and model."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=float, default=None, help="Only rows from the last N days.")
+        parser.add_argument("--json", action="store_true", help="Print JSON instead of a table.")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["days"] is not None:
+            if options["days"] <= 0:
+                raise CommandError("--days must be positive.")
+            since = timezone.now() - datetime.timedelta(days=options["days"])
+
+        rows = usage_report(since)
+        if options["json"]:
+            self.stdout.write(json.dumps(rows, indent=2))
+            return
+        if not rows:
+            self.stdout.write("No generations with recorded usage.")
+            return
+
+        header = (
+            f"{'endpoint':<9} {'prompt':<20} {'model':<16} {'gens':>6} {'rows':>6} "
+            f"{'avg in':>8} {'avg out':>8} {'avg ms':>8} {'cost $':>10}"
+        )
+        self.stdout.write(header)
+        for row in rows:
+            self.stdout.write(
+                f"{row['endpoint']:<9} {row['prompt_version'] or '-':<20} {row['model']:<16} "
+                f"{row['generations']:>6} {row['rows']:>6} {row['avg_prompt_tokens']:>8} "
+                f"{row['avg_completion_tokens']:>8} {row['avg_latency_ms'] if row['avg_latency_ms'] is not None else '-':>8} "
+                f"{row['cost_usd'] if row['cost_usd'] is not None else '-':>10}"
+            )
@@ -0,0 +1,62 @@
+import json
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from career import cohort
+
+
+def read_jsonl(stream):
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            raise CommandError(f"Line {number}: invalid JSON ({e})")
+
+
+class Command(BaseCommand):
+    help = (
+        "Predict careers for a cohort of profiles read from JSONL (one profile, or "
+        '{"ref": ..., "profile": {...}}, per line) and write one NDJSON result per line.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSONL file, or - for stdin.")
+        parser.add_argument("--user", required=True, help="Username that owns the saved predictions.")
+        parser.add_argument("--concurrency", type=int, default=None, help="Concurrent LLM calls (COHORT_CONCURRENCY).")
+        parser.add_argument("--chunk-size", type=int, default=None, help="Rows per bulk insert (COHORT_BULK_CHUNK).")
+        parser.add_argument("--output", default="-", help="Results file, or - for stdout.")
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(username=options["user"]).first()
+        if user is None:
+            raise CommandError(f"Unknown user: {options['user']}")
+
+        if options["path"] == "-":
+            items = list(read_jsonl(sys.stdin))
+        else:
+            with open(options["path"], encoding="utf-8") as f:
+                items = list(read_jsonl(f))
+
+        output = self.stdout if options["output"] == "-" else open(options["output"], "w", encoding="utf-8")
+        try:
+            results = cohort.predict_cohort(
+                user, items, concurrency=options["concurrency"], chunk_size=options["chunk_size"]
+            )
+            for result in results:
+                output.write(json.dumps(result, cls=DjangoJSONEncoder) + "\n")
+                if "summary" in result:
+                    summary = result["summary"]
+        finally:
+            if output is not self.stdout:
+                output.close()
+
+        self.stderr.write(self.style.SUCCESS(
+            f"{summary['ok']} ok, {summary['invalid']} invalid, {summary['error']} failed "
+            f"({summary['unique']} unique profiles, {summary['generated']} generated) in {summary['elapsed']}s"
+        ))
@@ -0,0 +1,55 @@
+import datetime
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from career.models import CareerCatalogEntry
+
+
+def prefetch_report(since=None):
+    """Hit rate and tokens of the catalog entries prefetched after ``since``."""
+    queryset = CareerCatalogEntry.objects.filter(prefetched_at__isnull=False)
+    if since is not None:
+        queryset = queryset.filter(prefetched_at__gte=since)
+    totals = queryset.aggregate(
+        prefetched=Count("id"),
+        used=Count("id", filter=Q(prefetch_used_at__isnull=False)),
+        tokens=Sum("prefetch_tokens"),
+        wasted_tokens=Sum("prefetch_tokens", filter=Q(prefetch_used_at__isnull=True)),
+    )
+    prefetched = totals["prefetched"]
+    return {
+        "prefetched": prefetched,
+        "used": totals["used"],
+        "hit_rate": round(totals["used"] / prefetched, 4) if prefetched else None,
+        "tokens": totals["tokens"] or 0,
+        # Not opened yet: recent prefetches may still be used
+        "wasted_tokens": totals["wasted_tokens"] or 0,
+    }
+
+
+class Command(BaseCommand):
+    help = "Hit rate of speculative career-details prefetches and the tokens spent on unused ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=float, default=None, help="Only entries prefetched in the last N days.")
+        parser.add_argument("--json", action="store_true", help="Print JSON instead of text.")
+
+    def handle(self, *args, **options):
+        since = None
+        if options["days"] is not None:
+            if options["days"] <= 0:
+                raise CommandError("--days must be positive.")
+            since = timezone.now() - datetime.timedelta(days=options["days"])
+
+        report = prefetch_report(since)
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        hit_rate = f"{report['hit_rate']:.1%}" if report["hit_rate"] is not None else "-"
+        self.stdout.write(
+            f"prefetched {report['prefetched']}  used {report['used']}  hit rate {hit_rate}  "
+            f"tokens {report['tokens']}  wasted tokens {report['wasted_tokens']}"
+        )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from career import jobs
+from career.cache import prediction_cache
+from career.singleflight import singleflight
+
+
+# table -> function deleting its expired rows and returning how many
+PURGES = {
+    "cache": prediction_cache.purge_expired,
+    "jobs": jobs.purge_finished,
+    "leases": singleflight.purge_expired,
+}
+
+
+class Command(BaseCommand):
+    help = "Delete rows past their retention (long-expired prediction cache entries, finished generation jobs, expired single-flight leases); run it from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--only", choices=sorted(PURGES), action="append", help="Only this table (repeatable).")
+
+    def handle(self, *args, **options):
+        for name in options["only"] or PURGES:
+            self.stdout.write(f"{name}: deleted {PURGES[name]()} rows.")
@@ -0,0 +1,80 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from career import archive
+from career.models import CareerPrediction, CareerSuggestion
+from career.payloads import decode_or
+from career.rollups import TABLES, Deltas, add_prediction, add_suggestion, day_of
+
+
+def _start(day):
+    return datetime.datetime.combine(day, datetime.time.min, tzinfo=datetime.timezone.utc)
+
+
+def rebuild(since=None, until=None, chunk_size=2000):
+    """Recompute the rollup rows of the days in [since, until) from the history tables; returns rows read."""
+    bounds, days = {}, {}
+    if since is not None:
+        bounds["created_at__gte"], days["day__gte"] = _start(since), since
+    if until is not None:
+        bounds["created_at__lt"], days["day__lt"] = _start(until), until
+
+    deltas, read = Deltas(), 0
+    predictions = CareerPrediction.objects.filter(**bounds).order_by().values_list(
+        "created_at", "input_blob__data", "user_input_json", "career_titles",
+        "llm_model", "prompt_tokens", "completion_tokens", "latency_ms",
+    )
+    for created_at, data, legacy, titles, *usage in predictions.iterator(chunk_size=chunk_size):
+        add_prediction(deltas, created_at, decode_or(data, legacy), titles, *usage)
+        read += 1
+    suggestions = CareerSuggestion.objects.filter(**bounds).order_by().values_list(
+        "created_at", "career", "llm_model", "prompt_tokens", "completion_tokens", "latency_ms",
+    )
+    for row in suggestions.iterator(chunk_size=chunk_size):
+        add_suggestion(deltas, *row)
+        read += 1
+
+    with transaction.atomic():
+        for table, (model, fields) in TABLES.items():
+            model.objects.filter(**days).delete()
+            model.objects.bulk_create(
+                (
+                    model(**dict(zip(fields, key)), **defaults, **counts)
+                    for (row_table, key), (counts, defaults) in deltas.rows.items()
+                    if row_table == table
+                ),
+                batch_size=chunk_size,
+            )
+    return read
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the analytics rollups of past days from predictions and suggestions. "
+        "Today keeps its live counters unless --until is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=datetime.date.fromisoformat, default=None, help="First day (YYYY-MM-DD).")
+        parser.add_argument("--until", type=datetime.date.fromisoformat, default=None, help="Day to stop before (default today).")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        since, until = options["since"], options["until"] or timezone.now().date()
+        if since is None and any(archive.segments(kind) for kind in archive.KINDS):
+            # Archived rows are gone from the tables: keep the counters of the days they covered
+            oldest = [
+                model.objects.order_by("created_at").values_list("created_at", flat=True).first()
+                for model in (CareerPrediction, CareerSuggestion)
+            ]
+            oldest = [created_at for created_at in oldest if created_at is not None]
+            since = day_of(max(oldest)) + datetime.timedelta(days=1) if oldest else until
+            self.stdout.write(f"History is partly archived: rebuilding from {since}.")
+        if since is not None and since >= until:
+            raise CommandError("Nothing to rebuild: --since must be before --until.")
+
+        read = rebuild(since, until, options["chunk_size"])
+        self.stdout.write(f"Rebuilt rollups from {read} rows ({since or 'start'} to {until}).")
@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from career import jobs
+
+
+def _run_job(job):
+    try:
+        return jobs.run(job)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Drain the generation job queue with a pool of worker threads."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=4, help="Jobs processed concurrently.")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        threads = max(options["threads"], 1)
+        running = set()
+        processed = 0
+
+        self.stdout.write(f"Generation worker {jobs.worker_id()} started with {threads} threads")
+        backoff = options["poll_interval"]
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="generation") as pool:
+            while True:
+                try:
+                    requeued = jobs.requeue_stale()
+                    claimed = jobs.claim(threads - len(running)) if len(running) < threads else []
+                except DatabaseError as e:
+                    # A lock timeout or lost connection: keep the running jobs and try again
+                    self.stderr.write(f"Queue unavailable, retrying in {backoff:.1f}s: {e}")
+                    close_old_connections()
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, 30)
+                    continue
+                backoff = options["poll_interval"]
+                if requeued:
+                    self.stdout.write(f"Requeued {requeued} stale jobs")
+
+                for job in claimed:
+                    running.add(pool.submit(_run_job, job))
+
+                if not running:
+                    if options["once"]:
+                        break
+                    close_old_connections()
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                done, running = wait(running, timeout=options["poll_interval"], return_when=FIRST_COMPLETED)
+                for future in done:
+                    processed += 1
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.stderr.write(f"Job crashed: {e}")
+                running = set(running)
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs"))
@@ -0,0 +1,61 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from career import payloads
+from career.models import PayloadBlob, PayloadDictionary
+
+
+class Command(BaseCommand):
+    help = (
+        "Train a zlib preset dictionary on recent payload blobs and use it for new ones. "
+        "--recompress also re-encodes the existing blobs that get smaller with it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--samples", type=int, default=2000, help="Most recent blobs to train on.")
+        parser.add_argument("--size", type=int, default=payloads.MAX_DICTIONARY_SIZE, help="Dictionary bytes.")
+        parser.add_argument("--recompress", action="store_true", help="Re-encode existing blobs with the new dictionary.")
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        rows = PayloadBlob.objects.order_by("-created_at").values_list("data", flat=True)[:options["samples"]]
+        samples = [payloads.decode(data) for data in rows]
+        if len(samples) < 2:
+            raise CommandError("Need at least two stored payloads to train on.")
+
+        zdict = payloads.train_dictionary(samples, min(options["size"], payloads.MAX_DICTIONARY_SIZE))
+        raw = [json.dumps(sample, separators=(",", ":"), ensure_ascii=False).encode("utf-8") for sample in samples]
+        plain = sum(len(payloads.deflate(body)) for body in raw)
+        trained = sum(len(payloads.deflate(body, zdict)) for body in raw)
+        dictionary = PayloadDictionary.objects.create(data=zdict, samples=len(samples))
+        payloads.clear()
+        self.stdout.write(
+            f"Dictionary {dictionary.pk}: {len(zdict)} bytes from {len(samples)} payloads; "
+            f"{sum(map(len, raw))} raw bytes -> {plain} without, {trained} with it."
+        )
+
+        if options["recompress"]:
+            self.recompress(dictionary.pk, options["chunk_size"])
+
+    def recompress(self, dictionary_id, chunk_size):
+        saved = rewritten = 0
+        last = ""
+        while True:
+            with transaction.atomic():
+                batch = list(PayloadBlob.objects.filter(digest__gt=last).order_by("digest")[:chunk_size])
+                if not batch:
+                    break
+                last = batch[-1].digest
+                changed = []
+                for blob in batch:
+                    raw = json.dumps(payloads.decode(blob.data), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+                    data = payloads.compress(raw, dictionary_id)
+                    if len(data) < len(blob.data):
+                        saved += len(blob.data) - len(data)
+                        blob.data = data
+                        changed.append(blob)
+                PayloadBlob.objects.bulk_update(changed, ["data"])
+                rewritten += len(changed)
+        self.stdout.write(f"Re-encoded {rewritten} blobs, {saved} bytes smaller.")
@@ -0,0 +1,374 @@
+import atexit
+from bisect import bisect_left
+import contextvars
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import Http404, HttpResponse
+
+
+# Request instrumentation: per-phase timings (Server-Timing header), LLM token
+# counts, DB query counts/time and cache hit/miss counters, aggregated into
+# histograms that every gunicorn worker flushes to its own file under METRICS_DIR.
+# /metrics merges the files into the Prometheus text format.
+#
+# With METRICS_ENABLED off the middleware removes itself (MiddlewareNotUsed) and
+# every hook below returns after one flag or contextvar check.
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_enabled = False
+
+
+class Registry:
+    """Counters and histograms of this process, keyed by (name, sorted label pairs)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.pid = os.getpid()
+            self.counters = {}
+            self.histograms = {}
+
+    def _check_fork(self):
+        # A forked worker must not report its parent's numbers again
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.counters = {}
+            self.histograms = {}
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_fork()
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, labels, value, buckets=SECONDS_BUCKETS):
+        self.observe_many([((name, tuple(sorted(labels.items()))), value, buckets)])
+
+    def observe_many(self, observations):
+        """Record ``(key, value, buckets)`` triples under one lock; keys carry sorted label pairs."""
+        with self._lock:
+            self._check_fork()
+            for key, value, buckets in observations:
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+                index = bisect_left(buckets, value)
+                if index < len(buckets):
+                    histogram["counts"][index] += 1
+                histogram["sum"] += value
+                histogram["count"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            self._check_fork()
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                "histograms": [
+                    [name, list(labels), list(h["buckets"]), list(h["counts"]), h["sum"], h["count"]]
+                    for (name, labels), h in self.histograms.items()
+                ],
+            }
+
+
+registry = Registry()
+
+
+# --- multiprocess files ---
+def metrics_dir():
+    return Path(getattr(settings, "METRICS_DIR", "/tmp/elevare-metrics"))
+
+
+def flush():
+    """Write this process's cumulative metrics to METRICS_DIR/<pid>.json (atomically)."""
+    directory = metrics_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{os.getpid()}.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(registry.snapshot()))
+    os.replace(tmp, path)
+
+
+def collect():
+    """Merge the snapshots of every worker process (after flushing our own)."""
+    flush()
+    counters, histograms = {}, {}
+    for path in metrics_dir().glob("*.json"):
+        try:
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue  # a worker is mid-write or the file vanished
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, counts, total, count in snapshot["histograms"]:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.setdefault(key, {"buckets": buckets, "counts": [0] * len(buckets), "sum": 0.0, "count": 0})
+            merged["counts"] = [a + b for a, b in zip(merged["counts"], counts)]
+            merged["sum"] += total
+            merged["count"] += count
+    return counters, histograms
+
+
+_flusher = {"pid": None}
+
+
+def _start_flusher():
+    # One daemon thread per process (re-started after a fork) plus a flush at exit
+    if _flusher["pid"] == os.getpid():
+        return
+    _flusher["pid"] = os.getpid()
+    interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 5)
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                flush()
+            except OSError:
+                pass
+
+    threading.Thread(target=loop, name="metrics-flush", daemon=True).start()
+    atexit.register(flush)
+
+
+def enable():
+    global _enabled
+    _enabled = True
+    _start_flusher()
+
+
+def is_enabled():
+    return _enabled
+
+
+# --- per-request recording ---
+class RequestMetrics:
+    __slots__ = ("phases", "queries", "query_time", "notes")
+
+    def __init__(self):
+        self.phases = {}
+        self.queries = 0
+        self.query_time = 0.0
+        self.notes = {}
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_time += time.perf_counter() - started
+            self.queries += 1
+
+
+_current = contextvars.ContextVar("career_request_metrics", default=None)
+
+
+class _Phase:
+    __slots__ = ("current", "name", "started")
+
+    def __init__(self, current, name):
+        self.current = current
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        phases = self.current.phases
+        phases[self.name] = phases.get(self.name, 0.0) + time.perf_counter() - self.started
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+def phase(name):
+    """``with metrics.phase("llm"):`` times a block of the current request."""
+    current = _current.get()
+    if current is None:
+        return _NO_PHASE
+    return _Phase(current, name)
+
+
+def record_llm(response, model):
+    """Count prompt/completion tokens from a chat completion's ``usage``."""
+    if not _enabled:
+        return
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    model = getattr(response, "model", None) or model  # a hedge may have answered from another model
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    registry.inc("career_llm_tokens_total", {"kind": "prompt", "model": model}, prompt_tokens)
+    registry.inc("career_llm_tokens_total", {"kind": "completion", "model": model}, completion_tokens)
+    current = _current.get()
+    if current is not None:
+        tokens = current.notes.get("tokens", (0, 0))
+        current.notes["tokens"] = (tokens[0] + prompt_tokens, tokens[1] + completion_tokens)
+
+
+def record_cache(cache, result):
+    """Count a cache lookup; ``result`` is the tier that answered or ``"miss"``."""
+    if not _enabled:
+        return
+    registry.inc("career_cache_lookups_total", {"cache": cache, "result": result})
+    current = _current.get()
+    if current is not None:
+        current.notes[f"cache-{cache}"] = result
+
+
+def record_admission(lane, result):
+    """Count an admission decision: ``admitted``, ``quota`` (bucket empty) or ``shed``."""
+    if not _enabled:
+        return
+    registry.inc("career_admission_total", {"lane": lane, "result": result})
+
+
+def record_prefetch(result, tokens=0):
+    """Count a prefetch outcome (``generated``, ``hit``, ``cached``, ``budget``, ...) and its LLM tokens."""
+    if not _enabled:
+        return
+    registry.inc("career_prefetch_total", {"result": result})
+    if tokens:
+        registry.inc("career_prefetch_tokens_total", {}, tokens)
+
+
+# Helper: Server-Timing entries, e.g. "llm;dur=812.4;desc=\"640+210 tokens\""
+def server_timing(current, total):
+    entries = []
+    for name, seconds in current.phases.items():
+        entry = f"{name};dur={seconds * 1000:.1f}"
+        if name == "llm" and "tokens" in current.notes:
+            entry += ';desc="%d+%d tokens"' % current.notes["tokens"]
+        entries.append(entry)
+    if current.queries:
+        entries.append(f'db;dur={current.query_time * 1000:.1f};desc="{current.queries} queries"')
+    for note, value in current.notes.items():
+        if note.startswith("cache-"):
+            entries.append(f'{note};desc="{value}"')
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """Times every request and its phases; must come first in MIDDLEWARE."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS_ENABLED", False):
+            raise MiddlewareNotUsed
+        enable()
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        current = RequestMetrics()
+        token = _current.set(current)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(current.db_wrapper):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, current, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        # Async ORM calls run on sync_to_async threads, outside this wrapper: no DB numbers here
+        current = RequestMetrics()
+        token = _current.set(current)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, current, time.perf_counter() - started)
+        return response
+
+    def finish(self, request, response, current, total):
+        match = getattr(request, "resolver_match", None)
+        view = ("view", (match.url_name or match.view_name) if match else "unmatched")
+        status = ("status", f"{response.status_code // 100}xx")
+        # Label pairs are built pre-sorted to keep this at a few microseconds
+        observations = [
+            (("career_request_seconds", (("method", request.method), status, view)), total, SECONDS_BUCKETS),
+            (("career_db_queries", (view,)), current.queries, COUNT_BUCKETS),
+            (("career_db_seconds", (view,)), current.query_time, SECONDS_BUCKETS),
+        ]
+        for name, seconds in current.phases.items():
+            observations.append((("career_phase_seconds", (("phase", name), view)), seconds, SECONDS_BUCKETS))
+        registry.observe_many(observations)
+        response["Server-Timing"] = server_timing(current, total)
+
+
+# --- /metrics ---
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def render(counters, histograms):
+    lines = []
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {name} counter")
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{name}{_label_text(labels)} {value}")
+    for name in sorted({name for name, _ in histograms}):
+        lines.append(f"# TYPE {name} histogram")
+        for (metric, labels), h in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(h["buckets"], h["counts"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_label_text(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{_label_text(labels, [('le', '+Inf')])} {h['count']}")
+            lines.append(f"{name}_sum{_label_text(labels)} {h['sum']}")
+            lines.append(f"{name}_count{_label_text(labels)} {h['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    if not _enabled:
+        raise Http404
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=401)
+    return HttpResponse(render(*collect()), content_type="text/plain; version=0.0.4; charset=utf-8")
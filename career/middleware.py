@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.middleware.csrf import CsrfViewMiddleware
+
+
+# "API-only" middleware profile: with API_ONLY_MIDDLEWARE on, requests under
+# API_PATH_PREFIX skip sessions, CSRF, Django's auth middleware and messages. The
+# API authenticates with JWTs (DRF, career/authentication.py) and never uses a
+# cookie, so those only cost time there; /admin/ keeps the full stack. The classes
+# subclass Django's, which keeps the admin's middleware system checks happy.
+
+
+class APIExemptMixin:
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.api_prefix = getattr(settings, "API_PATH_PREFIX", "/api/") if getattr(settings, "API_ONLY_MIDDLEWARE", False) else None
+
+    def is_api(self, request):
+        return self.api_prefix is not None and request.path_info.startswith(self.api_prefix)
+
+    def __call__(self, request):
+        if self.is_api(request):
+            return self.get_response(request)  # a coroutine in async mode, awaited by the caller
+        return super().__call__(request)
+
+
+class WebSessionMiddleware(APIExemptMixin, SessionMiddleware):
+    pass
+
+
+class WebCsrfViewMiddleware(APIExemptMixin, CsrfViewMiddleware):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if self.is_api(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class WebAuthenticationMiddleware(APIExemptMixin, AuthenticationMiddleware):
+    pass
+
+
+class WebMessageMiddleware(APIExemptMixin, MessageMiddleware):
+    pass
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('career', '0003_predictioncacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CareerCatalogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('career', models.CharField(max_length=255)),
+                ('payload', models.JSONField()),
+                ('generated_at', models.DateTimeField()),
+                ('version', models.PositiveIntegerField(default=1)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='careersuggestion',
+            name='suggestion',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='careersuggestion',
+            name='catalog',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='suggestions', to='career.careercatalogentry'),
+        ),
+    ]
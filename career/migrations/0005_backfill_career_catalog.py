@@ -0,0 +1,56 @@
+from django.db import migrations
+from django.utils import timezone
+
+CHUNK_SIZE = 1000
+
+
+def normalize(name):
+    return " ".join(str(name).split()).casefold()[:255]
+
+
+def backfill_catalog(apps, schema_editor):
+    CareerCatalogEntry = apps.get_model("career", "CareerCatalogEntry")
+    CareerSuggestion = apps.get_model("career", "CareerSuggestion")
+
+    entries = {}
+    pending = CareerSuggestion.objects.filter(catalog__isnull=True, suggestion__isnull=False)
+    while True:
+        # Newest rows first, so each catalog entry keeps the most recent payload
+        batch = list(pending.order_by("-created_at", "-id")[:CHUNK_SIZE])
+        if not batch:
+            break
+        for row in batch:
+            key = normalize(row.career)
+            entry = entries.get(key)
+            if entry is None:
+                entry, _ = CareerCatalogEntry.objects.get_or_create(
+                    key=key,
+                    defaults={
+                        "career": " ".join(str(row.career).split())[:255],
+                        "payload": row.suggestion,
+                        "generated_at": row.created_at or timezone.now(),
+                    },
+                )
+                entries[key] = entry
+            row.catalog = entry
+            row.suggestion = None
+        CareerSuggestion.objects.bulk_update(batch, ["catalog", "suggestion"])
+
+
+def restore_suggestions(apps, schema_editor):
+    CareerSuggestion = apps.get_model("career", "CareerSuggestion")
+    rows = CareerSuggestion.objects.filter(catalog__isnull=False, suggestion__isnull=True).select_related("catalog")
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        row.suggestion = row.catalog.payload
+        row.save(update_fields=["suggestion"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('career', '0004_careercatalogentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_catalog, restore_suggestions),
+    ]
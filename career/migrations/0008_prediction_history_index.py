@@ -0,0 +1,42 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+CHUNK_SIZE = 1000
+
+
+def backfill_career_titles(apps, schema_editor):
+    CareerPrediction = apps.get_model("career", "CareerPrediction")
+    last_id = 0
+    while True:
+        batch = list(CareerPrediction.objects.filter(id__gt=last_id).order_by("id")[:CHUNK_SIZE])
+        if not batch:
+            break
+        for row in batch:
+            paths = row.prediction.get("career_paths") if isinstance(row.prediction, dict) else None
+            if isinstance(paths, list):
+                row.career_titles = [p["title"] for p in paths if isinstance(p, dict) and p.get("title")]
+        CareerPrediction.objects.bulk_update(batch, ["career_titles"])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('career', '0007_generationjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='careerprediction',
+            name='career_titles',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddIndex(
+            model_name='careerprediction',
+            index=models.Index(fields=['user', '-created_at'], name='prediction_user_created_idx'),
+        ),
+        migrations.RunPython(backfill_career_titles, migrations.RunPython.noop),
+    ]
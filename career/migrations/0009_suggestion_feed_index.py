@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-18 08:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('career', '0008_prediction_history_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='careersuggestion',
+            index=models.Index(fields=['user', '-created_at'], name='suggestion_user_created_idx'),
+        ),
+    ]
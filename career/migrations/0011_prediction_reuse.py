@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('career', '0010_generation_usage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='careerprediction',
+            name='reused_from',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='career.careerprediction'),
+        ),
+        migrations.AddField(
+            model_name='careerprediction',
+            name='similarity',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
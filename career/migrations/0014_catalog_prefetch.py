@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 09:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('career', '0013_ratebucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='careercatalogentry',
+            name='prefetch_tokens',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='careercatalogentry',
+            name='prefetch_used_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='careercatalogentry',
+            name='prefetched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def json_to_payload_field(model_name, name):
+    # The JSON column keeps its name; only the model attribute becomes <name>_json
+    return migrations.SeparateDatabaseAndState(
+        state_operations=[
+            migrations.RenameField(model_name=model_name, old_name=name, new_name=f"{name}_json"),
+            migrations.AlterField(
+                model_name=model_name,
+                name=f"{name}_json",
+                field=models.JSONField(blank=True, db_column=name, null=True),
+            ),
+        ],
+        database_operations=[
+            migrations.AlterField(model_name=model_name, name=name, field=models.JSONField(blank=True, null=True)),
+        ],
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('career', '0014_catalog_prefetch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayloadBlob',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PayloadDictionary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.BinaryField()),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        json_to_payload_field('careerprediction', 'user_input'),
+        json_to_payload_field('careerprediction', 'prediction'),
+        json_to_payload_field('careersuggestion', 'suggestion'),
+        migrations.AddField(
+            model_name='careerprediction',
+            name='input_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='career.payloadblob'),
+        ),
+        migrations.AddField(
+            model_name='careerprediction',
+            name='prediction_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='career.payloadblob'),
+        ),
+        migrations.AddField(
+            model_name='careersuggestion',
+            name='suggestion_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='career.payloadblob'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import struct
+import zlib
+
+from django.db import migrations, transaction
+
+CHUNK_SIZE = 1000
+
+# Frozen copy of the career/payloads.py format: codec byte, dictionary id, raw deflate
+HEADER = struct.Struct(">BH")
+CODEC_DEFLATE = 1
+
+FIELDS = {
+    "CareerPrediction": (("user_input_json", "input_blob_id"), ("prediction_json", "prediction_blob_id")),
+    "CareerSuggestion": (("suggestion_json", "suggestion_blob_id"),),
+}
+
+
+def encode(value):
+    digest = hashlib.sha256(
+        json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+    raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+    return digest, HEADER.pack(CODEC_DEFLATE, 0) + compressor.compress(raw) + compressor.flush(), len(raw)
+
+
+def backfill_blobs(apps, schema_editor):
+    PayloadBlob = apps.get_model("career", "PayloadBlob")
+    for model_name, fields in FIELDS.items():
+        model = apps.get_model("career", model_name)
+        last_pk = 0
+        while True:
+            # Each chunk commits on its own: a large table is never locked for the whole run
+            with transaction.atomic():
+                batch = list(model.objects.filter(pk__gt=last_pk).order_by("pk")[:CHUNK_SIZE])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                blobs, changed = {}, []
+                for row in batch:
+                    dirty = False
+                    for legacy, blob in fields:
+                        value = getattr(row, legacy)
+                        if value is None:
+                            continue
+                        digest, data, size = encode(value)
+                        blobs.setdefault(digest, PayloadBlob(digest=digest, data=data, size=size))
+                        setattr(row, blob, digest)
+                        setattr(row, legacy, None)
+                        dirty = True
+                    if dirty:
+                        changed.append(row)
+                PayloadBlob.objects.bulk_create(blobs.values(), ignore_conflicts=True)
+                model.objects.bulk_update(changed, [name for pair in fields for name in pair])
+
+
+def restore_json(apps, schema_editor):
+    PayloadBlob = apps.get_model("career", "PayloadBlob")
+    PayloadDictionary = apps.get_model("career", "PayloadDictionary")
+    dictionaries = {pk: bytes(data) for pk, data in PayloadDictionary.objects.values_list("pk", "data")}
+
+    def decode(data):
+        data = bytes(data)
+        _, dictionary_id = HEADER.unpack_from(data)
+        if dictionary_id:
+            decompressor = zlib.decompressobj(-15, zdict=dictionaries[dictionary_id])
+        else:
+            decompressor = zlib.decompressobj(-15)
+        return json.loads(decompressor.decompress(data[HEADER.size:]) + decompressor.flush())
+
+    for model_name, fields in FIELDS.items():
+        model = apps.get_model("career", model_name)
+        last_pk = 0
+        while True:
+            with transaction.atomic():
+                batch = list(model.objects.filter(pk__gt=last_pk).order_by("pk")[:CHUNK_SIZE])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                digests = {getattr(row, blob) for row in batch for _, blob in fields} - {None}
+                payloads = {digest: decode(data) for digest, data in PayloadBlob.objects.filter(pk__in=digests).values_list("pk", "data")}
+                for row in batch:
+                    for legacy, blob in fields:
+                        if getattr(row, blob) is not None:
+                            setattr(row, legacy, payloads[getattr(row, blob)])
+                            setattr(row, blob, None)
+                model.objects.bulk_update(batch, [name for pair in fields for name in pair])
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('career', '0015_payload_store'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_blobs, restore_json),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('career', '0016_backfill_payload_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CareerTitleRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('key', models.CharField(max_length=255)),
+                ('title', models.CharField(max_length=255)),
+                ('predictions', models.PositiveIntegerField(default=0)),
+                ('suggestions', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'key'), name='career_title_rollup_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SkillCourseRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('course', models.CharField(max_length=255)),
+                ('skill', models.CharField(max_length=255)),
+                ('predictions', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'course', 'skill'), name='skill_course_rollup_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TokenUsageRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('endpoint', models.CharField(max_length=16)),
+                ('llm_model', models.CharField(blank=True, default='', max_length=100)),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('generations', models.PositiveIntegerField(default=0)),
+                ('prompt_tokens', models.PositiveBigIntegerField(default=0)),
+                ('completion_tokens', models.PositiveBigIntegerField(default=0)),
+                ('latency_ms', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('day', 'endpoint', 'llm_model'), name='token_usage_rollup_unique')],
+            },
+        ),
+    ]
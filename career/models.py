@@ -1,20 +1,322 @@
+import uuid
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth.models import User
 
-class CareerPrediction(models.Model):
-    user_input = models.JSONField()  # Store submitted inputs
-    prediction = models.JSONField()  # Store career paths with roadmap
+class PayloadBlob(models.Model):
+    """A JSON payload stored once, compressed, under the sha256 of its canonical form (career/payloads.py)."""
+
+    digest = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()  # codec byte, dictionary id, deflate stream
+    size = models.PositiveIntegerField()  # uncompressed JSON bytes
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.digest[:12]} ({len(self.data)}/{self.size} bytes)"
+
+
+class PayloadDictionary(models.Model):
+    """A zlib preset dictionary trained on saved payloads; blobs name the one they were compressed with."""
+
+    data = models.BinaryField()
+    samples = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"dictionary {self.pk} ({len(self.data)} bytes, {self.samples} samples)"
+
+
+class PayloadProperty(property):
+    """
+    A JSON attribute kept in PayloadBlob and referenced by the ``blob`` foreign
+    key. Decoded on first access (select_related the key to read the blobs with
+    the rows); rows saved before the backfill still answer from ``legacy``.
+    Assigned values are stored when the row is saved (or ``store_payloads``).
+    """
+
+    def __init__(self, blob, legacy):
+        super().__init__()
+        self.blob = blob
+        self.legacy = legacy
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        values = instance.__dict__.setdefault("_payloads", {})
+        if self.name not in values:
+            values[self.name] = self.load(instance)
+        return values[self.name]
+
+    def __set__(self, instance, value):
+        instance.__dict__.setdefault("_payloads", {})[self.name] = value
+        instance.__dict__.setdefault("_unsaved_payloads", set()).add(self.name)
+
+    def load(self, instance):
+        from .payloads import decode
+
+        if getattr(instance, f"{self.blob}_id") is None:
+            return getattr(instance, self.legacy)
+        return decode(getattr(instance, self.blob).data)
+
+
+class PayloadModel(models.Model):
+    """Saves the PayloadProperty values assigned since the row was loaded."""
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def payload_properties(cls):
+        return [attr for attr in vars(cls).values() if isinstance(attr, PayloadProperty)]
+
+    @classmethod
+    def store_payloads(cls, instances):
+        """Write the pending payloads of ``instances`` with one query; call before bulk_create."""
+        from .payloads import put_many
+
+        pending = []
+        for instance in instances:
+            for name in instance.__dict__.pop("_unsaved_payloads", ()):
+                pending.append((instance, next(p for p in cls.payload_properties() if p.name == name)))
+        # None stays a NULL reference rather than a blob of "null"
+        digests = put_many([instance.__dict__["_payloads"][prop.name] for instance, prop in pending])
+        for (instance, prop), digest in zip(pending, digests):
+            setattr(instance, f"{prop.blob}_id", digest)
+            setattr(instance, prop.legacy, None)
+
+    def save(self, *args, **kwargs):
+        if self.__dict__.get("_unsaved_payloads"):
+            self.store_payloads([self])
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], *(
+                    field for prop in self.payload_properties() for field in (prop.blob, prop.legacy)
+                )}
+        super().save(*args, **kwargs)
+
+    def refresh_from_db(self, *args, **kwargs):
+        self.__dict__.pop("_payloads", None)
+        self.__dict__.pop("_unsaved_payloads", None)
+        super().refresh_from_db(*args, **kwargs)
+
+
+class CareerPrediction(PayloadModel):
+    # Submitted inputs and the generated career paths, stored once per distinct payload
+    user_input = PayloadProperty("input_blob", "user_input_json")
+    prediction = PayloadProperty("prediction_blob", "prediction_json")
+    input_blob = models.ForeignKey(PayloadBlob, null=True, blank=True, on_delete=models.PROTECT, related_name="+")
+    prediction_blob = models.ForeignKey(PayloadBlob, null=True, blank=True, on_delete=models.PROTECT, related_name="+")
+    user_input_json = models.JSONField(null=True, blank=True, db_column="user_input")  # Rows not yet backfilled
+    prediction_json = models.JSONField(null=True, blank=True, db_column="prediction")
+    career_titles = models.JSONField(default=list, blank=True)  # Denormalized titles for history summaries
     created_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="career_predictions")
+    prompt_version = models.CharField(max_length=50, blank=True, default="")  # e.g. "prediction@v2"
+    llm_model = models.CharField(max_length=100, blank=True, default="")
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)  # null: served from a cache
+    completion_tokens = models.PositiveIntegerField(null=True, blank=True)
+    latency_ms = models.PositiveIntegerField(null=True, blank=True)
+    # Served from a similar earlier profile's prediction (career/similarity.py) instead of the LLM
+    reused_from = models.ForeignKey("self", null=True, blank=True, on_delete=models.SET_NULL, related_name="+")
+    similarity = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "-created_at"], name="prediction_user_created_idx")]
+
+    @staticmethod
+    def titles_from(prediction):
+        paths = prediction.get("career_paths") if isinstance(prediction, dict) else None
+        if not isinstance(paths, list):
+            return []
+        return [path["title"] for path in paths if isinstance(path, dict) and path.get("title")]
+
+    def save(self, *args, **kwargs):
+        if not self.career_titles:
+            self.career_titles = self.titles_from(self.prediction)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.user.username} - {self.created_at}"
     
-class CareerSuggestion(models.Model):
+class CareerCatalogEntry(models.Model):
+    key = models.CharField(max_length=255, unique=True)  # normalized career name
+    career = models.CharField(max_length=255)  # career name as first requested
+    payload = models.JSONField()  # Shared career breakdown from OpenAI
+    generated_at = models.DateTimeField()
+    version = models.PositiveIntegerField(default=1)
+    # Set when career/prefetch.py generated the entry before anyone asked for it
+    prefetched_at = models.DateTimeField(null=True, blank=True)
+    prefetch_tokens = models.PositiveIntegerField(null=True, blank=True)
+    prefetch_used_at = models.DateTimeField(null=True, blank=True)  # first request it answered
+
+    def __str__(self):
+        return f"{self.key} (v{self.version})"
+
+
+class CareerSuggestion(PayloadModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="career_suggestions")
     career = models.CharField(max_length=255)
-    suggestion = models.JSONField()   # Store parsed JSON from OpenAI
+    # Legacy per-user copy of the parsed JSON (new rows point at the catalog)
+    suggestion = PayloadProperty("suggestion_blob", "suggestion_json")
+    suggestion_blob = models.ForeignKey(PayloadBlob, null=True, blank=True, on_delete=models.PROTECT, related_name="+")
+    suggestion_json = models.JSONField(null=True, blank=True, db_column="suggestion")
+    catalog = models.ForeignKey(
+        CareerCatalogEntry, null=True, blank=True, on_delete=models.PROTECT, related_name="suggestions"
+    )
+    prompt_version = models.CharField(max_length=50, blank=True, default="")  # e.g. "career_details@v2"
+    llm_model = models.CharField(max_length=100, blank=True, default="")
+    prompt_tokens = models.PositiveIntegerField(null=True, blank=True)  # null: served from a cache
+    completion_tokens = models.PositiveIntegerField(null=True, blank=True)
+    latency_ms = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "-created_at"], name="suggestion_user_created_idx")]
+
+    @property
+    def payload(self):
+        if self.catalog_id is not None:
+            return self.catalog.payload
+        return self.suggestion
+
     def __str__(self):
         return f"{self.career} suggestion for {self.user.username}"
+
+
+class PredictionCacheEntry(models.Model):
+    key = models.CharField(max_length=64, unique=True)  # sha256 of the normalized profile
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+    hits = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key[:12]} (expires {self.expires_at})"
+
+
+class GenerationLease(models.Model):
+    # Cross-worker single-flight lease; the leader writes the shared result here
+    key = models.CharField(max_length=255, unique=True)
+    owner = models.CharField(max_length=128)
+    expires_at = models.DateTimeField()
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.key} held by {self.owner}"
+
+
+class GenerationJob(models.Model):
+    KIND_PREDICT = "predict"
+    KIND_CAREER = "career"
+    KIND_CHOICES = [(KIND_PREDICT, "Career prediction"), (KIND_CAREER, "Career details")]
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [(PENDING, "Pending"), (RUNNING, "Running"), (SUCCEEDED, "Succeeded"), (FAILED, "Failed")]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="generation_jobs")
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    payload = models.JSONField()  # Submitted request data
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)  # Same body the sync endpoint returns
+    error = models.TextField(blank=True, default="")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    locked_by = models.CharField(max_length=128, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    @property
+    def is_finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def __str__(self):
+        return f"{self.kind} job {self.id} ({self.status})"
+
+
+class UserImport(models.Model):
+    """Progress of a roster import (career/roster.py); an interrupted one resumes after ``lines_done``."""
+
+    RUNNING = "running"
+    COMPLETED = "completed"
+    STATUS_CHOICES = [(RUNNING, "Running"), (COMPLETED, "Completed")]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name="user_imports")
+    source = models.CharField(max_length=255, blank=True, default="")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=RUNNING)
+    lines_done = models.PositiveIntegerField(default=0)  # Last input line committed
+    created = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class RateBucket(models.Model):
+    """A token bucket of career/admission.py, shared by every worker process."""
+
+    key = models.CharField(max_length=64, primary_key=True)  # "user:<id>" or "global"
+    tokens = models.FloatField()
+    updated = models.FloatField()  # Unix time of the last refill
+
+    def __str__(self):
+        return f"{self.key}: {self.tokens:.1f} tokens"
+
+
+# Rollups (career/rollups.py): per-day counters kept up to date as rows are saved,
+# so dashboards never scan or decode the history tables
+class CareerTitleRollup(models.Model):
+    day = models.DateField()
+    key = models.CharField(max_length=255)  # normalized career name
+    title = models.CharField(max_length=255)  # as first seen
+    predictions = models.PositiveIntegerField(default=0)  # predictions listing the title
+    suggestions = models.PositiveIntegerField(default=0)  # career details requests
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day", "key"], name="career_title_rollup_unique")]
+
+    def __str__(self):
+        return f"{self.title} on {self.day}"
+
+
+class SkillCourseRollup(models.Model):
+    day = models.DateField()
+    course = models.CharField(max_length=255)  # normalized ug_course
+    skill = models.CharField(max_length=255)  # normalized skill
+    predictions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["day", "course", "skill"], name="skill_course_rollup_unique")]
+
+    def __str__(self):
+        return f"{self.skill} / {self.course} on {self.day}"
+
+
+class TokenUsageRollup(models.Model):
+    day = models.DateField()
+    endpoint = models.CharField(max_length=16)  # "predict" or "career"
+    llm_model = models.CharField(max_length=100, blank=True, default="")  # "": saved without an LLM call
+    rows = models.PositiveIntegerField(default=0)
+    generations = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveBigIntegerField(default=0)
+    completion_tokens = models.PositiveBigIntegerField(default=0)
+    latency_ms = models.PositiveBigIntegerField(default=0)  # sum over generations
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "endpoint", "llm_model"], name="token_usage_rollup_unique")
+        ]
+
+    def __str__(self):
+        return f"{self.endpoint} {self.llm_model or '-'} on {self.day}"
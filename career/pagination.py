@@ -0,0 +1,65 @@
+import base64
+import hashlib
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+# Keyset (cursor) pagination over (-created_at, -id). Cursors are opaque to
+# clients: urlsafe base64 of "<created_at isoformat>|<key>[|<key>...]" for the
+# last row of the page, where the keys are integers (the id, plus any extra
+# tie-breakers a feed orders by).
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at, *keys):
+    raw = "|".join([created_at.isoformat(), *(str(key) for key in keys)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, keys=1):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, *values = raw.split("|")
+        created_at = parse_datetime(created_at)
+        if created_at is None or len(values) != keys:
+            raise ValueError(raw)
+        return (created_at, *(int(value) for value in values))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor("Invalid cursor.") from e
+
+
+def after_cursor(queryset, cursor, created_field="created_at", pk_field="id"):
+    """Rows strictly after ``cursor`` in (-created_at, -id) order."""
+    if not cursor:
+        return queryset
+    created_at, pk = decode_cursor(cursor)
+    return queryset.filter(
+        Q(**{f"{created_field}__lt": created_at}) | Q(**{created_field: created_at, f"{pk_field}__lt": pk})
+    )
+
+
+def page_limit(request, default, maximum):
+    try:
+        limit = int(request.query_params.get("limit", default))
+    except ValueError:
+        limit = default
+    return max(1, min(limit, maximum))
+
+
+def page_etag(*parts):
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request, etag):
+    header = request.headers.get("If-None-Match", "")
+    return header.strip() == "*" or etag in [tag.strip() for tag in header.split(",")]
+
+
+def next_link(request, cursor):
+    params = request.query_params.copy()
+    params["cursor"] = cursor
+    return f'<{request.build_absolute_uri(request.path)}?{params.urlencode()}>; rel="next"'
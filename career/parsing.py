@@ -0,0 +1,184 @@
+import json
+import re
+from typing import List
+
+from pydantic import BaseModel, ValidationError, field_validator
+
+
+# Parsing of LLM completions: a single-pass scanner finds the outermost JSON
+# object, then precompiled pydantic schemas validate (and lightly repair) the
+# prediction and career-detail payloads.
+
+
+# Everything up to the next brace, skipping whole JSON strings (which may
+# contain braces). Possessive quantifiers keep the regex engine from backtracking.
+_SKIP = re.compile(r'(?:[^"{}]++|"(?:[^"\\]++|\\.)*+")*+', re.S)
+
+
+def find_json_object(text, start=0):
+    """
+    Return the first balanced ``{...}`` substring of ``text`` that starts at
+    or after ``start``, or ``None``. Braces inside JSON strings are ignored.
+    This is a single forward pass: the regex engine jumps from brace to
+    brace, so only braces reach the Python loop.
+    """
+    pos = text.find("{", start)
+    if pos < 0:
+        return None
+    begin = pos
+    depth = 0
+    while pos < len(text):
+        ch = text[pos]
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[begin:pos + 1]
+        else:
+            return None  # unterminated string: the output was cut off
+        pos = _SKIP.match(text, pos + 1).end()
+    return None
+
+
+# Helper: safely extract JSON from AI output (tolerates ```json fences and chatter)
+def extract_json(text):
+    text = text.strip()
+    begin = text.find("{")
+    if begin < 0:
+        return None
+
+    # Fast path: first "{" to last "}" is the object, whatever fences or prose surround it
+    end = text.rfind("}")
+    if end > begin:
+        try:
+            return json.loads(text[begin:end + 1])
+        except ValueError:
+            pass
+
+    # Otherwise (trailing braces in chatter, several objects) take the first balanced one
+    candidate = find_json_object(text, begin)
+    if candidate is None:
+        return None
+    try:
+        return json.loads(candidate)
+    except ValueError:
+        return None
+
+
+# --- Schemas ---
+def _as_list(value):
+    # Models sometimes return a single string (or null) where a list is expected
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return value
+
+
+class Roadmap(BaseModel):
+    short_term: List[str] = []
+    medium_term: List[str] = []
+    long_term: List[str] = []
+
+    @field_validator("short_term", "medium_term", "long_term", mode="before")
+    @classmethod
+    def coerce_lists(cls, value):
+        return _as_list(value)
+
+
+class CareerPath(BaseModel):
+    title: str
+    description: str = ""
+    required_skills: List[str] = []
+    roadmap: Roadmap = Roadmap()
+
+    @field_validator("required_skills", mode="before")
+    @classmethod
+    def coerce_lists(cls, value):
+        return _as_list(value)
+
+
+class PredictionPayload(BaseModel):
+    career_paths: List[CareerPath]
+
+    @field_validator("career_paths")
+    @classmethod
+    def not_empty(cls, value):
+        if not value:
+            raise ValueError("at least one career path is required")
+        return value
+
+
+class Course(BaseModel):
+    title: str
+    platform: str = ""
+    url: str = ""
+
+
+class CareerDetailsPayload(BaseModel):
+    career: str
+    required_skills: List[str] = []
+    free_courses: List[Course] = []
+    roadmap: Roadmap
+
+    @field_validator("required_skills", "free_courses", mode="before")
+    @classmethod
+    def coerce_lists(cls, value):
+        return _as_list(value)
+
+
+class ParseResult:
+    """Validated payload (``None`` on failure) plus an error message for repair prompts."""
+
+    __slots__ = ("payload", "error")
+
+    def __init__(self, payload=None, error=None):
+        self.payload = payload
+        self.error = error
+
+    def __bool__(self):
+        return self.payload is not None
+
+
+def parse_payload(text, schema):
+    data = extract_json(text or "")
+    if data is None:
+        return ParseResult(error="The reply did not contain a complete JSON object.")
+    try:
+        return ParseResult(schema.model_validate(data).model_dump())
+    except ValidationError as e:
+        return ParseResult(error=str(e))
+
+
+def parse_prediction(text):
+    return parse_payload(text, PredictionPayload)
+
+
+def parse_career_details(text):
+    return parse_payload(text, CareerDetailsPayload)
+
+
+def repair_messages(messages, raw_content, error):
+    """Conversation for the single repair retry: the bad reply plus what was wrong with it."""
+    return messages + [
+        {"role": "assistant", "content": raw_content or ""},
+        {
+            "role": "user",
+            "content": (
+                "Your reply was not valid JSON in the requested format. "
+                f"Problem: {error[:500]}\nReply with ONLY the corrected JSON."
+            ),
+        },
+    ]
+
+
+def can_repair(response, budget):
+    """Whether a repair retry fits in ``budget`` total tokens, judging by the first call's usage."""
+    if budget <= 0:
+        return False
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return True
+    # The retry re-sends the prompt plus the bad completion and produces a new one
+    return usage.total_tokens + usage.prompt_tokens + 2 * usage.completion_tokens <= budget
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import re
+import struct
+import threading
+import time
+import zlib
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from .cache import LRUCache
+from .models import PayloadBlob, PayloadDictionary, PayloadModel
+
+
+# Content-addressed payload store behind CareerPrediction.user_input/prediction and
+# CareerSuggestion.suggestion (PayloadProperty in models.py). Each distinct JSON
+# payload is stored once in PayloadBlob under the sha256 of its canonical form
+# (sorted keys, no whitespace) and rows reference it by that digest, so the
+# payloads that repeat across users cost one row instead of one per prediction.
+#
+# Blobs are raw deflate streams compressed against a zlib preset dictionary trained
+# on saved payloads (`manage.py train_payload_dictionary`): a blob's header names its
+# dictionary, so retraining never breaks older blobs. Rows hold the compressed bytes
+# and decompress only when the attribute is read.
+
+CODEC_DEFLATE = 1
+HEADER = struct.Struct(">BH")  # codec, dictionary id (0: none)
+MAX_DICTIONARY_SIZE = 32 * 1024  # the deflate window: bytes beyond it are never referenced
+
+_dictionaries = {}  # id -> bytes; a dictionary row never changes
+_current = {"id": None, "checked": 0.0}
+_lock = threading.Lock()
+_stored = LRUCache(maxsize=4096, ttl=60 * 60)  # digests known to exist: skip the INSERT
+
+
+# --- encoding ---
+def canonical(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def digest_of(value):
+    return hashlib.sha256(canonical(value).encode("utf-8")).hexdigest()
+
+
+def dictionary(dictionary_id):
+    data = _dictionaries.get(dictionary_id)
+    if data is None:
+        data = bytes(PayloadDictionary.objects.values_list("data", flat=True).get(pk=dictionary_id))
+        _dictionaries[dictionary_id] = data
+    return data
+
+
+def current_dictionary():
+    """Id of the newest trained dictionary (re-read every PAYLOAD_DICTIONARY_REFRESH seconds), 0 if none."""
+    now = time.monotonic()
+    with _lock:
+        if _current["id"] is not None and now - _current["checked"] < getattr(settings, "PAYLOAD_DICTIONARY_REFRESH", 300):
+            return _current["id"]
+    latest = PayloadDictionary.objects.order_by("-pk").values_list("pk", flat=True).first() or 0
+    with _lock:
+        _current.update(id=latest, checked=now)
+    return latest
+
+
+def deflate(raw, zdict=None):
+    level = getattr(settings, "PAYLOAD_COMPRESSION_LEVEL", 6)
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(raw) + compressor.flush()
+
+
+def inflate(body, zdict=None):
+    decompressor = zlib.decompressobj(-15, zdict=zdict) if zdict else zlib.decompressobj(-15)
+    return decompressor.decompress(body) + decompressor.flush()
+
+
+def compress(raw, dictionary_id=0):
+    return HEADER.pack(CODEC_DEFLATE, dictionary_id) + deflate(raw, dictionary(dictionary_id) if dictionary_id else None)
+
+
+def decode(data):
+    """The JSON value of a blob's ``data``."""
+    data = bytes(data)
+    codec, dictionary_id = HEADER.unpack_from(data)
+    if codec != CODEC_DEFLATE:
+        raise ValueError(f"Unknown payload codec {codec}")
+    return json.loads(inflate(data[HEADER.size:], dictionary(dictionary_id) if dictionary_id else None))
+
+
+def decode_or(data, legacy):
+    # values() rows carry both columns: the blob once backfilled, the JSON column before
+    return decode(data) if data is not None else legacy
+
+
+# --- storage ---
+def put_many(values):
+    """Store each value (once per distinct payload) and return their digests; None stays None."""
+    digests, new = [], {}
+    dictionary_id = None
+    for value in values:
+        if value is None:
+            digests.append(None)
+            continue
+        key = digest_of(value)
+        digests.append(key)
+        if key in new or _stored.get(key):
+            continue
+        if dictionary_id is None:
+            dictionary_id = current_dictionary()
+        # Key order as generated; only the digest uses the canonical form
+        raw = json.dumps(value, cls=DjangoJSONEncoder, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        new[key] = PayloadBlob(digest=key, data=compress(raw, dictionary_id), size=len(raw))
+    if new:
+        PayloadBlob.objects.bulk_create(new.values(), ignore_conflicts=True)
+        # Only committed blobs may be assumed to exist
+        transaction.on_commit(lambda: [_stored.set(key, True) for key in new])
+    return digests
+
+
+def put(value):
+    return put_many([value])[0]
+
+
+def delete_unreferenced(digests):
+    """
+    Delete the blobs among ``digests`` that no row references any more (after
+    their rows were archived or deleted); returns how many. A digest another
+    process still has in ``_stored`` was committed with a row within the last
+    hour, and that row keeps its blob.
+    """
+    digests = set(digests) - {None}
+    if not digests:
+        return 0
+    referenced = set()
+    for model in (model for model in apps.get_models() if issubclass(model, PayloadModel)):
+        for prop in model.payload_properties():
+            referenced.update(
+                model.objects.filter(**{f"{prop.blob}__in": digests}).values_list(f"{prop.blob}_id", flat=True)
+            )
+    unreferenced = digests - referenced
+    for key in unreferenced:
+        _stored.delete(key)
+    return PayloadBlob.objects.filter(pk__in=unreferenced).delete()[0]
+
+
+def clear():
+    """Forget the cached digests and dictionaries (tests, after deleting blobs)."""
+    _stored.clear()
+    _dictionaries.clear()
+    with _lock:
+        _current.update(id=None, checked=0.0)
+
+
+# --- dictionary training ---
+_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"\s*:?|[\[\]{},]+')
+
+
+def train_dictionary(samples, size=MAX_DICTIONARY_SIZE):
+    """
+    A preset dictionary for ``samples`` (JSON values): the JSON strings and
+    key prefixes that recur across payloads, most frequent last, since deflate
+    reaches the end of the dictionary with the shortest distances.
+    """
+    counts = Counter()
+    for sample in samples:
+        text = json.dumps(sample, cls=DjangoJSONEncoder, separators=(",", ":"), ensure_ascii=False)
+        # Count each fragment once per payload: what recurs across payloads is what a dictionary saves
+        counts.update(set(_TOKEN.findall(text)))
+    fragments, total = [], 0
+    for fragment, count in counts.most_common():
+        encoded = fragment.encode("utf-8")
+        if count < 2 or total + len(encoded) > size:
+            continue
+        fragments.append(encoded)
+        total += len(encoded)
+    return b"".join(reversed(fragments))
@@ -0,0 +1,125 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import admission, catalog, llm, metrics, services
+from .models import CareerCatalogEntry
+from .singleflight import singleflight
+
+
+# Speculative prefetch of career details (PREFETCH_ENABLED). Once a prediction is
+# saved, the details of its career paths are generated on a small background pool
+# so the click that usually follows is a catalog hit. Titles already in the catalog
+# or queued in this process are skipped, generation runs under the same single-flight
+# key as CareerDetailsView (a click during the prefetch joins it), a shared token
+# bucket caps prefetches per minute across workers, and nothing is queued while the
+# process is busy with requests or the LLM breaker is open.
+#
+# Prefetched entries record their tokens; the first request they answer sets
+# prefetch_used_at. `manage.py prefetch_report` gives the hit rate and the tokens
+# spent on entries nobody opened.
+
+_lock = threading.Lock()
+_in_flight = set()  # normalized names queued or generating in this process
+_pool = {"pid": None, "executor": None}
+
+
+def enabled():
+    return getattr(settings, "PREFETCH_ENABLED", False)
+
+
+def _executor():
+    with _lock:
+        if _pool["pid"] != os.getpid():
+            # A forked worker gets its own threads (the parent's are not copied)
+            _pool["executor"] = ThreadPoolExecutor(
+                max_workers=getattr(settings, "PREFETCH_WORKERS", 2), thread_name_prefix="prefetch"
+            )
+            _pool["pid"] = os.getpid()
+            _in_flight.clear()
+        return _pool["executor"]
+
+
+def busy():
+    """True while requests are waiting for a generation slot or the LLM breaker is not closed."""
+    queue = admission.get_queue()
+    if queue is not None:
+        stats = queue.stats()
+        if stats["waiting"] or stats["active"] >= queue.slots:
+            return True
+    return llm.gateway.breaker.state != llm.CircuitBreaker.CLOSED
+
+
+def schedule(titles):
+    """Queue detail generation for ``titles`` without blocking; returns the number queued."""
+    names = {}
+    for title in titles:
+        names.setdefault(catalog.normalize_career_name(title), title)
+    executor = _executor()
+    with _lock:
+        todo = {key: title for key, title in names.items() if key not in _in_flight}
+        for _ in range(len(names) - len(todo)):
+            metrics.record_prefetch("in_flight")
+        if not todo:
+            return 0
+        if busy() or len(_in_flight) + len(todo) > getattr(settings, "PREFETCH_QUEUE_SIZE", 32):
+            for _ in todo:
+                metrics.record_prefetch("load")
+            return 0
+        _in_flight.update(todo)
+    executor.submit(_run, todo)
+    return len(todo)
+
+
+def _take_budget():
+    rate = getattr(settings, "PREFETCH_RATE", 60)
+    if rate <= 0:
+        return True
+    burst = getattr(settings, "PREFETCH_BURST", 20)
+    return not admission.get_store().take("prefetch", rate / 60, burst)
+
+
+def _run(todo):
+    try:
+        # One query skips every title the catalog already answers
+        cached = {
+            entry.key for entry in CareerCatalogEntry.objects.filter(key__in=list(todo)) if catalog.is_fresh(entry)
+        }
+        for key, title in todo.items():
+            if key in cached:
+                metrics.record_prefetch("cached")
+            elif busy():
+                metrics.record_prefetch("load")
+            elif not _take_budget():
+                metrics.record_prefetch("budget")
+            else:
+                prefetch(key, title)
+    finally:
+        with _lock:
+            _in_flight.difference_update(todo)
+        close_old_connections()
+
+
+def prefetch(key, title):
+    """Generate and store the details of one career (sync, in the calling thread)."""
+    usage = services.Usage()
+
+    def produce():
+        payload = services.generate_career_details(title, usage)
+        if not payload:
+            raise ValueError("Unparseable career details")
+        tokens = (usage.prompt_tokens or 0) + (usage.completion_tokens or 0)
+        return catalog.store(title, payload, prefetch_tokens=tokens).pk
+
+    try:
+        singleflight.do(f"career:{key}", produce)
+    except Exception:
+        metrics.record_prefetch("failed", (usage.prompt_tokens or 0) + (usage.completion_tokens or 0))
+        return
+    if usage.model:
+        metrics.record_prefetch("generated", (usage.prompt_tokens or 0) + (usage.completion_tokens or 0))
+    else:
+        metrics.record_prefetch("joined")  # a click or another worker generated it first
@@ -0,0 +1,31 @@
+from django.conf import settings
+
+
+# USD per 1M (input, output) tokens, used by `manage.py llm_usage_report` and the
+# /api/stats/ dashboard. The LLM_PRICING setting overrides or extends the table.
+PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+
+def prices_for(model):
+    """``(input, output)`` prices of ``model``, or None for unpriced models.
+
+    The API reports dated snapshots ("gpt-4o-mini-2024-07-18"), which take the
+    price of the longest listed name they extend.
+    """
+    table = {**PRICES, **getattr(settings, "LLM_PRICING", {})}
+    if model in table:
+        return table[model]
+    names = [name for name in table if model and model.startswith(name + "-")]
+    return table[max(names, key=len)] if names else None
+
+
+def cost(model, prompt_tokens, completion_tokens):
+    """USD for the given token counts; None for unpriced models."""
+    prices = prices_for(model)
+    if prices is None:
+        return None
+    input_price, output_price = prices
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
@@ -0,0 +1,204 @@
+import string
+import textwrap
+
+from django.conf import settings
+
+
+# Prompt registry shared by the sync and async career views, the job worker and
+# cohort runs. Templates are versioned ("prediction@v2"); the version that served
+# a generation is stored on its row so `manage.py llm_usage_report` can compare
+# tokens, cost and latency across prompt changes. PROMPT_VERSIONS pins a version
+# per prompt (default: the latest registered).
+
+PREDICTION_SYSTEM_PROMPT = "You are an AI career counselor."
+CAREER_DETAILS_SYSTEM_PROMPT = "You are an expert career counselor and learning path guide."
+
+LIST_FIELDS = ("skills", "interests", "certifications")
+
+
+# Helper: rough token count (~4 characters per token for English and JSON)
+def estimate_tokens(text):
+    return (len(text) + 3) // 4
+
+
+def compact_template(text):
+    """Dedent and drop blank lines once, at import, instead of on every request."""
+    lines = (line.rstrip() for line in textwrap.dedent(text).strip().splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def compact_value(value, empty="-"):
+    # Lists render as "a, b, c" rather than Python reprs like ['a', 'b', 'c']
+    if value is None or value == "" or value == []:
+        return empty
+    if isinstance(value, (list, tuple)):
+        return ", ".join(" ".join(str(item).split()) for item in value)
+    return " ".join(str(value).split())
+
+
+def fit_lists(values, budget, render):
+    """
+    Drop items from the list fields until ``render(values)`` fits in ``budget``
+    tokens. Items are deduplicated (case-insensitively, first spelling wins)
+    and the last item of the currently longest list goes first, so the same
+    profile is always cut the same way.
+    """
+    values = dict(values)
+    for field in LIST_FIELDS:
+        if not isinstance(values.get(field), (list, tuple)):
+            continue
+        seen, items = set(), []
+        for item in values[field]:
+            item = " ".join(str(item).split())
+            if item and item.casefold() not in seen:
+                seen.add(item.casefold())
+                items.append(item)
+        values[field] = items
+
+    truncated = False
+    while estimate_tokens(render(values)) > budget:
+        lists = [field for field in LIST_FIELDS if values.get(field)]
+        if not lists:
+            break
+        longest = max(lists, key=lambda field: (len(values[field]), -LIST_FIELDS.index(field)))
+        values[longest] = values[longest][:-1]
+        truncated = True
+    return values, truncated
+
+
+class PromptTemplate:
+    """
+    A versioned prompt: a system message plus a user template compiled with
+    ``compact_template``. ``fields`` are formatted with ``compact_value``; a
+    ``budget`` (tokens) caps the rendered profile by trimming list fields.
+    """
+
+    def __init__(self, name, version, system, template, fields=(), budget=None, compact=True):
+        self.name = name
+        self.version = version
+        self.system = system
+        self.template = compact_template(template) if compact else template
+        self.fields = fields
+        self.budget = budget
+        self._names = tuple(dict.fromkeys(name for _, name, _, _ in string.Formatter().parse(self.template) if name))
+        # The budget covers the profile; the fixed instructions cost the same for everyone
+        self._fixed_tokens = estimate_tokens(self._format({}))
+
+    @property
+    def id(self):
+        return f"{self.name}@v{self.version}"
+
+    def _format(self, values):
+        return self.template.format(**{
+            name: compact_value(values.get(name)) if name in self.fields else values.get(name)
+            for name in self._names
+        })
+
+    def render(self, values):
+        budget = self.budget
+        if budget is None:
+            budget = getattr(settings, "PROMPT_INPUT_TOKEN_BUDGET", 0)
+        if budget and self.fields:
+            values, _ = fit_lists(values, budget + self._fixed_tokens, self._format)
+        return self._format(values)
+
+    def messages(self, values):
+        return [
+            {"role": "system", "content": self.system},
+            {"role": "user", "content": self.render(values)},
+        ]
+
+
+PROMPTS = {}
+
+
+def register(template):
+    PROMPTS[(template.name, template.version)] = template
+    return template
+
+
+def get_prompt(name, version=None):
+    """The pinned (PROMPT_VERSIONS) or latest version of prompt ``name``."""
+    if version is None:
+        version = getattr(settings, "PROMPT_VERSIONS", {}).get(name)
+    if version is None:
+        version = max(v for n, v in PROMPTS if n == name)
+    return PROMPTS[(name, int(version))]
+
+
+PROFILE_FIELDS = (
+    "ug_course", "ug_specialization", "skills", "interests", "ug_cgpa", "certifications", "experience_years",
+)
+
+# v1: the original view prompts, kept for comparison. Same wording and unformatted
+# values (lists render as Python reprs), indented 8 spaces less.
+register(PromptTemplate("prediction", 1, PREDICTION_SYSTEM_PROMPT, """
+    The user has the following profile:
+    UG Course: {ug_course}
+    UG Specialization: {ug_specialization}
+    Skills: {skills}
+    Interests: {interests}
+    UG CGPA: {ug_cgpa}
+    Certifications: {certifications}
+    Experience: {experience_years} years
+
+    Task:
+    Suggest 3 suitable career paths.
+    Return ONLY valid JSON in this format:
+    {{
+      "career_paths": [
+        {{
+          "title": "string",
+          "description": "string",
+          "required_skills": ["string"],
+          "roadmap": {{
+            "short_term": ["string"],
+            "medium_term": ["string"],
+            "long_term": ["string"]
+          }}
+        }}
+      ]
+    }}
+    """, budget=0, compact=False))
+
+register(PromptTemplate("prediction", 2, PREDICTION_SYSTEM_PROMPT, """
+    Profile:
+    UG course: {ug_course}
+    Specialization: {ug_specialization}
+    Skills: {skills}
+    Interests: {interests}
+    UG CGPA: {ug_cgpa}
+    Certifications: {certifications}
+    Experience (years): {experience_years}
+    Suggest 3 suitable career paths. Reply with only JSON:
+    {{"career_paths":[{{"title":"string","description":"string","required_skills":["string"],"roadmap":{{"short_term":["string"],"medium_term":["string"],"long_term":["string"]}}}}]}}
+    """, fields=PROFILE_FIELDS))
+
+register(PromptTemplate("career_details", 1, CAREER_DETAILS_SYSTEM_PROMPT, """
+    Task:
+    Provide a detailed breakdown for the career: {career_name}.
+
+    The response must be ONLY valid JSON in this format:
+    {{
+      "career": "{career_name}",
+      "required_skills": ["string"],
+      "free_courses": [
+        {{
+          "title": "string",
+          "platform": "string",
+          "url": "string"
+        }}
+      ],
+      "roadmap": {{
+        "short_term": ["string"],
+        "medium_term": ["string"],
+        "long_term": ["string"]
+      }}
+    }}
+    """, budget=0, compact=False))
+
+register(PromptTemplate("career_details", 2, CAREER_DETAILS_SYSTEM_PROMPT, """
+    Give a detailed breakdown of the career: {career_name}. Reply with only JSON:
+    {{"career":"{career_name}","required_skills":["string"],"free_courses":[{{"title":"string","platform":"string","url":"string"}}],"roadmap":{{"short_term":["string"],"medium_term":["string"],"long_term":["string"]}}}}
+    """, fields=("career_name",)))
+
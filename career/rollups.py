@@ -0,0 +1,256 @@
+import atexit
+import datetime
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, close_old_connections, transaction
+from django.db.models import F, Sum
+
+from .catalog import normalize_career_name
+from .models import CareerTitleRollup, SkillCourseRollup, TokenUsageRollup
+from .pricing import cost
+
+
+logger = logging.getLogger(__name__)
+
+# Analytics rollups: per-day counters of career titles (predicted and opened),
+# skills per UG course and token usage per endpoint and model. Saving a prediction
+# or suggestion adds its deltas to an in-process buffer once the transaction
+# commits; the buffer is written as one `UPDATE ... SET n = n + delta` per key
+# (INSERT on a miss) every ROLLUP_FLUSH_INTERVAL seconds, when it holds
+# ROLLUP_MAX_PENDING keys, and at exit. Hot keys ("data analyst" today) thus take
+# one row lock per flush instead of one per request. With an interval of 0 each
+# commit flushes its own deltas.
+#
+# Deltas still buffered when a worker is killed are lost; `manage.py
+# rebuild_rollups` recomputes past days from the history tables.
+
+# table -> (model, key fields)
+TABLES = {
+    "title": (CareerTitleRollup, ("day", "key")),
+    "skill": (SkillCourseRollup, ("day", "course", "skill")),
+    "usage": (TokenUsageRollup, ("day", "endpoint", "llm_model")),
+}
+
+_lock = threading.Lock()
+_pending = {}  # (table, key) -> [Counter of field deltas, defaults for an INSERT]
+_flusher = {"pid": None}
+
+
+def day_of(created_at):
+    return created_at.astimezone(datetime.timezone.utc).date()
+
+
+def _normalized(value):
+    return " ".join(str(value).split()).casefold()[:255]
+
+
+class Deltas:
+    """Counter increments per rollup row, merged by key."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def add(self, table, key, defaults=None, **counts):
+        entry = self.rows.get((table, key))
+        if entry is None:
+            entry = self.rows[(table, key)] = [Counter(), defaults or {}]
+        entry[0].update(counts)
+
+    def merge(self, other):
+        for (table, key), (counts, defaults) in other.rows.items():
+            self.add(table, key, defaults, **counts)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def _usage(deltas, day, endpoint, llm_model, prompt_tokens, completion_tokens, latency_ms):
+    counts = {"rows": 1}
+    if llm_model:
+        counts.update(
+            generations=1,
+            prompt_tokens=prompt_tokens or 0,
+            completion_tokens=completion_tokens or 0,
+            latency_ms=latency_ms or 0,
+        )
+    deltas.add("usage", (day, endpoint, llm_model or ""), **counts)
+
+
+def add_prediction(deltas, created_at, user_input, titles, llm_model, prompt_tokens, completion_tokens, latency_ms):
+    day = day_of(created_at)
+    for key, title in {normalize_career_name(title): title for title in titles or ()}.items():
+        deltas.add("title", (day, key), {"title": str(title)[:255]}, predictions=1)
+    if isinstance(user_input, dict):
+        course = _normalized(user_input.get("ug_course") or "")
+        skills = user_input.get("skills") or ()
+        if not isinstance(skills, (list, tuple)):
+            skills = [skills]
+        for skill in {_normalized(skill) for skill in skills if str(skill).strip()}:
+            deltas.add("skill", (day, course, skill), predictions=1)
+    _usage(deltas, day, "predict", llm_model, prompt_tokens, completion_tokens, latency_ms)
+
+
+def add_suggestion(deltas, created_at, career, llm_model, prompt_tokens, completion_tokens, latency_ms):
+    day = day_of(created_at)
+    deltas.add("title", (day, normalize_career_name(career)), {"title": str(career)[:255]}, suggestions=1)
+    _usage(deltas, day, "career", llm_model, prompt_tokens, completion_tokens, latency_ms)
+
+
+# --- recording ---
+def record_predictions(rows):
+    deltas = Deltas()
+    for row in rows:
+        add_prediction(
+            deltas, row.created_at, row.user_input, row.career_titles,
+            row.llm_model, row.prompt_tokens, row.completion_tokens, row.latency_ms,
+        )
+    _defer(deltas)
+
+
+def record_suggestion(row):
+    deltas = Deltas()
+    add_suggestion(deltas, row.created_at, row.career, row.llm_model, row.prompt_tokens, row.completion_tokens, row.latency_ms)
+    _defer(deltas)
+
+
+def _defer(deltas):
+    # Counted only once the row is committed
+    transaction.on_commit(lambda: _buffer(deltas))
+
+
+def _buffer(deltas):
+    interval = getattr(settings, "ROLLUP_FLUSH_INTERVAL", 10)
+    if interval <= 0:
+        write(deltas)
+        return
+    with _lock:
+        if _flusher["pid"] != os.getpid():
+            # A forked worker starts empty and flushes from its own thread
+            _pending.clear()
+            _flusher["pid"] = os.getpid()
+            _start_flusher(interval)
+        for (table, key), (counts, defaults) in deltas.rows.items():
+            entry = _pending.setdefault((table, key), [Counter(), defaults])
+            entry[0].update(counts)
+        due = len(_pending) >= getattr(settings, "ROLLUP_MAX_PENDING", 1000)
+    if due:
+        flush()
+
+
+def _start_flusher(interval):
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                flush()
+            except Exception:
+                logger.exception("Rollup flush failed")
+            finally:
+                close_old_connections()
+
+    threading.Thread(target=loop, name="rollup-flush", daemon=True).start()
+    atexit.register(flush)
+
+
+def flush():
+    """Write this process's buffered deltas; they are kept for the next flush if the write fails."""
+    with _lock:
+        if not _pending:
+            return
+        deltas = Deltas()
+        deltas.rows = dict(_pending)
+        _pending.clear()
+    try:
+        write(deltas)
+    except DatabaseError:
+        logger.exception("Rollup flush failed; keeping %d keys for the next one", len(deltas))
+        with _lock:
+            for (table, key), (counts, defaults) in deltas.rows.items():
+                _pending.setdefault((table, key), [Counter(), defaults])[0].update(counts)
+
+
+def write(deltas):
+    """Apply ``deltas`` in one transaction, keys in a fixed order so concurrent flushes never deadlock."""
+    with transaction.atomic():
+        for table, key in sorted(deltas.rows, key=lambda item: (item[0], tuple(map(str, item[1])))):
+            counts, defaults = deltas.rows[(table, key)]
+            model, fields = TABLES[table]
+            lookup = dict(zip(fields, key))
+            increments = {field: F(field) + value for field, value in counts.items() if value}
+            if not increments or model.objects.filter(**lookup).update(**increments):
+                continue
+            try:
+                with transaction.atomic():
+                    model.objects.create(**lookup, **defaults, **counts)
+            except IntegrityError:
+                # Inserted by another worker since our UPDATE
+                model.objects.filter(**lookup).update(**increments)
+
+
+def clear():
+    """Drop buffered deltas (tests)."""
+    with _lock:
+        _pending.clear()
+
+
+# --- reading ---
+def stats(since, limit=10):
+    """Dashboard numbers since the date ``since``, read from the rollup tables only."""
+    careers = (
+        CareerTitleRollup.objects.filter(day__gte=since)
+        .values("key")
+        .annotate(predictions=Sum("predictions"), suggestions=Sum("suggestions"))
+        .order_by("-predictions", "-suggestions", "key")[:limit]
+    )
+    titles = dict(
+        CareerTitleRollup.objects.filter(day__gte=since, key__in=[row["key"] for row in careers])
+        .order_by("day").values_list("key", "title")
+    )
+
+    skills = (
+        SkillCourseRollup.objects.filter(day__gte=since)
+        .values("course", "skill")
+        .annotate(predictions=Sum("predictions"))
+        .order_by("-predictions", "course", "skill")
+    )
+    courses, totals = {}, Counter()
+    for row in skills:
+        totals[row["course"]] += row["predictions"]
+        top = courses.setdefault(row["course"], [])
+        if len(top) < limit:
+            top.append({"skill": row["skill"], "predictions": row["predictions"]})
+
+    usage = []
+    groups = (
+        TokenUsageRollup.objects.filter(day__gte=since)
+        .values("endpoint", "llm_model")
+        .annotate(
+            rows=Sum("rows"), generations=Sum("generations"), prompt_tokens=Sum("prompt_tokens"),
+            completion_tokens=Sum("completion_tokens"), latency_ms=Sum("latency_ms"),
+        )
+        .order_by("endpoint", "llm_model")
+    )
+    for group in groups:
+        generations = group.pop("generations")
+        latency_ms = group.pop("latency_ms")
+        usd = cost(group["llm_model"], group["prompt_tokens"], group["completion_tokens"])
+        usage.append({
+            **group,
+            "generations": generations,
+            "avg_latency_ms": round(latency_ms / generations, 1) if generations else None,
+            "cost_usd": round(usd, 6) if usd is not None else None,
+        })
+
+    return {
+        "since": since.isoformat(),
+        "top_careers": [{"title": titles.get(row["key"], row["key"]), **row} for row in careers],
+        "top_skills_by_course": [
+            {"course": course, "skills": courses[course]} for course, _ in totals.most_common(limit)
+        ],
+        "token_usage": usage,
+    }
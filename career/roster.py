@@ -0,0 +1,263 @@
+import codecs
+import csv
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Lower
+
+from .models import UserImport
+
+
+# Bulk user import for institutional onboarding (POST /api/users/import/ and
+# `manage.py import_users`). A CSV or JSONL roster is streamed in chunks. Each chunk
+# checks username/email uniqueness with one IN query per field, hashes its passwords
+# in a process pool and is inserted with bulk_create in one transaction, together
+# with the UserImport progress row, so a resumed import skips exactly the committed lines.
+
+User = get_user_model()
+
+FIELDS = ("name", "username", "email", "password")
+
+
+# --- reading ---
+def _decoded(lines):
+    # Bytes lines (request bodies, uploads) become text; a UTF-8 BOM is dropped
+    first = True
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if first:
+            line = line.lstrip(codecs.BOM_UTF8.decode("utf-8"))
+            first = False
+        yield line
+
+
+def read_roster(lines, format):
+    """Yield ``(line_number, row)`` from CSV (with a header) or JSONL ``lines``."""
+    lines = _decoded(lines)
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        if reader.fieldnames:
+            reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+        for row in reader:
+            # Header is line 1; quoted fields may span lines, so use the reader's count
+            yield reader.line_num, {key: (value or "").strip() for key, value in row.items() if key}
+    elif format == "jsonl":
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, {"_error": f"Invalid JSON: {e}"}
+                continue
+            yield number, row if isinstance(row, dict) else {"_error": "Each line must be a JSON object."}
+    else:
+        raise ValueError(f"Unknown roster format: {format}")
+
+
+def guess_format(name):
+    return "jsonl" if str(name).lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+# --- validation ---
+def validate_row(row):
+    """``(fields, errors)``: the cleaned row and a field -> message dict (empty when valid)."""
+    if "_error" in row:
+        return None, {"row": row["_error"]}
+    fields = {field: str(row.get(field) or "").strip() for field in FIELDS}
+    errors = {}
+    if not fields["username"]:
+        errors["username"] = "This field is required."
+    else:
+        try:
+            User.username_validator(fields["username"])
+            if len(fields["username"]) > 150:
+                raise ValidationError("Ensure this field has no more than 150 characters.")
+        except ValidationError as e:
+            errors["username"] = " ".join(e.messages)
+    if not fields["email"]:
+        errors["email"] = "This field is required."
+    else:
+        try:
+            validate_email(fields["email"])
+        except ValidationError as e:
+            errors["email"] = " ".join(e.messages)
+    if len(fields["name"]) > 150:
+        errors["name"] = "Ensure this field has no more than 150 characters."
+    if fields["password"] and not errors:
+        try:
+            validate_password(
+                fields["password"],
+                user=User(username=fields["username"], email=fields["email"], first_name=fields["name"]),
+            )
+        except ValidationError as e:
+            errors["password"] = " ".join(e.messages)
+    return fields, errors
+
+
+# --- hashing ---
+def hash_pool(workers=None):
+    """A process pool for make_password, or ``None`` for inline hashing (``workers`` 0)."""
+    workers = getattr(settings, "USER_IMPORT_HASH_WORKERS", 0) if workers is None else workers
+    if workers == 0:
+        return None
+    # spawn: a fork of a threaded server process (metrics flusher, LLM pool) is not safe.
+    # The initializer must not live in this module: importing it needs the app registry.
+    return ProcessPoolExecutor(
+        max_workers=workers if workers > 0 else None,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    )
+
+
+def hash_passwords(passwords, pool):
+    # Rows without a password get an unusable one (Google sign-in only): nothing to hash
+    hashes = [make_password(None)] * len(passwords)
+    todo = [i for i, password in enumerate(passwords) if password]
+    if pool is None:
+        results = map(make_password, (passwords[i] for i in todo))
+    else:
+        results = pool.map(make_password, [passwords[i] for i in todo], chunksize=max(len(todo) // 32, 1))
+    for i, encoded in zip(todo, results):
+        hashes[i] = encoded
+    return hashes
+
+
+# --- import ---
+def _result(line, fields, status, **extra):
+    result = {"line": line, "status": status}
+    if fields:
+        result["username"] = fields["username"]
+    result.update(extra)
+    return result
+
+
+def _insert(users):
+    """bulk_create ``users``; if a concurrent signup took a username, find it row by row."""
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users)
+        return {}
+    except IntegrityError:
+        failed = {}
+        for user in users:
+            try:
+                with transaction.atomic():
+                    user.save()
+            except IntegrityError:
+                failed[user.username] = "Username already exists"
+        return failed
+
+
+def import_chunk(user_import, chunk, seen, pool):
+    """Validate, hash and insert one chunk of ``(line, row)``; returns its per-row results."""
+    results, pending = [], []
+    for line, row in chunk:
+        fields, errors = validate_row(row)
+        if not errors:
+            username_key, email_key = fields["username"], fields["email"].lower()
+            if username_key in seen["username"]:
+                errors["username"] = f"Duplicate of line {seen['username'][username_key]}."
+            elif email_key in seen["email"]:
+                errors["email"] = f"Duplicate of line {seen['email'][email_key]}."
+            else:
+                seen["username"][username_key] = line
+                seen["email"][email_key] = line
+        if errors:
+            results.append(_result(line, fields, "error", errors=errors))
+        else:
+            pending.append((line, fields))
+
+    # One IN query per field for the whole chunk
+    taken_usernames = set(
+        User.objects.filter(username__in=[fields["username"] for _, fields in pending])
+        .values_list("username", flat=True)
+    )
+    # Emails compare case-insensitively, like the in-chunk duplicate check
+    taken_emails = {
+        email.lower() for email in
+        User.objects.alias(email_lower=Lower("email"))
+        .filter(email_lower__in=[fields["email"].lower() for _, fields in pending])
+        .values_list("email", flat=True)
+    }
+    ready = []
+    for line, fields in pending:
+        if fields["username"] in taken_usernames:
+            results.append(_result(line, fields, "error", errors={"username": "Username already exists"}))
+        elif fields["email"].lower() in taken_emails:
+            results.append(_result(line, fields, "error", errors={"email": "Email already attached to another account."}))
+        else:
+            ready.append((line, fields))
+
+    hashes = hash_passwords([fields["password"] for _, fields in ready], pool)
+    users = [
+        User(username=fields["username"], email=fields["email"], first_name=fields["name"], password=encoded)
+        for (_, fields), encoded in zip(ready, hashes)
+    ]
+    with transaction.atomic():
+        failed = _insert(users) if users else {}
+        for (line, fields), user in zip(ready, users):
+            if fields["username"] in failed:
+                results.append(_result(line, fields, "error", errors={"username": failed[fields["username"]]}))
+            else:
+                results.append(_result(line, fields, "created", id=user.pk))
+        created = sum(1 for result in results if result["status"] == "created")
+        UserImport.objects.filter(pk=user_import.pk).update(
+            lines_done=max(line for line, _ in chunk),
+            created=F("created") + created,
+            failed=F("failed") + len(results) - created,
+        )
+    results.sort(key=lambda result: result["line"])
+    return results
+
+
+def import_roster(user_import, rows, chunk_size=None, workers=None):
+    """
+    Import ``(line, row)`` pairs into ``user_import``, skipping lines it already
+    committed. Yields one result per row (``created`` or ``error`` with a
+    field -> message dict) as each chunk commits, then ``{"summary": ...}``.
+    """
+    chunk_size = max(chunk_size or getattr(settings, "USER_IMPORT_CHUNK", 500), 1)
+    started = time.monotonic()
+    resume_after = user_import.lines_done
+    seen = {"username": {}, "email": {}}
+    counts = {"import": str(user_import.pk), "resumed_after_line": resume_after, "rows": 0, "created": 0, "error": 0}
+
+    pool = hash_pool(workers)
+    try:
+        chunk = []
+        for line, row in rows:
+            if line <= resume_after:
+                continue
+            chunk.append((line, row))
+            if len(chunk) >= chunk_size:
+                yield from _counted(import_chunk(user_import, chunk, seen, pool), counts)
+                chunk = []
+        if chunk:
+            yield from _counted(import_chunk(user_import, chunk, seen, pool), counts)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    UserImport.objects.filter(pk=user_import.pk).update(status=UserImport.COMPLETED)
+    counts["elapsed"] = round(time.monotonic() - started, 3)
+    yield {"summary": counts}
+
+
+def _counted(results, counts):
+    for result in results:
+        counts["rows"] += 1
+        counts[result["status"]] += 1
+        yield result
@@ -14,9 +14,14 @@ class CareerInputSerializer(serializers.Serializer):
     # add any other fields you want
 
 class CareerPredictionSerializer(serializers.ModelSerializer):
+    # Decoded from the payload store only here, when the row is rendered
+    user_input = serializers.JSONField(read_only=True)
+    prediction = serializers.JSONField(read_only=True)
+
     class Meta:
         model = CareerPrediction
-        fields = "__all__"
+        # The baseline response plus career_titles (the "summary" projection, also over archived rows)
+        fields = ["id", "user_input", "prediction", "created_at", "user", "career_titles"]
 
 from rest_framework import serializers
 from django.contrib.auth.models import User
@@ -62,6 +67,8 @@ class UserSerializer(serializers.ModelSerializer):
         return user
     
 class CareerSuggestionSerializer(serializers.ModelSerializer):
+    suggestion = serializers.JSONField(source="payload", read_only=True)
+
     class Meta:
         model = CareerSuggestion
         fields = ["id", "career", "suggestion", "created_at"]
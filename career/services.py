@@ -0,0 +1,461 @@
+import json
+import time
+from contextlib import aclosing, closing
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import catalog, llm, metrics, similarity
+from .cache import prediction_cache, profile_key
+from .llm import LLMUnavailable
+from .models import CareerCatalogEntry, CareerPrediction, CareerSuggestion
+from .parsing import can_repair, parse_career_details, parse_prediction, repair_messages
+from .prompts import get_prompt
+from .serializers import CareerInputSerializer
+from .singleflight import GenerationError, singleflight
+from .streaming import JSONEventScanner, delta_text, prediction_event_path
+
+
+# Generation services shared by the API views and the background job worker.
+# Each async function (a-prefixed) is the counterpart of the sync one above it,
+# step for step, so both view modes resolve a request the same way.
+
+
+class Usage:
+    """Prompt version, model, tokens and latency of one generation, repair retry included."""
+
+    def __init__(self, prompt_version=""):
+        self.prompt_version = prompt_version
+        self.model = ""
+        self.prompt_tokens = None
+        self.completion_tokens = None
+        self.latency_ms = None
+        self.reused_from = None
+        self.similarity = None
+        self.started = time.monotonic()
+
+    def add(self, response):
+        # Takes a completion or the final chunk of a stream_options.include_usage stream
+        self.model = getattr(response, "model", None) or self.model
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            self.prompt_tokens = (self.prompt_tokens or 0) + (getattr(usage, "prompt_tokens", 0) or 0)
+            self.completion_tokens = (self.completion_tokens or 0) + (getattr(usage, "completion_tokens", 0) or 0)
+
+    def finish(self):
+        self.latency_ms = int((time.monotonic() - self.started) * 1000)
+        return self
+
+    def reuse(self, prediction_id, similarity):
+        self.reused_from = prediction_id
+        self.similarity = similarity
+
+    def fields(self):
+        """Model field values for the row saved from this generation ({} if nothing ran)."""
+        if self.reused_from is not None:
+            return {"reused_from_id": self.reused_from, "similarity": round(self.similarity, 4)}
+        if not self.model and self.prompt_tokens is None:
+            return {}
+        return {
+            "prompt_version": self.prompt_version,
+            "llm_model": self.model,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_ms": self.latency_ms,
+        }
+
+
+def complete_json(messages, parse, usage=None):
+    """
+    Run a chat completion and validate it with ``parse``. Malformed or
+    truncated output gets one repair retry if it fits LLM_REPAIR_TOKEN_BUDGET.
+    Returns the validated payload or ``None``; ``usage`` collects the cost.
+    """
+    usage = usage or Usage()
+    response = llm.gateway.chat(messages)
+    usage.add(response)
+    raw_content = response.choices[0].message.content
+    with metrics.phase("parse"):
+        result = parse(raw_content)
+    if not result and can_repair(response, settings.LLM_REPAIR_TOKEN_BUDGET):
+        response = llm.gateway.chat(repair_messages(messages, raw_content, result.error))
+        usage.add(response)
+        with metrics.phase("parse"):
+            result = parse(response.choices[0].message.content)
+    usage.finish()
+    return result.payload
+
+
+async def acomplete_json(messages, parse, usage=None):
+    """Async counterpart of ``complete_json`` on the pooled AsyncOpenAI client."""
+    usage = usage or Usage()
+    response = await llm.gateway.achat(messages)
+    usage.add(response)
+    raw_content = response.choices[0].message.content
+    with metrics.phase("parse"):
+        result = parse(raw_content)
+    if not result and can_repair(response, settings.LLM_REPAIR_TOKEN_BUDGET):
+        response = await llm.gateway.achat(repair_messages(messages, raw_content, result.error))
+        usage.add(response)
+        with metrics.phase("parse"):
+            result = parse(response.choices[0].message.content)
+    usage.finish()
+    return result.payload
+
+
+def generate_prediction(user_data, usage=None):
+    prompt = get_prompt("prediction")
+    if usage is not None:
+        usage.prompt_version = prompt.id
+    return complete_json(prompt.messages(user_data), parse_prediction, usage)
+
+
+def generate_career_details(career_name, usage=None):
+    prompt = get_prompt("career_details")
+    if usage is not None:
+        usage.prompt_version = prompt.id
+    return complete_json(prompt.messages({"career_name": career_name}), parse_career_details, usage)
+
+
+async def agenerate_prediction(user_data, usage=None):
+    prompt = get_prompt("prediction")
+    if usage is not None:
+        usage.prompt_version = prompt.id
+    return await acomplete_json(prompt.messages(user_data), parse_prediction, usage)
+
+
+async def agenerate_career_details(career_name, usage=None):
+    prompt = get_prompt("career_details")
+    if usage is not None:
+        usage.prompt_version = prompt.id
+    return await acomplete_json(prompt.messages({"career_name": career_name}), parse_career_details, usage)
+
+
+# --- Career prediction ---
+def validate_profile(user_data):
+    input_serializer = CareerInputSerializer(data=user_data)
+    input_serializer.is_valid(raise_exception=True)
+    return input_serializer.validated_data
+
+
+def reuse_similar(user_data, usage=None):
+    """
+    The prediction of the most similar indexed profile at or above
+    SIMILARITY_REUSE_THRESHOLD, or ``None`` (also when reuse is disabled).
+    """
+    if not similarity.enabled():
+        return None
+    with metrics.phase("similar"):
+        for prediction_id, score in similarity.nearest(user_data):
+            neighbour = CareerPrediction.objects.filter(pk=prediction_id).select_related("prediction_blob").first()
+            payload = neighbour.prediction if neighbour is not None else None
+            if payload is not None:
+                if usage is not None:
+                    usage.reuse(prediction_id, score)
+                metrics.record_cache("similar", "hit")
+                return payload
+    metrics.record_cache("similar", "miss")
+    return None
+
+
+def resolve_prediction(user_data, cache_key, usage=None):
+    """
+    Return ``(payload, cache_tier)`` for a validated profile: from the
+    profile cache, from a similar profile's prediction (tier ``"similar"``),
+    from one coalesced LLM call, or, while the LLM is unavailable, from an
+    expired cache entry (tier ``"stale"``). ``usage`` is filled only if this
+    caller ran the LLM call itself or reused a similar prediction.
+    """
+    parsed_json, cache_tier = prediction_cache.get(cache_key)
+    if parsed_json is not None:
+        return parsed_json, cache_tier
+
+    parsed_json = reuse_similar(user_data, usage)
+    if parsed_json is not None:
+        return parsed_json, "similar"
+
+    def produce():
+        generated = generate_prediction(user_data, usage)
+        if not generated:
+            raise GenerationError("Failed to parse JSON from OpenAI response.")
+        prediction_cache.set(cache_key, generated)
+        return generated
+
+    # Identical profiles submitted at the same time share one LLM call
+    try:
+        return singleflight.do(f"predict:{cache_key}", produce), None
+    except LLMUnavailable:
+        parsed_json = prediction_cache.get_stale(cache_key)
+        if parsed_json is None:
+            raise
+        return parsed_json, "stale"
+
+
+async def aresolve_prediction(user_data, cache_key, usage=None):
+    """Async counterpart of ``resolve_prediction``."""
+    parsed_json, cache_tier = await prediction_cache.aget(cache_key)
+    if parsed_json is not None:
+        return parsed_json, cache_tier
+
+    parsed_json = await sync_to_async(reuse_similar)(user_data, usage)
+    if parsed_json is not None:
+        return parsed_json, "similar"
+
+    async def produce():
+        generated = await agenerate_prediction(user_data, usage)
+        if not generated:
+            raise GenerationError("Failed to parse JSON from OpenAI response.")
+        await prediction_cache.aset(cache_key, generated)
+        return generated
+
+    try:
+        return await singleflight.ado(f"predict:{cache_key}", produce), None
+    except LLMUnavailable:
+        parsed_json = await prediction_cache.aget_stale(cache_key)
+        if parsed_json is None:
+            raise
+        return parsed_json, "stale"
+
+
+def predict(user, user_data, validated_data=None):
+    """
+    Serve the prediction for ``user_data`` from the profile cache or generate
+    it, then save it for ``user``. Returns ``(prediction, cache_tier)`` where
+    ``cache_tier`` is ``None`` for a fresh generation, ``"similar"`` for a
+    reused neighbour's prediction and ``"stale"`` for an expired entry served
+    while the LLM is unavailable.
+    """
+    if validated_data is None:
+        validated_data = validate_profile(user_data)
+
+    usage = Usage()
+    parsed_json, cache_tier = resolve_prediction(user_data, profile_key(validated_data), usage)
+
+    with metrics.phase("save"):
+        prediction = CareerPrediction.objects.create(
+            user=user,
+            user_input=user_data,
+            prediction=parsed_json,
+            **usage.fields()
+        )
+    return prediction, cache_tier
+
+
+async def apredict(user, user_data, validated_data=None):
+    """Async counterpart of ``predict``."""
+    if validated_data is None:
+        validated_data = validate_profile(user_data)
+
+    usage = Usage()
+    parsed_json, cache_tier = await aresolve_prediction(user_data, profile_key(validated_data), usage)
+
+    with metrics.phase("save"):
+        prediction = await CareerPrediction.objects.acreate(
+            user=user,
+            user_input=user_data,
+            prediction=parsed_json,
+            **usage.fields()
+        )
+    return prediction, cache_tier
+
+
+class PredictionStream:
+    """
+    ``resolve_prediction`` for ?stream=1. Iterate ``events()`` (or
+    ``aevents()``) for ``to_event(path, value)`` per career path, then read
+    ``payload``, ``cache_tier`` and ``usage``. Only the single-flight leader
+    streams from the LLM, with the same repair retry as ``complete_json``;
+    cached, similar, coalesced and stale payloads are replayed whole.
+    """
+
+    def __init__(self, user_data, cache_key, to_event, cached=None, cache_tier=None):
+        self.user_data = user_data
+        self.cache_key = cache_key
+        self.to_event = to_event
+        self.payload = cached
+        self.cache_tier = cache_tier
+        self.usage = Usage()
+        self.sent = set()  # paths already streamed
+
+    def _start(self):
+        prompt = get_prompt("prediction")
+        self.usage.prompt_version = prompt.id
+        return prompt.messages(self.user_data), JSONEventScanner(prediction_event_path)
+
+    def _feed(self, scanner, chunk):
+        self.usage.add(chunk)
+        events = []
+        for path, value in scanner.feed(delta_text(chunk)):
+            self.sent.add(path)
+            events.append(self.to_event(path, value))
+        return events
+
+    def _parse(self, messages, scanner, last_chunk):
+        """``(payload, None)``, or ``(None, repair messages)`` when a repair retry fits the budget."""
+        with metrics.phase("parse"):
+            result = parse_prediction(scanner.text)
+        if not result and can_repair(last_chunk, settings.LLM_REPAIR_TOKEN_BUDGET):
+            return None, repair_messages(messages, scanner.text, result.error)
+        return result.payload, None
+
+    def _parse_repair(self, response):
+        self.usage.add(response)
+        with metrics.phase("parse"):
+            return parse_prediction(response.choices[0].message.content).payload
+
+    def _store(self, payload):
+        self.usage.finish()
+        if not payload:
+            raise GenerationError("Failed to parse JSON from OpenAI response.")
+        prediction_cache.set(self.cache_key, payload)
+        return payload
+
+    def _rest(self):
+        # Everything for a replayed payload; after a repair, the paths the stream did not send
+        scanner = JSONEventScanner(prediction_event_path)
+        return [self.to_event(path, value) for path, value in scanner.feed(json.dumps(self.payload)) if path not in self.sent]
+
+    def events(self):
+        if self.payload is None:
+            self.payload = reuse_similar(self.user_data, self.usage)
+            self.cache_tier = "similar" if self.payload is not None else None
+        if self.payload is None:
+            try:
+                with singleflight.flight(f"predict:{self.cache_key}") as flight:
+                    if flight.leader:
+                        messages, scanner = self._start()
+                        chunk = None
+                        with closing(llm.gateway.chat(messages, stream=True)) as chunks:
+                            for chunk in chunks:
+                                yield from self._feed(scanner, chunk)
+                        payload, repair = self._parse(messages, scanner, chunk)
+                        if repair is not None:
+                            payload = self._parse_repair(llm.gateway.chat(repair))
+                        flight.result = self._store(payload)
+                self.payload = flight.result
+            except LLMUnavailable:
+                self.payload = prediction_cache.get_stale(self.cache_key)
+                if self.payload is None or self.sent:
+                    raise
+                self.cache_tier = "stale"
+        yield from self._rest()
+
+    async def aevents(self):
+        if self.payload is None:
+            self.payload = await sync_to_async(reuse_similar)(self.user_data, self.usage)
+            self.cache_tier = "similar" if self.payload is not None else None
+        if self.payload is None:
+            try:
+                async with singleflight.aflight(f"predict:{self.cache_key}") as flight:
+                    if flight.leader:
+                        messages, scanner = self._start()
+                        chunk = None
+                        async with aclosing(await llm.gateway.achat(messages, stream=True)) as chunks:
+                            async for chunk in chunks:
+                                for event in self._feed(scanner, chunk):
+                                    yield event
+                        payload, repair = self._parse(messages, scanner, chunk)
+                        if repair is not None:
+                            payload = self._parse_repair(await llm.gateway.achat(repair))
+                        flight.result = await sync_to_async(self._store)(payload)
+                self.payload = flight.result
+            except LLMUnavailable:
+                self.payload = await prediction_cache.aget_stale(self.cache_key)
+                if self.payload is None or self.sent:
+                    raise
+                self.cache_tier = "stale"
+        for event in self._rest():
+            yield event
+
+
+def prediction_body(prediction):
+    body = {
+        "id": prediction.id,
+        "career_paths": prediction.prediction["career_paths"],
+        "created_at": prediction.created_at
+    }
+    if prediction.reused_from_id is not None:
+        body["reused_from"] = {"id": prediction.reused_from_id, "similarity": prediction.similarity}
+    return body
+
+
+# --- Career details ---
+def career_details(user, career_name):
+    """
+    Serve ``career_name`` from the shared catalog or generate it, then save a
+    CareerSuggestion for ``user``. Returns ``(suggestion, cache_tier)`` where
+    ``cache_tier`` is ``"catalog"``, ``"stale"`` or ``None`` for a fresh generation.
+    """
+    # Shared catalog first; the LLM only runs on a miss or an expired entry
+    entry = catalog.lookup(career_name)
+    cache_tier = "catalog" if entry is not None else None
+    usage = Usage()
+    if entry is None:
+        def produce():
+            parsed_json = generate_career_details(career_name, usage)
+            if not parsed_json:
+                raise GenerationError("Failed to parse JSON from OpenAI response.")
+            return catalog.store(career_name, parsed_json).pk
+
+        try:
+            catalog_id = singleflight.do(f"career:{catalog.normalize_career_name(career_name)}", produce)
+            # Joined a prefetch still in flight: that counts as its hit
+            entry = catalog.served(CareerCatalogEntry.objects.get(pk=catalog_id))
+        except LLMUnavailable:
+            entry = catalog.lookup_stale(career_name)
+            if entry is None:
+                raise
+            cache_tier = "stale"
+
+    # Save in DB
+    with metrics.phase("save"):
+        suggestion = CareerSuggestion.objects.create(
+            user=user,
+            career=career_name,
+            catalog=entry,
+            **usage.fields()
+        )
+    return suggestion, cache_tier
+
+
+async def acareer_details(user, career_name):
+    """Async counterpart of ``career_details``."""
+    entry = await catalog.alookup(career_name)
+    cache_tier = "catalog" if entry is not None else None
+    usage = Usage()
+    if entry is None:
+        async def produce():
+            parsed_json = await agenerate_career_details(career_name, usage)
+            if not parsed_json:
+                raise GenerationError("Failed to parse JSON from OpenAI response.")
+            return (await catalog.astore(career_name, parsed_json)).pk
+
+        try:
+            catalog_id = await singleflight.ado(f"career:{catalog.normalize_career_name(career_name)}", produce)
+            entry = await catalog.aserved(await CareerCatalogEntry.objects.aget(pk=catalog_id))
+        except LLMUnavailable:
+            entry = await catalog.alookup_stale(career_name)
+            if entry is None:
+                raise
+            cache_tier = "stale"
+
+    with metrics.phase("save"):
+        suggestion = await CareerSuggestion.objects.acreate(
+            user=user,
+            career=career_name,
+            catalog=entry,
+            **usage.fields()
+        )
+    return suggestion, cache_tier
+
+
+def career_details_body(suggestion):
+    parsed_json = suggestion.payload
+    return {
+        "id": suggestion.id,
+        "career": parsed_json["career"],
+        "required_skills": parsed_json["required_skills"],
+        "free_courses": parsed_json["free_courses"],
+        "roadmap": parsed_json["roadmap"],
+        "created_at": suggestion.created_at
+    }
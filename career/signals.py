@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_user
+from .models import CareerPrediction, CareerSuggestion
+
+
+@receiver(post_save, sender=CareerPrediction)
+def index_generated_prediction(sender, instance, created, **kwargs):
+    # Only LLM-generated rows: cached copies and reused predictions would duplicate a neighbour
+    if not created or not instance.llm_model:
+        return
+    from . import similarity
+
+    if similarity.enabled():
+        rows = [(instance.pk, instance.user_input)]
+        transaction.on_commit(lambda: similarity.get_index().add(rows))
+
+
+@receiver(post_save, sender=CareerPrediction)
+def prefetch_career_details(sender, instance, created, **kwargs):
+    # The paths the user is about to open (cohort rows are bulk-created and send no signal)
+    from . import prefetch
+
+    if created and prefetch.enabled() and instance.career_titles:
+        titles = list(instance.career_titles)
+        transaction.on_commit(lambda: prefetch.schedule(titles))
+
+
+@receiver(post_save, sender=CareerPrediction)
+def roll_up_prediction(sender, instance, created, **kwargs):
+    if created:
+        from . import rollups
+
+        rollups.record_predictions([instance])
+
+
+@receiver(post_save, sender=CareerSuggestion)
+def roll_up_suggestion(sender, instance, created, **kwargs):
+    if created:
+        from . import rollups
+
+        rollups.record_suggestion(instance)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def drop_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
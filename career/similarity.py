@@ -0,0 +1,213 @@
+import fcntl
+import hashlib
+import math
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+
+# "Similar profile" index: every generated prediction's profile is hashed into a
+# fixed-size unit vector (course, specialization, skills, interests, certifications,
+# plus coarse CGPA/experience buckets) and appended to a memory-mapped matrix under
+# SIMILARITY_INDEX_DIR. A cosine top-k query is one matrix-vector product, so a
+# profile that differs from an earlier one by a minor skill or a 0.1 CGPA can reuse
+# that prediction instead of calling the LLM (see services.reuse_similar).
+#
+# Gunicorn workers share the files: appends take an flock, and the row count lives
+# in a memory-mapped header that is written last, so readers never see half rows.
+
+# Field weights: each field contributes a block of roughly this norm to the vector
+FIELD_WEIGHTS = {
+    "ug_course": 2.0,
+    "ug_specialization": 1.5,
+    "skills": 1.5,
+    "interests": 1.0,
+    "certifications": 0.5,
+    "ug_cgpa": 0.5,
+    "experience_years": 0.5,
+}
+
+LIST_FIELDS = ("skills", "interests", "certifications")
+
+INITIAL_CAPACITY = 1024
+
+# Header slots
+COUNT, CAPACITY, DIM, LAST_ID = range(4)
+
+
+# Helper: field tokens of a raw user_input dict, normalized like the profile cache key
+def _tokens(field, value):
+    if value is None or value == "" or value == []:
+        return []
+    if field in LIST_FIELDS:
+        if not isinstance(value, (list, tuple)):
+            value = [value]
+        return sorted({" ".join(str(item).split()).lower() for item in value if str(item).strip()})
+    if field == "ug_cgpa":
+        try:
+            return [str(math.floor(float(value)))]
+        except (TypeError, ValueError):
+            return []
+    if field == "experience_years":
+        try:
+            return [str(min(int(value), 10))]
+        except (TypeError, ValueError):
+            return []
+    return [" ".join(str(value).split()).lower()]
+
+
+def _slot(field, token, dim):
+    # Stable across processes (unlike hash()): the index outlives the worker that wrote it
+    digest = int.from_bytes(hashlib.blake2b(f"{field}:{token}".encode(), digest_size=8).digest(), "little")
+    return digest % dim, (1.0 if digest >> 63 else -1.0)
+
+
+def vectorize(user_input, dim=None):
+    """Signed feature-hashing of a profile into a float32 unit vector (all zeros if empty)."""
+    dim = dim or getattr(settings, "SIMILARITY_DIM", 256)
+    vector = np.zeros(dim, dtype=np.float32)
+    if not isinstance(user_input, dict):
+        return vector
+    for field, weight in FIELD_WEIGHTS.items():
+        tokens = _tokens(field, user_input.get(field))
+        if not tokens:
+            continue
+        token_weight = weight / math.sqrt(len(tokens))
+        for token in tokens:
+            slot, sign = _slot(field, token, dim)
+            vector[slot] += sign * token_weight
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+class ProfileIndex:
+    """Append-only, memory-mapped matrix of profile vectors and their CareerPrediction ids."""
+
+    def __init__(self, directory, dim=256):
+        self.directory = Path(directory)
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._header = None
+        self._vectors = None
+        self._ids = None
+        self._mapped = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self._file_lock():
+            header_path = self.directory / "header.i64"
+            if header_path.exists():
+                header = np.memmap(header_path, dtype=np.int64, mode="r+", shape=(4,))
+                if int(header[DIM]) != dim:
+                    del header
+                    self._create()
+            else:
+                self._create()
+            self._header = np.memmap(header_path, dtype=np.int64, mode="r+", shape=(4,))
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self.directory / "lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _create(self):
+        # Called under the file lock; a dimension change starts an empty index
+        for name, width, dtype in (("vectors.f32", self.dim, np.float32), ("ids.i64", 1, np.int64)):
+            with open(self.directory / name, "wb") as f:
+                f.truncate(INITIAL_CAPACITY * width * np.dtype(dtype).itemsize)
+        header = np.memmap(self.directory / "header.i64", dtype=np.int64, mode="w+", shape=(4,))
+        header[:] = (0, INITIAL_CAPACITY, self.dim, 0)
+        header.flush()
+
+    def _remap(self):
+        capacity = int(self._header[CAPACITY])
+        self._vectors = np.memmap(self.directory / "vectors.f32", dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._ids = np.memmap(self.directory / "ids.i64", dtype=np.int64, mode="r+", shape=(capacity,))
+        self._mapped = capacity
+
+    def __len__(self):
+        return int(self._header[COUNT])
+
+    @property
+    def last_id(self):
+        return int(self._header[LAST_ID])
+
+    def add(self, rows):
+        """Append ``(prediction_id, user_input)`` rows; returns how many were added."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        vectors = np.stack([vectorize(user_input, self.dim) for _, user_input in rows])
+        ids = np.fromiter((prediction_id for prediction_id, _ in rows), dtype=np.int64, count=len(rows))
+        with self._lock, self._file_lock():
+            count, capacity = int(self._header[COUNT]), int(self._header[CAPACITY])
+            needed = count + len(rows)
+            if needed > capacity:
+                capacity = max(capacity * 2, needed)
+                # Growing the files leaves other processes' (smaller) mappings valid
+                os.truncate(self.directory / "vectors.f32", capacity * self.dim * 4)
+                os.truncate(self.directory / "ids.i64", capacity * 8)
+                self._header[CAPACITY] = capacity
+            if self._mapped != capacity:
+                self._remap()
+            self._vectors[count:needed] = vectors
+            self._ids[count:needed] = ids
+            self._header[LAST_ID] = max(self.last_id, int(ids.max()))
+            self._header[COUNT] = needed  # last: readers only see complete rows
+        return len(rows)
+
+    def query(self, user_input, k=5):
+        """``[(prediction_id, cosine)]`` of the ``k`` nearest profiles, best first."""
+        count = len(self)
+        if not count:
+            return []
+        if count > self._mapped:
+            with self._lock:
+                self._remap()
+        vector = vectorize(user_input, self.dim)
+        scores = self._vectors[:count] @ vector
+        k = min(k, count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self._ids[i]), float(scores[i])) for i in top]
+
+    def reset(self):
+        with self._lock, self._file_lock():
+            self._create()
+            self._header = np.memmap(self.directory / "header.i64", dtype=np.int64, mode="r+", shape=(4,))
+            self._mapped = 0
+
+
+def enabled():
+    return getattr(settings, "SIMILARITY_REUSE_THRESHOLD", 0) > 0
+
+
+_index = {"pid": None, "index": None}
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """This process's handle on the shared index (re-opened after a fork)."""
+    with _index_lock:
+        if _index["pid"] != os.getpid():
+            _index["index"] = ProfileIndex(
+                getattr(settings, "SIMILARITY_INDEX_DIR", "/tmp/elevare-profile-index"),
+                getattr(settings, "SIMILARITY_DIM", 256),
+            )
+            _index["pid"] = os.getpid()
+        return _index["index"]
+
+
+def nearest(user_input, threshold=None, k=None):
+    """Indexed predictions at least ``threshold`` (SIMILARITY_REUSE_THRESHOLD) similar, best first."""
+    threshold = threshold if threshold is not None else settings.SIMILARITY_REUSE_THRESHOLD
+    k = k or getattr(settings, "SIMILARITY_TOP_K", 5)
+    return [(pk, score) for pk, score in get_index().query(user_input, k) if score >= threshold]
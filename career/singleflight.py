@@ -0,0 +1,363 @@
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.http import HttpResponse, JsonResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import GenerationLease
+
+
+class GenerationError(Exception):
+    """Raised inside a single-flight call when the LLM output is unusable."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Flight:
+    def __init__(self):
+        self.leader = False
+        self.result = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key so only one of them runs.
+
+    Within a process, followers block on the leader thread's event (or await
+    the leader coroutine's future under ASGI). Across gunicorn workers the
+    leader holds a ``GenerationLease`` row and stores the result on it;
+    followers poll the row and take the lease over if the leader dies (the
+    lease expires without a result).
+    """
+
+    def __init__(self, distributed=True):
+        self.distributed = distributed
+        self._calls = {}
+        self._async_calls = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def owner(self):
+        return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+    def do(self, key, fn, result_ttl=None, replay=False):
+        """
+        Run ``fn`` once for all concurrent callers of ``key`` and return its
+        JSON-serializable result. With ``replay`` a result finished before
+        this call started is reused as well (used for idempotency keys).
+        """
+        with self.flight(key, result_ttl, replay) as flight:
+            if flight.leader:
+                flight.result = fn()
+        return flight.result
+
+    async def ado(self, key, fn, result_ttl=None, replay=False):
+        """Async counterpart of ``do``; ``fn`` is a coroutine function."""
+        async with self.aflight(key, result_ttl, replay) as flight:
+            if flight.leader:
+                flight.result = await fn()
+        return flight.result
+
+    @contextmanager
+    def flight(self, key, result_ttl=None, replay=False):
+        """
+        ``do`` for callers that produce the result in their own body, such as a
+        streaming response's generator. When ``flight.leader`` the body sets
+        ``flight.result``; otherwise it already holds the leader's result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        flight = _Flight()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            flight.result = call.result
+            yield flight
+            return
+
+        lease = None
+        try:
+            found = False
+            if self.distributed:
+                found, lease = self._lead(key, result_ttl, replay)
+                if found:
+                    flight.result, lease = lease.result, None
+            flight.leader = not found
+            yield flight
+            if lease is not None:
+                self._finish(lease, flight.result, self._lease_settings(result_ttl)[3])
+            call.result = flight.result
+        except BaseException as e:
+            if lease is not None:
+                self._release(lease)
+            call.error = e if isinstance(e, Exception) else GenerationError("The request generating this result stopped.")
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    @asynccontextmanager
+    async def aflight(self, key, result_ttl=None, replay=False):
+        """Async counterpart of ``flight``."""
+        loop = asyncio.get_running_loop()
+        calls = self._async_calls.setdefault(loop, {})
+        flight = _Flight()
+        future = calls.get(key)
+        if future is not None:
+            flight.result = await asyncio.shield(future)
+            yield flight
+            return
+
+        future = calls[key] = loop.create_future()
+        lease = None
+        try:
+            found = False
+            if self.distributed:
+                found, lease = await self._alead(key, result_ttl, replay)
+                if found:
+                    flight.result, lease = lease.result, None
+            flight.leader = not found
+            yield flight
+            if lease is not None:
+                await sync_to_async(self._finish)(lease, flight.result, self._lease_settings(result_ttl)[3])
+            future.set_result(flight.result)
+        except BaseException as e:
+            if lease is not None:
+                await sync_to_async(self._release)(lease)
+            future.set_exception(e if isinstance(e, Exception) else GenerationError("The request generating this result stopped."))
+            future.exception()  # retrieved, even when nobody else was waiting
+            raise
+        finally:
+            calls.pop(key, None)
+
+    # --- cross-process lease ---
+    def _lease_settings(self, result_ttl):
+        if result_ttl is None:
+            result_ttl = getattr(settings, "SINGLEFLIGHT_RESULT_TTL", 60)
+        return (
+            getattr(settings, "SINGLEFLIGHT_LEASE_TTL", 60),
+            getattr(settings, "SINGLEFLIGHT_WAIT_TIMEOUT", 90),
+            getattr(settings, "SINGLEFLIGHT_POLL_INTERVAL", 0.25),
+            result_ttl,
+        )
+
+    def _lead(self, key, result_ttl, replay):
+        """
+        Wait for the lease of ``key``: ``(True, lease)`` carries a usable stored
+        result, ``(False, lease)`` makes this caller the leader and ``(False,
+        None)`` means the leader is alive but too slow to wait for, so this
+        caller generates without the lease.
+        """
+        lease_ttl, wait_timeout, poll_interval, _ = self._lease_settings(result_ttl)
+        started = None if replay else timezone.now()
+        deadline = time.monotonic() + wait_timeout
+        while True:
+            found, lease = self._acquire(key, lease_ttl, started)
+            if found or lease is not None:
+                return found, lease
+            if time.monotonic() >= deadline:
+                return False, None
+            time.sleep(poll_interval)
+
+    async def _alead(self, key, result_ttl, replay):
+        lease_ttl, wait_timeout, poll_interval, _ = self._lease_settings(result_ttl)
+        started = None if replay else timezone.now()
+        deadline = time.monotonic() + wait_timeout
+        while True:
+            found, lease = await sync_to_async(self._acquire)(key, lease_ttl, started)
+            if found or lease is not None:
+                return found, lease
+            if time.monotonic() >= deadline:
+                return False, None
+            await asyncio.sleep(poll_interval)
+
+    def _finish(self, lease, result, result_ttl):
+        now = timezone.now()
+        GenerationLease.objects.filter(pk=lease.pk, owner=lease.owner).update(
+            result=result, completed_at=now, expires_at=now + timedelta(seconds=result_ttl)
+        )
+
+    def _release(self, lease):
+        GenerationLease.objects.filter(pk=lease.pk, owner=lease.owner).delete()
+
+    def purge_expired(self, batch_size=1000):
+        """Delete leases past ``expires_at`` (stored results and dead leaders' rows); returns how many."""
+        expired = GenerationLease.objects.filter(expires_at__lt=timezone.now())
+        deleted = 0
+        while True:
+            ids = list(expired.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += GenerationLease.objects.filter(pk__in=ids, expires_at__lt=timezone.now()).delete()[0]
+
+    def _acquire(self, key, lease_ttl, started):
+        """
+        Return ``(True, lease)`` when a usable finished result exists,
+        ``(False, lease)`` when this caller now holds the lease and
+        ``(False, None)`` when another live leader holds it. Without
+        ``started`` any unexpired result is usable, otherwise only results
+        completed after that moment.
+        """
+        now = timezone.now()
+        owner = self.owner
+        try:
+            with transaction.atomic():
+                lease = GenerationLease.objects.create(
+                    key=key, owner=owner, expires_at=now + timedelta(seconds=lease_ttl)
+                )
+            return False, lease
+        except IntegrityError:
+            pass
+
+        lease = GenerationLease.objects.filter(key=key).first()
+        if lease is None:
+            return False, None
+        if lease.completed_at is not None and lease.expires_at > now:
+            if started is None or lease.completed_at >= started:
+                return True, lease
+        elif lease.expires_at > now:
+            return False, None
+
+        # A dead leader or a result older than this call: take the lease over
+        taken = GenerationLease.objects.filter(pk=lease.pk, owner=lease.owner, expires_at=lease.expires_at).update(
+            owner=owner, expires_at=now + timedelta(seconds=lease_ttl), result=None, completed_at=None
+        )
+        if not taken:
+            return False, None
+        lease.owner = owner
+        return False, lease
+
+
+singleflight = SingleFlight()
+
+class _Unstored(Exception):
+    # Carries a non-2xx or streaming response out of single-flight so it is never stored
+    def __init__(self, response):
+        super().__init__(response.status_code)
+        self.response = response
+
+
+KEY_REUSED = "Idempotency-Key was already used for a different request."
+
+
+# Decorator: replay the stored response for a repeated Idempotency-Key header.
+# Works on DRF ``post`` methods and on the async views' coroutine handlers. The
+# stored response records a fingerprint of the request (path, query and body); a
+# key reused for a different request gets a 422 instead of the first response.
+def idempotent(scope):
+    def fingerprint(request):
+        body = json.dumps(request.data, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(f"{request.get_full_path()}\n{body}".encode("utf-8")).hexdigest()
+
+    def stored_response(response, request_fingerprint):
+        if response.streaming or not 200 <= response.status_code < 300:
+            raise _Unstored(response)
+        data = JSONRenderer().render(response.data) if hasattr(response, "data") else response.content
+        return {
+            "status": response.status_code,
+            "data": data.decode("utf-8"),
+            "headers": {k: v for k, v in response.items() if k.startswith("X-")},
+            "fingerprint": request_fingerprint,
+        }
+
+    def mismatch_response(is_async):
+        if is_async:
+            return JsonResponse({"error": KEY_REUSED}, status=422)
+        return Response({"error": KEY_REUSED}, status=422)
+
+    def replay_response(stored, replayed, is_async):
+        if is_async:
+            response = HttpResponse(stored["data"], status=stored["status"], content_type="application/json")
+        else:
+            response = Response(json.loads(stored["data"]), status=stored["status"])
+        for header, value in stored["headers"].items():
+            response[header] = value
+        if replayed:
+            response["Idempotent-Replayed"] = "true"
+        return response
+
+    def key_for(request, idempotency_key):
+        return f"idem:{scope}:{request.user.pk}:{idempotency_key[:128]}"
+
+    def decorator(method):
+        ttl = getattr(settings, "IDEMPOTENCY_KEY_TTL", 60 * 60 * 24)
+
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, request, *args, **kwargs):
+                idempotency_key = request.headers.get("Idempotency-Key")
+                if not idempotency_key:
+                    return await method(self, request, *args, **kwargs)
+                request_fingerprint = fingerprint(request)
+                replayed = True
+
+                async def run():
+                    nonlocal replayed
+                    replayed = False
+                    return stored_response(await method(self, request, *args, **kwargs), request_fingerprint)
+
+                try:
+                    stored = await singleflight.ado(key_for(request, idempotency_key), run, result_ttl=ttl, replay=True)
+                except _Unstored as e:
+                    if not replayed:
+                        return e.response
+                    # The leader's response was not stored: this request gets its own
+                    return await method(self, request, *args, **kwargs)
+                if stored.get("fingerprint", request_fingerprint) != request_fingerprint:
+                    return mismatch_response(is_async=True)
+                return replay_response(stored, replayed, is_async=True)
+
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            idempotency_key = request.headers.get("Idempotency-Key")
+            if not idempotency_key:
+                return method(self, request, *args, **kwargs)
+            request_fingerprint = fingerprint(request)
+            replayed = True
+
+            def run():
+                nonlocal replayed
+                replayed = False
+                return stored_response(method(self, request, *args, **kwargs), request_fingerprint)
+
+            try:
+                stored = singleflight.do(key_for(request, idempotency_key), run, result_ttl=ttl, replay=True)
+            except _Unstored as e:
+                if not replayed:
+                    return e.response
+                # The leader's response was not stored: this request gets its own
+                return method(self, request, *args, **kwargs)
+            if stored.get("fingerprint", request_fingerprint) != request_fingerprint:
+                return mismatch_response(is_async=False)
+            return replay_response(stored, replayed, is_async=False)
+
+        return wrapper
+
+    return decorator
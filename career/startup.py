@@ -0,0 +1,27 @@
+import time
+
+from django.db import connections
+
+
+# Cold start. Importing career_project.wsgi sets Django up but leaves the URLconf,
+# the views and the OpenAI SDK to the first request, so the first request a
+# worker serves is the slow one. Under `gunicorn --preload` the master calls
+# warm_up() once before forking (gunicorn.conf.py), and every worker starts
+# with all of it already imported.
+#
+# Nothing that holds sockets or threads is built here. The OpenAI client, the
+# Google key session, the LLM thread pool and the in-process indexes are
+# created lazily per process (keyed by pid), and warm_up() closes the database
+# connections it opened, so a worker never shares them with its parent.
+
+
+def warm_up():
+    """Import what the first request would; returns the seconds it took."""
+    started = time.perf_counter()
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns  # career.urls, the views and what they import
+    import openai.resources.chat  # noqa: F401  (the SDK loads its resources on first use)
+
+    connections.close_all()
+    return time.perf_counter() - started
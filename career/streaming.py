@@ -0,0 +1,160 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+_WHITESPACE = " \t\r\n"
+_SCALAR_END = ",}]" + _WHITESPACE
+
+
+class JSONEventScanner:
+    """
+    Incremental scanner over a JSON document that arrives in chunks.
+
+    ``feed`` returns ``(path, value)`` for every value that finished in the
+    chunk and whose path (a tuple of object keys and array indexes) matches
+    ``predicate``, e.g. ``("career_paths", 0)`` as soon as its closing brace
+    arrives. Text before the first ``{`` (such as a ```json fence) and after
+    the root object closes is ignored.
+    """
+
+    def __init__(self, predicate):
+        self.predicate = predicate
+        self.text = ""
+        self._pos = 0
+        self._started = False
+        self._finished = False
+        self._frames = []  # [kind, key_or_index, expecting_key, value_start]
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._string_start = 0
+        self._scalar_start = None
+
+    @property
+    def finished(self):
+        return self._finished
+
+    def _path(self):
+        return tuple(frame[1] for frame in self._frames)
+
+    def _value_started(self, start):
+        if self._frames:
+            self._frames[-1][3] = start
+
+    def _value_done(self, end, events):
+        if not self._frames:
+            self._finished = True
+            return
+        frame = self._frames[-1]
+        start, frame[3] = frame[3], None
+        if start is not None:
+            path = self._path()
+            if self.predicate(path):
+                events.append((path, json.loads(self.text[start:end])))
+
+    def feed(self, chunk):
+        events = []
+        self.text += chunk
+        text = self.text
+        while self._pos < len(text) and not self._finished:
+            i = self._pos
+            ch = text[i]
+            self._pos += 1
+
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._frames.append(["object", None, True, None])
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._frames[-1][1] = json.loads(text[self._string_start:i + 1])
+                    else:
+                        self._value_done(i + 1, events)
+                continue
+
+            if self._scalar_start is not None:
+                if ch not in _SCALAR_END:
+                    continue
+                self._scalar_start = None
+                self._value_done(i, events)
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+                frame = self._frames[-1]
+                self._string_is_key = frame[0] == "object" and frame[2]
+                if not self._string_is_key:
+                    self._value_started(i)
+            elif ch in "{[":
+                self._value_started(i)
+                kind = "object" if ch == "{" else "array"
+                self._frames.append([kind, None if kind == "object" else 0, kind == "object", None])
+            elif ch in "}]":
+                self._frames.pop()
+                self._value_done(i + 1, events)
+            elif ch == ":":
+                self._frames[-1][2] = False
+            elif ch == ",":
+                frame = self._frames[-1]
+                if frame[0] == "object":
+                    frame[2] = True
+                else:
+                    frame[1] += 1
+            elif ch not in _WHITESPACE:
+                self._scalar_start = i
+                self._value_started(i)
+        return events
+
+
+# Paths that become SSE events as soon as they close
+def prediction_event_path(path):
+    return len(path) == 2 and path[0] == "career_paths"
+
+
+def career_details_event_path(path):
+    if len(path) == 1:
+        return path[0] in ("career", "required_skills", "free_courses")
+    return len(path) == 2 and path[0] == "roadmap"
+
+
+def prediction_event(path, value):
+    return sse("career_path", {"index": path[1], "value": value})
+
+
+def career_details_event(path, value):
+    return sse("section", {"key": ".".join(str(part) for part in path), "value": value})
+
+
+def payload_events(payload, predicate, to_event):
+    """Replay an already complete payload (e.g. a cache hit) as SSE events."""
+    scanner = JSONEventScanner(predicate)
+    return [to_event(path, value) for path, value in scanner.feed(json.dumps(payload))]
+
+
+def delta_text(chunk):
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n"
+
+
+def wants_stream(request):
+    return request.GET.get("stream", "").lower() in ("1", "true", "yes")
+
+
+def prepare_sse_response(response):
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let proxies buffer the events
+    return response
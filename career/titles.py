@@ -0,0 +1,329 @@
+import bisect
+import os
+import re
+import threading
+import time
+from array import array
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+
+from .catalog import normalize_career_name
+from .models import CareerPrediction, CareerSuggestion
+
+
+# Career-title autocomplete and fuzzy search over every distinct title in saved
+# predictions (career_titles) and suggestions (career). Two in-process structures:
+#
+# - a flattened prefix trie: the sorted list of each title's word suffixes
+#   ("machine learning engineer", "learning engineer", "engineer"), so a bisect
+#   finds every title with a word starting with the typed text;
+# - trigram postings: per trigram of the title words, the ids of the titles that
+#   contain it. One numpy bincount over the query's postings ranks titles by shared
+#   trigrams, which catches typos ("anaylst") and reordered words.
+#
+# Candidates from both are scored per query word (cached per pair of words): exact or prefix word matches,
+# initials of consecutive words ("ml" -> "machine learning"), and close trigram
+# matches or a single edit for typos. Ties go to the more frequent title.
+#
+# `manage.py build_title_index` writes a snapshot to TITLE_INDEX_PATH that workers
+# load at startup. Every TITLE_INDEX_REFRESH seconds a worker adds the titles of
+# rows saved since the snapshot's watermark (the last ids it has read).
+
+PREFIX_CANDIDATES = 32
+FUZZY_CANDIDATES = 24
+MIN_SCORE = 0.4
+TYPO_SCORE = 0.5  # weakest word-to-word trigram similarity that still counts as a match
+EDIT_SCORE = 0.8  # a word one typo away from a title word
+
+_WORD = re.compile(r"\w+")
+
+
+def words(text):
+    return _WORD.findall(normalize_career_name(text))
+
+
+@lru_cache(maxsize=65536)
+def grams(word):
+    padded = f" {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a, b):
+    """Dice coefficient of two words' trigrams."""
+    ga, gb = grams(a), grams(b)
+    return 2 * len(ga & gb) / (len(ga) + len(gb))
+
+
+def one_edit(a, b):
+    """Whether ``a`` becomes ``b`` with one insertion, deletion, substitution or swap of neighbours."""
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return False
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return a[i + 1:] == b[i + 1:] or (a[i + 2:] == b[i + 2:] and (a[i], a[i + 1]) == (b[i + 1], b[i]))
+
+
+@lru_cache(maxsize=65536)
+def word_match(word, title_word):
+    """How well a query word matches a title word: 1 exact, 0.9 prefix, else trigram similarity (0 below TYPO_SCORE)."""
+    if word == title_word:
+        return 1.0
+    if len(word) >= 2 and title_word.startswith(word):
+        return 0.9
+    if 3 * min(len(word), len(title_word)) < max(len(word), len(title_word)):
+        return 0.0  # too different in length to reach TYPO_SCORE
+    score = similarity(word, title_word)
+    if score < EDIT_SCORE and len(word) >= 4 and one_edit(word, title_word):
+        # One slip in a short word ("anaylst") breaks most of its trigrams
+        score = EDIT_SCORE
+    return score if score >= TYPO_SCORE else 0.0
+
+
+class TitleIndex:
+    def __init__(self):
+        self.titles = []  # id -> title as first seen
+        self.keys = []  # id -> normalized title
+        self.words = []  # id -> words of the normalized title
+        self.initials = []  # id -> first letter of each word
+        self.counts = []  # id -> rows naming the title
+        self.ids = {}  # normalized title -> id
+        self.suffixes = []  # sorted (word suffix, id): the flattened trie
+        self.postings = {}  # trigram -> array of ids
+        self.watermark = [0, 0]  # last CareerPrediction / CareerSuggestion pk read
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.titles)
+
+    def _insert(self, title, count=1, sort=True):
+        # Called under the lock
+        key = normalize_career_name(title)
+        pk = self.ids.get(key)
+        if pk is not None:
+            self.counts[pk] += count
+            return
+        title_words = _WORD.findall(key)
+        if not title_words:
+            return
+        pk = len(self.titles)
+        self.titles.append(" ".join(str(title).split())[:255])
+        self.keys.append(key)
+        self.words.append(tuple(title_words))
+        self.initials.append("".join(word[0] for word in title_words))
+        self.counts.append(count)
+        self.ids[key] = pk
+        for i in range(len(title_words)):
+            entry = (" ".join(title_words[i:]), pk)
+            if sort:
+                bisect.insort(self.suffixes, entry)
+            else:
+                self.suffixes.append(entry)
+        for gram in frozenset().union(*map(grams, title_words)):
+            self.postings.setdefault(gram, array("i")).append(pk)
+
+    def add(self, titles):
+        """Count each title, indexing the new ones."""
+        titles = list(titles)
+        with self.lock:
+            bulk = len(titles) > 64
+            for title in titles:
+                self._insert(title, sort=not bulk)
+            if bulk:
+                self.suffixes.sort()
+
+    # --- search ---
+    def _score(self, query_words, pk):
+        title_words = self.words[pk]
+        total, covered = 0.0, set()
+        for word in query_words:
+            best, used = 0.0, ()
+            for j, title_word in enumerate(title_words):
+                score = word_match(word, title_word)
+                if score > best:
+                    best, used = score, (j,)
+                    if score == 1.0:
+                        break
+            if best < 1.0 and len(word) >= 2:
+                # Initials of consecutive words: "ml" for "machine learning"
+                j = self.initials[pk].find(word)
+                if j >= 0:
+                    best, used = 1.0, range(j, j + len(word))
+            total += best
+            covered.update(used)
+        # Mostly how well the query matched; a little for how much of the title it explains
+        return 0.8 * total / len(query_words) + 0.2 * len(covered) / len(title_words)
+
+    def search(self, query, limit=10):
+        """Up to ``limit`` ``(title, score, count)`` best matches for ``query``, best first."""
+        query_words = words(query)
+        if not query_words:
+            return []
+        prefix = " ".join(query_words)
+        query_grams = frozenset().union(*map(grams, query_words))
+        with self.lock:
+            if not self.titles:
+                return []
+            candidates = set()
+            i = bisect.bisect_left(self.suffixes, (prefix,))
+            while i < len(self.suffixes) and len(candidates) < PREFIX_CANDIDATES and self.suffixes[i][0].startswith(prefix):
+                candidates.add(self.suffixes[i][1])
+                i += 1
+            # Enough titles start like the query: it is being typed, not misspelt
+            fuzzy = len(candidates) < PREFIX_CANDIDATES
+            postings = [self.postings[gram] for gram in query_grams if fuzzy and gram in self.postings]
+            # Trigrams in most titles (" se", "er ") only add noise and time: count the rarer ones
+            common = len(self.titles) // 4
+            postings = [np.frombuffer(ids, dtype=np.intc) for ids in postings if len(ids) <= common] or [
+                np.frombuffer(ids, dtype=np.intc) for ids in postings
+            ]
+            if postings:
+                shared = np.bincount(np.concatenate(postings), minlength=len(self.titles))
+                del postings  # release the buffers before the next append
+                top = np.argpartition(-shared, min(FUZZY_CANDIDATES, len(shared) - 1))[:FUZZY_CANDIDATES]
+                candidates.update(int(pk) for pk in top if shared[pk])
+            scored = sorted(
+                ((self._score(query_words, pk), pk) for pk in candidates),
+                key=lambda item: (-item[0], -self.counts[item[1]], self.keys[item[1]]),
+            )
+            return [
+                (self.titles[pk], round(score, 4), self.counts[pk]) for score, pk in scored[:limit] if score >= MIN_SCORE
+            ]
+
+    # --- incremental updates ---
+    def catch_up(self, max_rows=None):
+        """Add the titles of rows saved since the watermark (at most ``max_rows`` per table); returns rows read."""
+        prediction_pk, suggestion_pk = self.watermark
+        predictions = CareerPrediction.objects.filter(pk__gt=prediction_pk).order_by("pk").values_list("pk", "career_titles")
+        suggestions = CareerSuggestion.objects.filter(pk__gt=suggestion_pk).order_by("pk").values_list("pk", "career")
+        if max_rows:
+            predictions, suggestions = predictions[:max_rows], suggestions[:max_rows]
+        read = 0
+        for position, rows in enumerate((predictions, suggestions)):
+            titles, last = [], None
+            for pk, value in rows.iterator(chunk_size=2000):
+                titles.extend((value or ()) if position == 0 else (value,))
+                last = pk
+                read += 1
+                if len(titles) >= 2000:
+                    self.add(titles)
+                    titles = []
+                    self.watermark[position] = last
+            if last is not None:
+                self.add(titles)
+                self.watermark[position] = last
+        return read
+
+    # --- snapshots ---
+    def save(self, path):
+        """Write the index to ``path`` (atomically): titles, counts, watermark, trie order and postings."""
+        with self.lock:
+            grams_list = sorted(self.postings)
+            arrays = {
+                # Whitespace-normalized titles never contain a newline
+                "titles": np.frombuffer("\n".join(self.titles).encode("utf-8"), dtype=np.uint8),
+                "counts": np.array(self.counts, dtype=np.int64),
+                "watermark": np.array(self.watermark, dtype=np.int64),
+                # Each trie entry as (title id, first word): the strings are rebuilt from the titles
+                "suffix_ids": np.array([pk for _, pk in self.suffixes], dtype=np.int32),
+                "suffix_starts": np.array(
+                    [len(self.words[pk]) - len(suffix.split()) for suffix, pk in self.suffixes], dtype=np.int16
+                ),
+                "grams": np.frombuffer("".join(grams_list).encode("utf-8"), dtype=np.uint8),
+                "offsets": np.cumsum([0] + [len(self.postings[gram]) for gram in grams_list], dtype=np.int64),
+                "postings": np.concatenate(
+                    [np.frombuffer(self.postings[gram], dtype=np.intc) for gram in grams_list] or [np.zeros(0, np.intc)]
+                ),
+            }
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        index = cls()
+        with np.load(path) as data:
+            text = data["titles"].tobytes().decode("utf-8")
+            index.titles = text.split("\n") if text else []
+            index.keys = [normalize_career_name(title) for title in index.titles]
+            index.words = [tuple(_WORD.findall(key)) for key in index.keys]
+            index.initials = ["".join(word[0] for word in title_words) for title_words in index.words]
+            index.ids = {key: pk for pk, key in enumerate(index.keys)}
+            index.counts = data["counts"].tolist()
+            index.watermark = data["watermark"].tolist()
+            index.suffixes = [
+                (" ".join(index.words[pk][start:]), pk)
+                for pk, start in zip(data["suffix_ids"].tolist(), data["suffix_starts"].tolist())
+            ]
+            gram_text = data["grams"].tobytes().decode("utf-8")
+            offsets, postings = data["offsets"], data["postings"].astype(np.intc)
+            index.postings = {
+                gram_text[3 * i:3 * i + 3]: array("i", postings[offsets[i]:offsets[i + 1]].tobytes())
+                for i in range(len(offsets) - 1)
+            }
+        return index
+
+
+# --- per-process index ---
+_index = {"pid": None, "index": None, "refreshed": 0.0}
+_index_lock = threading.Lock()
+_refresh_lock = threading.Lock()
+
+
+def snapshot_path():
+    return getattr(settings, "TITLE_INDEX_PATH", "/tmp/elevare-title-index.npz")
+
+
+def get_index():
+    """This process's index, loaded from the snapshot (an empty one without it)."""
+    with _index_lock:
+        if _index["pid"] != os.getpid():
+            try:
+                index = TitleIndex.load(snapshot_path())
+            except (OSError, ValueError, KeyError):
+                index = TitleIndex()
+            _index.update(pid=os.getpid(), index=index, refreshed=0.0)
+        return _index["index"]
+
+
+def refresh(index):
+    # One thread per process catches up; the others keep searching what is indexed
+    now = time.monotonic()
+    if now - _index["refreshed"] < getattr(settings, "TITLE_INDEX_REFRESH", 30):
+        return
+    if not _refresh_lock.acquire(blocking=False):
+        return
+    try:
+        _index["refreshed"] = now
+        index.catch_up(getattr(settings, "TITLE_INDEX_CATCHUP_ROWS", 5000))
+    finally:
+        _refresh_lock.release()
+
+
+def search(query, limit=10):
+    index = get_index()
+    refresh(index)
+    return [{"title": title, "score": score, "count": count} for title, score, count in index.search(query, limit)]
+
+
+def snap(career_name):
+    """The known title ``career_name`` most likely means, if CAREER_TITLE_SNAP is on and it is close enough."""
+    if not getattr(settings, "CAREER_TITLE_SNAP", False):
+        return career_name
+    results = search(career_name, 1)
+    if results and results[0]["score"] >= getattr(settings, "CAREER_TITLE_SNAP_SCORE", 0.9):
+        return results[0]["title"]
+    return career_name
+
+
+def reset():
+    """Forget this process's index (tests)."""
+    with _index_lock:
+        _index.update(pid=None, index=None, refreshed=0.0)
@@ -1,11 +1,28 @@
+from django.conf import settings
 from django.urls import path
-from .views import CareerPredictView,CareerHistoryView,GoogleAuthView,RegisterUserView,LoginView,CareerDetailsView
+from .views import CareerPredictView,CareerHistoryView,GoogleAuthView,RegisterUserView,LoginView,CareerDetailsView,GenerationJobView,ActivityFeedView,ActivityExportView,CohortPredictView,UserImportView,StatsView,CareerSearchView
+from .async_views import AsyncCareerPredictView,AsyncCareerDetailsView
+
+# CAREER_VIEW_MODE = "async" serves the LLM-backed endpoints from async views (run under an ASGI server)
+if settings.CAREER_VIEW_MODE == "async":
+    predict_view = AsyncCareerPredictView.as_view()
+    career_view = AsyncCareerDetailsView.as_view()
+else:
+    predict_view = CareerPredictView.as_view()
+    career_view = CareerDetailsView.as_view()
 
 urlpatterns = [
-    path('predict/', CareerPredictView.as_view(), name='predict'),
+    path('predict/', predict_view, name='predict'),
+    path("predict/batch/", CohortPredictView.as_view(), name="predict-batch"),
     path("history/", CareerHistoryView.as_view(), name="career-history"),
+    path("activity/", ActivityFeedView.as_view(), name="activity"),
+    path("activity/export/", ActivityExportView.as_view(), name="activity-export"),
     path("auth/google/", GoogleAuthView.as_view(), name="google_auth"),
     path("login/",LoginView.as_view(),name="login"),
     path("register/",RegisterUserView.as_view(),name="register"),
-    path("career/",CareerDetailsView.as_view(),name="career")
+    path("users/import/", UserImportView.as_view(), name="user-import"),
+    path("career/",career_view,name="career"),
+    path("careers/search/", CareerSearchView.as_view(), name="career-search"),
+    path("jobs/<uuid:job_id>/",GenerationJobView.as_view(),name="job-detail"),
+    path("stats/", StatsView.as_view(), name="stats"),
 ]
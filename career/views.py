@@ -1,128 +1,307 @@
-import os
+import datetime
 import json
-import re
+import uuid
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth import authenticate
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.generics import ListAPIView
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
+
+from . import archive, catalog, cohort, feed, jobs, llm, metrics, roster, rollups, services, titles
+from .admission import admit
+from .authentication import issue_tokens
+from .cache import prediction_cache, profile_key
+from .google_auth import verify_google_token
+from .llm import LLMUnavailable
+from .models import CareerPrediction,CareerSuggestion,GenerationJob,UserImport
+from .parsing import parse_career_details
+from .payloads import decode_or
+from .pagination import (
+    InvalidCursor, after_cursor, decode_cursor, encode_cursor, etag_matches, next_link, page_etag, page_limit,
+)
+from .prompts import get_prompt
+from .serializers import CareerInputSerializer,CareerPredictionSerializer,UserSerializer
+from .services import Usage
+from .singleflight import GenerationError, idempotent
+from .streaming import (
+    JSONEventScanner, career_details_event, career_details_event_path, delta_text, payload_events,
+    prediction_event, prepare_sse_response, sse, wants_stream,
+)
+
+
+# Helper: the LLM is degraded and nothing cached could stand in
+def unavailable_response(error):
+    response = Response({"error": str(error)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    if error.retry_after:
+        response["Retry-After"] = str(int(error.retry_after))
+    return response
 
-from openai import OpenAI
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import CareerPrediction,CareerSuggestion
-from .serializers import CareerPredictionSerializer,UserSerializer
+# --- Career Prediction API ---
+class CareerPredictView(APIView):
+    permission_classes = [IsAuthenticated]
 
+    @idempotent("predict")
+    @admit("interactive")
+    def post(self, request):
+        try:
+            with metrics.phase("validate"):
+                input_serializer = CareerInputSerializer(data=request.data)
+                if not input_serializer.is_valid():
+                    return Response(input_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-# Load OpenAI key
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or getattr(settings, "OPENAI_API_KEY", None)
-client = OpenAI(api_key=OPENAI_API_KEY)
+            user_data = request.data
+            if jobs.wants_job(request):
+                return jobs.accepted_response(request, jobs.enqueue(request.user, GenerationJob.KIND_PREDICT, user_data))
+            if wants_stream(request):
+                cache_key = profile_key(input_serializer.validated_data)
+                cached, cache_tier = prediction_cache.get(cache_key)
+                return self.stream(request, user_data, cache_key, cached, cache_tier)
+
+            prediction, cache_tier = services.predict(request.user, user_data, input_serializer.validated_data)
+
+            response = Response(services.prediction_body(prediction))
+            response["X-Cache"] = "HIT" if cache_tier else "MISS"
+            if cache_tier:
+                response["X-Cache-Tier"] = cache_tier
+            return response
+
+        except LLMUnavailable as e:
+            return unavailable_response(e)
+        except GenerationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    # ?stream=1: emit each career path as an SSE event as soon as its JSON closes
+    def stream(self, request, user_data, cache_key, cached, cache_tier):
+        user = request.user
 
-# Helper: safely extract JSON from AI output
-def extract_json(text):
-    text = text.strip()
-    try:
-        return json.loads(text)
-    except Exception:
-        match = re.search(r'(\{.*\})', text, re.S)
-        if match:
+        def events():
             try:
-                return json.loads(match.group(1))
-            except Exception:
-                return None
-    return None
+                stream = services.PredictionStream(user_data, cache_key, prediction_event, cached, cache_tier)
+                yield from stream.events()
+                prediction = CareerPrediction.objects.create(
+                    user=user,
+                    user_input=user_data,
+                    prediction=stream.payload,
+                    **stream.usage.fields()
+                )
+                yield sse("done", {"id": prediction.id, "created_at": prediction.created_at})
 
+            except Exception as e:
+                yield sse("error", {"error": str(e)})
 
-# --- Career Prediction API ---
-class CareerPredictView(APIView):
+        response = StreamingHttpResponse(events(), content_type="text/event-stream")
+        response["X-Cache"] = "HIT" if cached is not None else "MISS"
+        return prepare_sse_response(response)
+
+
+# --- Cohort Prediction API ---
+def cohort_profiles(request):
+    # Body: {"profiles": [profile | {"ref": ..., "profile": profile}, ...]} or the bare list
+    return request.data.get("profiles") if isinstance(request.data, dict) else request.data
+
+
+class CohortPredictView(APIView):
     permission_classes = [IsAuthenticated]
 
+    # A cohort spends one bucket token per profile (at most a full bucket)
+    @admit("bulk", cost=lambda request: len(cohort_profiles(request) or ()) or 1)
     def post(self, request):
-        try:
-            user_data = request.data
-
-            prompt = f"""
-            The user has the following profile:
-            UG Course: {user_data.get('ug_course')}
-            UG Specialization: {user_data.get('ug_specialization')}
-            Skills: {user_data.get('skills')}
-            Interests: {user_data.get('interests')}
-            UG CGPA: {user_data.get('ug_cgpa')}
-            Certifications: {user_data.get('certifications')}
-            Experience: {user_data.get('experience_years')} years
-
-            Task:
-            Suggest 3 suitable career paths.
-            Return ONLY valid JSON in this format:
-            {{
-              "career_paths": [
-                {{
-                  "title": "string",
-                  "description": "string",
-                  "required_skills": ["string"],
-                  "roadmap": {{
-                    "short_term": ["string"],
-                    "medium_term": ["string"],
-                    "long_term": ["string"]
-                  }}
-                }}
-              ]
-            }}
-            """
-
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an AI career counselor."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1000
+        profiles = cohort_profiles(request)
+        if not isinstance(profiles, list) or not profiles:
+            return Response({"error": "profiles must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(profiles) > settings.COHORT_MAX_PROFILES:
+            return Response(
+                {"error": f"At most {settings.COHORT_MAX_PROFILES} profiles per request."},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-            raw_content = response.choices[0].message.content.strip()
+        # One NDJSON line per profile as its chunk is saved, then a summary line
+        results = cohort.predict_cohort(request.user, profiles)
+        lines = (json.dumps(result, cls=DjangoJSONEncoder) + "\n" for result in results)
+        response = StreamingHttpResponse(lines, content_type="application/x-ndjson")
+        response["X-Accel-Buffering"] = "no"
+        return response
 
-            if raw_content.startswith("```"):
-                raw_content = raw_content.replace("```json", "").replace("```", "").strip()
 
-            parsed_json = extract_json(raw_content)
-            if not parsed_json:
-                return Response(
-                    {"error": "Failed to parse JSON from OpenAI response."},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
-                )
+# --- Career History API ---
+class CareerHistoryView(ListAPIView):
+    permission_classes = [IsAuthenticated]
 
-            prediction = CareerPrediction.objects.create(
-                user=request.user,
-                user_input=user_data,
-                prediction=parsed_json
-            )
+    # ?fields= projection; "summary" never reads the user_input/prediction blobs
+    PROJECTABLE_FIELDS = ("id", "created_at", "career_titles", "user_input", "prediction", "user")
+    FIELD_ALIASES = {"summary": ("id", "created_at", "career_titles")}
+
+    def requested_fields(self, request):
+        fields = request.query_params.get("fields")
+        if not fields:
+            return None
+        if fields in self.FIELD_ALIASES:
+            return self.FIELD_ALIASES[fields]
+        fields = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+        unknown = set(fields) - set(self.PROJECTABLE_FIELDS)
+        if unknown or not fields:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown)) or '(none)'}")
+        return fields
+
+    # Payload fields read the compressed blob, or the JSON column of a row not yet backfilled
+    PAYLOAD_COLUMNS = {"user_input": ("input_blob__data", "user_input_json"), "prediction": ("prediction_blob__data", "prediction_json")}
+
+    def columns(self, fields):
+        columns = []
+        for field in fields:
+            columns.extend(self.PAYLOAD_COLUMNS.get(field, ("user_id" if field == "user" else field,)))
+        return columns
+
+    def project(self, row, fields):
+        item = {}
+        for field in fields:
+            if field in self.PAYLOAD_COLUMNS:
+                item[field] = decode_or(*(row[column] for column in self.PAYLOAD_COLUMNS[field]))
+            else:
+                item[field] = row["user_id" if field == "user" else field]
+        return item
 
-            return Response({
-                "id": prediction.id,
-                "career_paths": parsed_json["career_paths"],
-                "created_at": prediction.created_at
-            })
+    def get(self, request):
+        cursor = request.query_params.get("cursor")
+        try:
+            fields = self.requested_fields(request)
+            history = CareerPrediction.objects.filter(user=request.user).order_by("-created_at", "-id")
+            history = after_cursor(history, cursor)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        limit = page_limit(request, settings.HISTORY_PAGE_SIZE, settings.HISTORY_MAX_PAGE_SIZE)
+
+        # Index-only pass over (user, -created_at) first: the page keys decide the ETag
+        hot = list(history.values_list("id", "created_at")[:limit + 1])
+        archived = []
+        if len(hot) <= limit:
+            # Table exhausted: continue into the archive, which only holds older rows
+            after = (hot[-1][1], hot[-1][0]) if hot else (decode_cursor(cursor) if cursor else None)
+            archived = archive.history("predictions", request.user.pk, after, limit + 1 - len(hot))
+        keys = hot + [(row["id"], parse_datetime(row["created_at"])) for row in archived]
+        has_next = len(keys) > limit
+        keys, hot, archived = keys[:limit], hot[:limit], archived[:limit - len(hot)]
+        etag = page_etag(
+            request.user.pk, ",".join(fields or ("*",)), has_next,
+            *(f"{pk}:{created_at.timestamp()}" for pk, created_at in keys)
+        )
+
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            page = history.filter(id__in=[pk for pk, _ in hot])
+            if fields is None:
+                data = CareerPredictionSerializer(page.select_related("input_blob", "prediction_blob"), many=True).data
+                data += archived  # stored as this serializer rendered them
+            else:
+                data = [self.project(row, fields) for row in page.values(*self.columns(fields))]
+                data += [{field: row[field] for field in fields} for row in archived]
+            response = Response(data)
+
+        response["ETag"] = etag
+        if has_next:
+            pk, created_at = keys[-1]
+            cursor = encode_cursor(created_at, pk)
+            response["X-Next-Cursor"] = cursor
+            response["Link"] = next_link(request, cursor)
+        return response
+
+
+# --- Activity Feed API ---
+class ActivityFeedView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    def get(self, request):
+        limit = page_limit(request, settings.HISTORY_PAGE_SIZE, settings.HISTORY_MAX_PAGE_SIZE)
+        try:
+            rows = list(feed.activity(request.user, request.query_params.get("cursor"), limit=limit + 1))
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        response = Response([feed.feed_item(row) for row in rows])
+        if has_next:
+            last = rows[-1]
+            cursor = encode_cursor(last["created_at"], last["kind_rank"], last["id"])
+            response["X-Next-Cursor"] = cursor
+            response["Link"] = next_link(request, cursor)
+        return response
+
+
+class ActivityExportView(APIView):
+    permission_classes = [IsAuthenticated]
 
+    def get(self, request):
+        # One NDJSON line per row, read through a server-side cursor (and the archive) so memory stays flat
+        rows = feed.activity(request.user, full=True, chunk_size=settings.ACTIVITY_EXPORT_CHUNK_SIZE)
+        lines = (json.dumps(feed.feed_item(row), cls=DjangoJSONEncoder) + "\n" for row in rows)
+        response = StreamingHttpResponse(lines, content_type="application/x-ndjson")
+        response["Content-Disposition"] = 'attachment; filename="career-activity.ndjson"'
+        return response
 
-# --- Career History API ---
-class CareerHistoryView(ListAPIView):
+
+# --- Career Title Search API ---
+class CareerSearchView(APIView):
+    """Autocomplete: known career titles ranked for ?q= (prefix, typo and initials matches)."""
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        history = CareerPrediction.objects.filter(user=request.user).order_by("-created_at")
-        serializer = CareerPredictionSerializer(history, many=True)
-        return Response(serializer.data)
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return Response({"error": "q is required."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = page_limit(request, 10, 50)
+        return Response({"query": query, "results": titles.search(query[:200], limit)})
+
+
+# --- Analytics API ---
+class StatsView(APIView):
+    """Top careers, top skills per UG course and token usage over the last ?days=, from the rollups only."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            days = int(request.query_params.get("days", 7))
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            return Response({"error": "days and limit must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= days <= 3660 or not 1 <= limit <= 100:
+            return Response({"error": "days must be 1-3660 and limit 1-100."}, status=status.HTTP_400_BAD_REQUEST)
+        since = timezone.now().date() - datetime.timedelta(days=days - 1)
+        return Response(rollups.stats(since, limit))
+
+
+# --- Generation Job API ---
+class GenerationJobView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        job = GenerationJob.objects.filter(pk=job_id, user=request.user).first()
+        if job is None:
+            return Response({"error": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        # ?wait=<seconds> long-polls until the job finishes
+        wait = request.query_params.get("wait")
+        if wait:
+            try:
+                job = jobs.wait_for(job, max(float(wait), 0))
+            except ValueError:
+                return Response({"error": "wait must be a number of seconds."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(jobs.job_body(job))
 
 
 # --- Google Authentication API ---
@@ -137,8 +316,8 @@ class GoogleAuthView(APIView):
             return Response({"error": "No credential provided"}, status=400)
 
         try:
-            # verify with Google
-            idinfo = id_token.verify_oauth2_token(token, google_requests.Request())
+            # verify locally against Google's cached signing keys
+            idinfo = verify_google_token(token)
             email = idinfo["email"]
             name = idinfo.get("name", "")
             sub = idinfo["sub"]
@@ -150,7 +329,7 @@ class GoogleAuthView(APIView):
             )
 
             # issue JWT tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = issue_tokens(user)
             return Response({
                 "refresh": str(refresh),
                 "access": str(refresh.access_token),
@@ -162,6 +341,49 @@ class GoogleAuthView(APIView):
         except Exception as e:
             return Response({"error": str(e)}, status=400)
 
+# --- Bulk User Import API ---
+class UserImportView(APIView):
+    """
+    Staff-only roster import. The body is a CSV (with a header) or JSONL roster
+    with name, username, email and an optional password: raw (Content-Type
+    text/csv or application/x-ndjson) or a multipart "file" upload. Responds
+    with one NDJSON result per row and a summary. ?resume=<import id> continues
+    an interrupted import from its last committed line.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        upload = request.FILES.get("file") if request.content_type.startswith("multipart/") else None
+        if upload is not None:
+            lines, format = upload, roster.guess_format(upload.name)
+        else:
+            # Read the body as a stream: rosters may exceed DATA_UPLOAD_MAX_MEMORY_SIZE
+            lines = request._request
+            format = "jsonl" if "json" in request.content_type else "csv"
+        format = request.query_params.get("format", format)
+        if format not in ("csv", "jsonl"):
+            return Response({"error": "format must be csv or jsonl."}, status=status.HTTP_400_BAD_REQUEST)
+
+        resume = request.query_params.get("resume")
+        if resume:
+            try:
+                resume = uuid.UUID(resume)
+            except ValueError:
+                return Response({"error": "resume must be an import id."}, status=status.HTTP_400_BAD_REQUEST)
+            user_import = UserImport.objects.filter(pk=resume, status=UserImport.RUNNING).first()
+            if user_import is None:
+                return Response({"error": "No unfinished import with this id."}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            user_import = UserImport.objects.create(created_by=request.user, source=getattr(upload, "name", ""))
+
+        results = roster.import_roster(user_import, roster.read_roster(lines, format))
+        lines_out = (json.dumps(result, cls=DjangoJSONEncoder) + "\n" for result in results)
+        response = StreamingHttpResponse(lines_out, content_type="application/x-ndjson")
+        response["X-Accel-Buffering"] = "no"
+        response["X-Import-Id"] = str(user_import.pk)
+        return response
+
+
 class RegisterUserView(APIView):
     permission_classes = [AllowAny]
 
@@ -185,7 +407,7 @@ class LoginView(APIView):
         user = authenticate(username=username, password=password)
         if user is not None:
             # issue JWT tokens
-            refresh = RefreshToken.for_user(user)
+            refresh = issue_tokens(user)
             return Response({
                 "refresh": str(refresh),
                 "access": str(refresh.access_token),
@@ -199,72 +421,75 @@ class LoginView(APIView):
 class CareerDetailsView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent("career")
+    @admit("interactive")
     def post(self, request):
         try:
             career_name = request.data.get("career")
             if not career_name:
                 return Response({"error": "Career field is required."}, status=status.HTTP_400_BAD_REQUEST)
+            # CAREER_TITLE_SNAP: a close variant of a known title reuses that title's catalog entry
+            career_name = titles.snap(career_name)
+
+            if jobs.wants_job(request):
+                job = jobs.enqueue(request.user, GenerationJob.KIND_CAREER, {"career": career_name})
+                return jobs.accepted_response(request, job)
+            if wants_stream(request):
+                return self.stream(request, career_name, catalog.lookup(career_name))
+
+            suggestion, cache_tier = services.career_details(request.user, career_name)
+
+            response = Response(services.career_details_body(suggestion))
+            response["X-Cache"] = "HIT" if cache_tier else "MISS"
+            if cache_tier:
+                response["X-Cache-Tier"] = cache_tier
+            return response
+
+        except LLMUnavailable as e:
+            return unavailable_response(e)
+        except GenerationError as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-            prompt = f"""
-            Task:
-            Provide a detailed breakdown for the career: {career_name}.
-
-            The response must be ONLY valid JSON in this format:
-            {{
-              "career": "{career_name}",
-              "required_skills": ["string"],
-              "free_courses": [
-                {{
-                  "title": "string",
-                  "platform": "string",
-                  "url": "string"
-                }}
-              ],
-              "roadmap": {{
-                "short_term": ["string"],
-                "medium_term": ["string"],
-                "long_term": ["string"]
-              }}
-            }}
-            """
-
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an expert career counselor and learning path guide."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1000
-            )
-
-            raw_content = response.choices[0].message.content.strip()
-
-            if raw_content.startswith("```"):
-                raw_content = raw_content.replace("```json", "").replace("```", "").strip()
+    # ?stream=1: emit each section (skills, courses, roadmap stages) as it closes
+    def stream(self, request, career_name, entry):
+        user = request.user
 
-            parsed_json = extract_json(raw_content)
-            if not parsed_json:
-                return Response(
-                    {"error": "Failed to parse JSON from OpenAI response."},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        def events():
+            usage = Usage()
+            try:
+                catalog_entry = entry
+                if catalog_entry is not None:
+                    yield from payload_events(catalog_entry.payload, career_details_event_path, career_details_event)
+                else:
+                    scanner = JSONEventScanner(career_details_event_path)
+                    prompt = get_prompt("career_details")
+                    usage.prompt_version = prompt.id
+                    chunks = llm.gateway.chat(prompt.messages({"career_name": career_name}), stream=True)
+                    for chunk in chunks:
+                        usage.add(chunk)
+                        for path, value in scanner.feed(delta_text(chunk)):
+                            yield career_details_event(path, value)
+
+                    usage.finish()
+                    parsed_json = parse_career_details(scanner.text).payload
+                    if not parsed_json:
+                        yield sse("error", {"error": "Failed to parse JSON from OpenAI response."})
+                        return
+                    catalog_entry = catalog.store(career_name, parsed_json)
+
+                suggestion = CareerSuggestion.objects.create(
+                    user=user,
+                    career=career_name,
+                    catalog=catalog_entry,
+                    **usage.fields()
                 )
+                yield sse("done", {"id": suggestion.id, "created_at": suggestion.created_at})
 
-            # Save in DB
-            suggestion = CareerSuggestion.objects.create(
-                user=request.user,
-                career=career_name,
-                suggestion=parsed_json
-            )
-
-            return Response({
-                "id": suggestion.id,
-                "career": parsed_json["career"],
-                "required_skills": parsed_json["required_skills"],
-                "free_courses": parsed_json["free_courses"],
-                "roadmap": parsed_json["roadmap"],
-                "created_at": suggestion.created_at
-            })
+            except Exception as e:
+                yield sse("error", {"error": str(e)})
 
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        response = StreamingHttpResponse(events(), content_type="text/event-stream")
+        response["X-Cache"] = "HIT" if entry is not None else "MISS"
+        return prepare_sse_response(response)
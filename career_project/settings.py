@@ -1,6 +1,7 @@
 from pathlib import Path
 from dotenv import load_dotenv
 import os
+import json
 from datetime import timedelta
 import dj_database_url
 
@@ -50,7 +51,7 @@ INSTALLED_APPS = [
 # REST + JWT
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "career.authentication.TimedJWTAuthentication",
     ),
      "DEFAULT_RENDERER_CLASSES": (
             "rest_framework.renderers.JSONRenderer",
@@ -86,20 +87,36 @@ SOCIALACCOUNT_PROVIDERS = {
 }
 
 # Middleware
+# API-only profile (career/middleware.py): the Web* middleware skip sessions, CSRF,
+# auth and messages for API_PATH_PREFIX requests, which authenticate with JWTs
+API_ONLY_MIDDLEWARE = os.getenv("API_ONLY_MIDDLEWARE", "True").lower() in ("true", "1")
+API_PATH_PREFIX = "/api/"
+
 MIDDLEWARE = [
+    "career.metrics.MetricsMiddleware",  # removes itself unless METRICS_ENABLED
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # 👈 for static files
-    "django.contrib.sessions.middleware.SessionMiddleware",
-    "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
+    "career.middleware.WebSessionMiddleware",
+    "career.middleware.WebCsrfViewMiddleware",
     "allauth.account.middleware.AccountMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
+    "career.middleware.WebAuthenticationMiddleware",
+    "career.middleware.WebMessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# LEAN_STARTUP leaves out allauth, dj-rest-auth and DRF's token app: the API signs
+# users in with its own views (JWTs, career/google_auth.py) and never uses them, but
+# every worker would import them and run their checks before its first request.
+# Their tables are left as they are, so switching back needs no migration.
+LEAN_STARTUP = os.getenv("LEAN_STARTUP", "False").lower() in ("true", "1")
+if LEAN_STARTUP:
+    INSTALLED_APPS = [
+        app for app in INSTALLED_APPS if not app.startswith(("allauth", "dj_rest_auth", "rest_framework.authtoken"))
+    ]
+    MIDDLEWARE = [middleware for middleware in MIDDLEWARE if not middleware.startswith("allauth.")]
+
 ROOT_URLCONF = 'career_project.urls'
 
 CORS_ALLOW_ALL_ORIGINS = True
@@ -153,5 +170,177 @@ STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# Prediction cache (in-process LRU in front of the PredictionCacheEntry table)
+PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "1024"))
+PREDICTION_CACHE_TTL = int(os.getenv("PREDICTION_CACHE_TTL", str(60 * 60 * 24)))
+PREDICTION_CACHE_CGPA_BUCKET = float(os.getenv("PREDICTION_CACHE_CGPA_BUCKET", "0.5"))
+# Expired entries still serve as the stale fallback for this long, see `manage.py purge_expired`
+PREDICTION_CACHE_STALE_DAYS = int(os.getenv("PREDICTION_CACHE_STALE_DAYS", "7"))
+
+# Shared career-details catalog (bump the version to invalidate every entry)
+CAREER_CATALOG_TTL = int(os.getenv("CAREER_CATALOG_TTL", str(60 * 60 * 24 * 30)))
+CAREER_CATALOG_VERSION = int(os.getenv("CAREER_CATALOG_VERSION", "1"))
+
+# Single-flight coalescing of identical LLM calls (seconds)
+SINGLEFLIGHT_LEASE_TTL = int(os.getenv("SINGLEFLIGHT_LEASE_TTL", "60"))
+SINGLEFLIGHT_WAIT_TIMEOUT = int(os.getenv("SINGLEFLIGHT_WAIT_TIMEOUT", "90"))
+SINGLEFLIGHT_RESULT_TTL = int(os.getenv("SINGLEFLIGHT_RESULT_TTL", "60"))
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", str(60 * 60 * 24)))
+
+# Request path for the LLM-backed views: "sync" (DRF views, WSGI workers) or
+# "async" (AsyncOpenAI + async ORM, e.g. gunicorn -k uvicorn.workers.UvicornWorker career_project.asgi)
+CAREER_VIEW_MODE = os.getenv("CAREER_VIEW_MODE", "sync").lower()
+
+# Shared OpenAI HTTP connection pool
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "200"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "50"))
+# Point at any OpenAI-compatible server, e.g. benchmarks/fake_openai.py
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+# LLM gateway: jittered retries on 429/5xx, a per-process concurrency cap and a
+# circuit breaker that fails fast (serving stale cache/catalog entries) while open
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+# Hedged requests: "" disables, "p95" hedges at the observed p95 latency, or a fixed
+# number of seconds. LLM_HEDGE_MODEL sends the hedge to a cheaper model instead.
+LLM_HEDGE_AFTER = os.getenv("LLM_HEDGE_AFTER", "")
+LLM_HEDGE_MODEL = os.getenv("LLM_HEDGE_MODEL", "")
+
+# Structured output: JSON mode, plus one repair retry for malformed replies if the
+# whole exchange stays within this many tokens (0 disables the retry)
+OPENAI_JSON_MODE = os.getenv("OPENAI_JSON_MODE", "True").lower() in ("true", "1")
+LLM_REPAIR_TOKEN_BUDGET = int(os.getenv("LLM_REPAIR_TOKEN_BUDGET", "4000"))
+
+# Prompt registry (career/prompts.py): token budget for the rendered profile, whose
+# skills/interests/certifications lists are trimmed to fit, and optional version pins
+PROMPT_INPUT_TOKEN_BUDGET = int(os.getenv("PROMPT_INPUT_TOKEN_BUDGET", "250"))
+PROMPT_VERSIONS = {
+    name: int(version)
+    for name, version in (
+        ("prediction", os.getenv("PROMPT_VERSION_PREDICTION")),
+        ("career_details", os.getenv("PROMPT_VERSION_CAREER_DETAILS")),
+    )
+    if version
+}
+# USD per 1M (input, output) tokens overriding or extending career/pricing.py,
+# as a JSON object like {"gpt-4o-mini": [0.15, 0.6]}
+LLM_PRICING = json.loads(os.getenv("LLM_PRICING", "{}"))
+
+# "Similar profile" reuse (career/similarity.py): a prediction whose hashed profile
+# vector is at least this cosine-similar is served instead of calling the LLM (0
+# disables reuse and indexing; 0.9 reused ~99% of one-skill variants with no false
+# reuse in benchmarks/similarity.py). `manage.py build_profile_index` fills the index.
+SIMILARITY_REUSE_THRESHOLD = float(os.getenv("SIMILARITY_REUSE_THRESHOLD", "0"))
+SIMILARITY_INDEX_DIR = os.getenv("SIMILARITY_INDEX_DIR", "/tmp/elevare-profile-index")
+SIMILARITY_DIM = int(os.getenv("SIMILARITY_DIM", "256"))
+SIMILARITY_TOP_K = int(os.getenv("SIMILARITY_TOP_K", "5"))
+
+# Google Sign-In ID tokens are verified offline (career/google_auth.py) with
+# signing keys cached for their Cache-Control max-age and refreshed in the background
+# GOOGLE_KEYS_REFRESH_MARGIN seconds before expiry; the audience is GOOGLE_CLIENT_ID.
+GOOGLE_KEY_SOURCE = os.getenv("GOOGLE_KEY_SOURCE", "career.google_auth.GoogleKeySource")
+GOOGLE_CERTS_URL = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+GOOGLE_TOKEN_LEEWAY = int(os.getenv("GOOGLE_TOKEN_LEEWAY", "10"))
+GOOGLE_KEYS_REFRESH_MARGIN = int(os.getenv("GOOGLE_KEYS_REFRESH_MARGIN", "300"))
+
+# JWT authentication (career/authentication.py): JWT_STATELESS_USER trusts the signed
+# user id without a query; otherwise users are cached for JWT_USER_CACHE_TTL seconds
+# (0 queries on every request) and dropped from the cache when saved or deleted
+JWT_STATELESS_USER = os.getenv("JWT_STATELESS_USER", "False").lower() in ("true", "1")
+JWT_USER_CACHE_TTL = int(os.getenv("JWT_USER_CACHE_TTL", "60"))
+JWT_USER_CACHE_SIZE = int(os.getenv("JWT_USER_CACHE_SIZE", "10000"))
+
+# Background generation jobs (?mode=job) drained by `manage.py run_generation_worker`
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_STALE_AFTER = int(os.getenv("JOB_STALE_AFTER", "300"))
+JOB_MAX_WAIT = int(os.getenv("JOB_MAX_WAIT", "30"))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "30"))  # finished jobs, see `manage.py purge_expired`
+
+# Request metrics: Server-Timing headers and a Prometheus /metrics endpoint. Each
+# worker process flushes its histograms to METRICS_DIR every METRICS_FLUSH_INTERVAL
+# seconds; METRICS_TOKEN, when set, is required as a Bearer token to scrape.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "False").lower() in ("true", "1")
+METRICS_DIR = os.getenv("METRICS_DIR") or os.getenv("PROMETHEUS_MULTIPROC_DIR") or "/tmp/elevare-metrics"
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# Payload blobs (career/payloads.py): zlib level, and how often a worker looks for a
+# dictionary from `manage.py train_payload_dictionary`
+PAYLOAD_COMPRESSION_LEVEL = int(os.getenv("PAYLOAD_COMPRESSION_LEVEL", "6"))
+PAYLOAD_DICTIONARY_REFRESH = int(os.getenv("PAYLOAD_DICTIONARY_REFRESH", "300"))
+
+# Bulk cohort prediction (/api/predict/batch/ and `manage.py predict_cohort`)
+COHORT_CONCURRENCY = int(os.getenv("COHORT_CONCURRENCY", "8"))
+COHORT_BULK_CHUNK = int(os.getenv("COHORT_BULK_CHUNK", "100"))
+COHORT_MAX_PROFILES = int(os.getenv("COHORT_MAX_PROFILES", "1000"))
+# Retries of an item whose database work hit a lock or lost its connection
+COHORT_DB_RETRIES = int(os.getenv("COHORT_DB_RETRIES", "3"))
+
+# Bulk user import (/api/users/import/ and `manage.py import_users`): rows per
+# chunk/transaction and password-hashing processes (-1: one per CPU, 0: inline)
+USER_IMPORT_CHUNK = int(os.getenv("USER_IMPORT_CHUNK", "500"))
+USER_IMPORT_HASH_WORKERS = int(os.getenv("USER_IMPORT_HASH_WORKERS", "-1"))
+
+# Admission control in front of predict/career/batch (career/admission.py). Token
+# buckets in requests per minute, shared by all workers through the database
+# ("local": per process); a rate of 0 turns that bucket off. Set the global rate
+# just under the provider's limit. Each process runs ADMISSION_MAX_ACTIVE of these
+# requests at once and queues ADMISSION_QUEUE_SIZE more for at most
+# ADMISSION_MAX_WAIT seconds; keep their sum below the worker's threads so reads
+# like /api/history/ always find a free one.
+ADMISSION_BUCKET_STORE = os.getenv("ADMISSION_BUCKET_STORE", "db")
+ADMISSION_USER_RATE = float(os.getenv("ADMISSION_USER_RATE", "30"))
+ADMISSION_USER_BURST = int(os.getenv("ADMISSION_USER_BURST", "10"))
+ADMISSION_GLOBAL_RATE = float(os.getenv("ADMISSION_GLOBAL_RATE", "0"))
+ADMISSION_GLOBAL_BURST = int(os.getenv("ADMISSION_GLOBAL_BURST", "100"))
+ADMISSION_MAX_ACTIVE = int(os.getenv("ADMISSION_MAX_ACTIVE", "16"))
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "16"))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "10"))
+
+# Speculative career-details prefetch after each saved prediction (career/prefetch.py):
+# background threads per process, titles queued per process, and a budget of
+# prefetches per minute shared by all workers (0: unlimited). See `manage.py prefetch_report`.
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "False").lower() in ("true", "1")
+PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "2"))
+PREFETCH_QUEUE_SIZE = int(os.getenv("PREFETCH_QUEUE_SIZE", "32"))
+PREFETCH_RATE = float(os.getenv("PREFETCH_RATE", "60"))
+PREFETCH_BURST = int(os.getenv("PREFETCH_BURST", "20"))
+
+# Career-title search (career/titles.py, /api/careers/search/): workers load the
+# snapshot written by `manage.py build_title_index` and add newer rows every
+# TITLE_INDEX_REFRESH seconds, TITLE_INDEX_CATCHUP_ROWS rows per table at most.
+# CAREER_TITLE_SNAP makes /api/career/ replace free text by the best known title
+# scoring at least CAREER_TITLE_SNAP_SCORE (0-1).
+TITLE_INDEX_PATH = os.getenv("TITLE_INDEX_PATH", "/tmp/elevare-title-index.npz")
+TITLE_INDEX_REFRESH = float(os.getenv("TITLE_INDEX_REFRESH", "30"))
+TITLE_INDEX_CATCHUP_ROWS = int(os.getenv("TITLE_INDEX_CATCHUP_ROWS", "5000"))
+CAREER_TITLE_SNAP = os.getenv("CAREER_TITLE_SNAP", "False").lower() in ("true", "1")
+CAREER_TITLE_SNAP_SCORE = float(os.getenv("CAREER_TITLE_SNAP_SCORE", "0.9"))
+
+# Analytics rollups (career/rollups.py): each worker buffers counter deltas and
+# writes them every ROLLUP_FLUSH_INTERVAL seconds (0: at every commit) or once
+# ROLLUP_MAX_PENDING keys are buffered. Read by /api/stats/ and the admin.
+ROLLUP_FLUSH_INTERVAL = float(os.getenv("ROLLUP_FLUSH_INTERVAL", "10"))
+ROLLUP_MAX_PENDING = int(os.getenv("ROLLUP_MAX_PENDING", "1000"))
+
+# Cold archive (career/archive.py): `manage.py archive_history` moves predictions and
+# suggestions older than ARCHIVE_AFTER_DAYS into compressed per-month segment files
+# under ARCHIVE_DIR, ARCHIVE_BATCH_SIZE rows per transaction. Every web worker must
+# see the same directory. `manage.py compact_archive` drops users deleted since.
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "/tmp/elevare-archive")
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+
+# /api/history/ keyset pagination
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "50"))
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "200"))
+ACTIVITY_EXPORT_CHUNK_SIZE = int(os.getenv("ACTIVITY_EXPORT_CHUNK_SIZE", "500"))
+
 # Default PK field
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -0,0 +1,23 @@
+"""
+Settings for the test suite (``pytest.ini`` selects them): the project
+settings with a local SQLite database, so a plain ``pytest`` runs offline.
+Tests replace the LLM client with the fakes in tests/conftest.py.
+"""
+import os
+
+from career_project.settings import *  # noqa: F401,F403
+from career_project.settings import BASE_DIR
+
+
+# The project database wants a DATABASE_URL and SSL; the test database is a
+# temporary file (tests/conftest.py)
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "test.sqlite3",
+        "OPTIONS": {"timeout": 20, "transaction_mode": "IMMEDIATE"},
+    }
+}
+
+# The SDK refuses to build a client without a key; no request leaves the process
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or "sk-test"
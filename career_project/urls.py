@@ -2,8 +2,11 @@
 from django.contrib import admin
 from django.urls import path,include
 
+from career.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path("api/", include("career.urls")),
+    path("metrics", metrics_view, name="metrics"),
    
 ]
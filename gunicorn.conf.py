@@ -0,0 +1,14 @@
+# Read by gunicorn from the working directory. With --preload the master imports
+# the app before forking; when_ready then warms it (career/startup.py) so that
+# workers start with the views and the OpenAI SDK already imported:
+#
+#     gunicorn career_project.wsgi --preload
+#
+# Clients, thread pools and database connections are still created per worker.
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from career.startup import warm_up
+
+        server.log.info("Warmed up in %.2fs before forking workers", warm_up())
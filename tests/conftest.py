@@ -0,0 +1,114 @@
+# tests/conftest.py
+import json
+from types import SimpleNamespace
+
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix, tmp_path_factory):
+    # SQLite's default in-memory test database shares one cache between connections and
+    # raises "database table is locked" at once instead of waiting: the thread pools of
+    # the transaction=True tests need a file that honours the busy timeout
+    from django.conf import settings
+
+    database = settings.DATABASES["default"]
+    test = database.setdefault("TEST", {})
+    if database["ENGINE"].endswith("sqlite3") and not test.get("NAME"):
+        test["NAME"] = str(tmp_path_factory.mktemp("db") / "test.sqlite3")
+        database.setdefault("OPTIONS", {}).setdefault("timeout", 20)
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def clear_prediction_cache():
+    # The in-process LRUs and admission queue outlive each test's database transaction
+    from career import admission, payloads, rollups, titles
+    from career.authentication import user_cache
+    from career.cache import prediction_cache
+
+    prediction_cache.clear()
+    user_cache.clear()
+    admission.reset()
+    payloads.clear()
+    rollups.clear()
+    titles.reset()
+    yield
+    prediction_cache.clear()
+    user_cache.clear()
+    admission.reset()
+    payloads.clear()
+    rollups.clear()
+    titles.reset()
+
+
+@pytest.fixture(autouse=True)
+def local_files(settings, tmp_path):
+    # History reads fall through to the archive and searches load the title snapshot: keep each test's own
+    settings.ARCHIVE_DIR = str(tmp_path / "archive")
+    settings.TITLE_INDEX_PATH = str(tmp_path / "titles.npz")
+
+
+@pytest.fixture(autouse=True)
+def rollups_at_commit(settings):
+    # No background flusher thread in tests: committed rows update the rollups at once
+    settings.ROLLUP_FLUSH_INTERVAL = 0
+
+
+class FakeCompletions:
+    """Stands in for ``client.chat.completions`` and records every call."""
+
+    def __init__(self, payload, model=None):
+        self.payload = payload
+        self.model = model  # what the response reports; None echoes the requested model
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        model = self.model or kwargs.get("model")
+        content = self.payload if isinstance(self.payload, str) else json.dumps(self.payload)
+        completion_tokens = len(content) // 4
+        usage = SimpleNamespace(prompt_tokens=100, completion_tokens=completion_tokens, total_tokens=100 + completion_tokens)
+        if kwargs.get("stream"):
+            chunks = [
+                SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + 16]))])
+                for i in range(0, len(content), 16)
+            ]
+            if (kwargs.get("stream_options") or {}).get("include_usage"):
+                chunks.append(SimpleNamespace(choices=[], usage=usage, model=model))
+            return iter(chunks)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage, model=model)
+
+
+FAKE_PREDICTION = {
+    "career_paths": [
+        {
+            "title": "Data Analyst",
+            "description": "Analyse data.",
+            "required_skills": ["SQL"],
+            "roadmap": {"short_term": ["a"], "medium_term": ["b"], "long_term": ["c"]},
+        }
+    ]
+}
+
+FAKE_DETAILS = {
+    "career": "Data Scientist",
+    "required_skills": ["Python"],
+    "free_courses": [{"title": "ML", "platform": "Coursera", "url": "https://example.com"}],
+    "roadmap": {"short_term": ["a"], "medium_term": ["b"], "long_term": ["c"]},
+}
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    from career import llm
+
+    completions = FakeCompletions(FAKE_PREDICTION)
+    monkeypatch.setattr(llm, "client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    return completions
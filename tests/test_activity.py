@@ -0,0 +1,58 @@
+# tests/test_activity.py
+import json
+
+import pytest
+from django.utils import timezone
+
+from career.catalog import store
+from career.models import CareerPrediction, CareerSuggestion
+from conftest import FAKE_DETAILS, FAKE_PREDICTION
+
+
+@pytest.fixture
+def active_user(django_user_model):
+    user = django_user_model.objects.create_user(username="active", password="testpass")
+    entry = store("Data Scientist", FAKE_DETAILS)
+    for i in range(3):
+        CareerPrediction.objects.create(user=user, user_input={"ug_course": f"c{i}"}, prediction=FAKE_PREDICTION)
+        CareerSuggestion.objects.create(user=user, career="Data Scientist", catalog=entry)
+    # Same instant in both tables: ties must still paginate deterministically
+    now = timezone.now()
+    CareerPrediction.objects.filter(user=user).update(created_at=now)
+    CareerSuggestion.objects.filter(user=user).update(created_at=now)
+    return user
+
+
+@pytest.mark.django_db
+def test_feed_merges_both_tables_across_pages(api_client, active_user):
+    api_client.force_authenticate(user=active_user)
+
+    items, url = [], "/api/activity/?limit=4"
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == 200
+        items.extend(response.json())
+        cursor = response.get("X-Next-Cursor")
+        url = f"/api/activity/?limit=4&cursor={cursor}" if cursor else None
+
+    keys = [(item["kind"], item["id"]) for item in items]
+    assert len(keys) == len(set(keys)) == 6
+    assert [kind for kind, _ in keys] == ["prediction"] * 3 + ["suggestion"] * 3
+    assert items[0]["career_titles"] == ["Data Analyst"]
+    assert items[-1]["career"] == "Data Scientist"
+
+
+@pytest.mark.django_db
+def test_ndjson_export_streams_full_payloads(api_client, active_user):
+    api_client.force_authenticate(user=active_user)
+
+    response = api_client.get("/api/activity/export/")
+
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+    assert len(lines) == 6
+    assert {line["kind"] for line in lines} == {"prediction", "suggestion"}
+    suggestion = next(line for line in lines if line["kind"] == "suggestion")
+    assert suggestion["payload"] == FAKE_DETAILS
+    prediction = next(line for line in lines if line["kind"] == "prediction")
+    assert prediction["payload"] == FAKE_PREDICTION and "ug_course" in prediction["input"]
@@ -0,0 +1,104 @@
+# tests/test_admission.py
+import asyncio
+import threading
+import time
+
+import pytest
+from django.http import StreamingHttpResponse
+
+from career.admission import AdmissionQueue, DatabaseBucketStore, LocalBucketStore, Rejected, _held
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(username="looper", password="testpass")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("store", [LocalBucketStore(), DatabaseBucketStore()], ids=["local", "db"])
+def test_bucket_refills_at_rate(store):
+    now = 1_000_000.0
+    assert [store.take("user:1", rate=1.0, burst=2, now=now) for _ in range(3)] == [0, 0, 1.0]
+    assert store.take("user:1", rate=1.0, burst=2, now=now + 0.5) == pytest.approx(0.5)
+    assert store.take("user:1", rate=1.0, burst=2, now=now + 1.0) == 0
+    store.refund("user:1", burst=2)
+    assert store.take("user:1", rate=1.0, burst=2, now=now + 1.0) == 0
+    assert store.take("user:2", rate=1.0, burst=2, now=now) == 0  # buckets are per key
+
+
+@pytest.mark.django_db
+def test_user_quota_answers_429_and_reads_still_pass(api_client, user, fake_llm, settings):
+    settings.ADMISSION_USER_RATE = 1
+    settings.ADMISSION_USER_BURST = 2
+    api_client.force_authenticate(user=user)
+    statuses = [api_client.post("/api/predict/", {"ug_course": "BSc"}, format="json") for _ in range(3)]
+    assert [response.status_code for response in statuses] == [200, 200, 429]
+    assert int(statuses[2]["Retry-After"]) > 0
+    assert api_client.get("/api/history/").status_code == 200
+
+    settings.ADMISSION_USER_RATE = 0
+    settings.ADMISSION_GLOBAL_RATE = 1
+    settings.ADMISSION_GLOBAL_BURST = 1
+    assert api_client.post("/api/predict/", {"ug_course": "BSc"}, format="json").status_code == 200
+    response = api_client.post("/api/predict/", {"ug_course": "BSc"}, format="json")
+    assert response.status_code == 503 and "Retry-After" in response
+
+
+def test_interactive_lane_goes_before_bulk():
+    queue = AdmissionQueue(slots=1, max_queue=4)
+    held = queue.acquire("interactive", time.monotonic() + 5)
+    order = []
+
+    def wait(lane):
+        ticket = queue.acquire(lane, time.monotonic() + 5)
+        order.append(lane)
+        ticket.release()
+
+    threads = [threading.Thread(target=wait, args=(lane,)) for lane in ("bulk", "interactive")]
+    for thread in threads:
+        thread.start()
+        while queue.stats()["waiting"] < threads.index(thread) + 1:
+            time.sleep(0.001)
+    held.release()
+    for thread in threads:
+        thread.join()
+    assert order == ["interactive", "bulk"]
+    assert queue.stats()["active"] == 0
+
+
+def test_requests_that_cannot_meet_their_deadline_are_shed():
+    queue = AdmissionQueue(slots=1, max_queue=1)
+    held = queue.acquire("interactive", time.monotonic() + 5)
+
+    queue.service_time = 5.0  # a slot frees every ~5s: a 1s deadline cannot be met
+    with pytest.raises(Rejected) as shed:
+        queue.acquire("interactive", time.monotonic() + 1)
+    assert shed.value.status == 503 and shed.value.retry_after >= 5
+
+    queue.service_time = 0.0
+    with pytest.raises(Rejected):  # estimate fits but nothing frees the slot in time
+        asyncio.run(queue.aacquire("interactive", time.monotonic() + 0.05))
+    assert queue.stats()["waiting"] == 0
+
+    threading.Timer(0.05, held.release).start()
+    asyncio.run(queue.aacquire("interactive", time.monotonic() + 5)).release()
+    assert queue.stats() | {"service_time": None} == {
+        "admitted": 1, "queued": 2, "shed": 1, "expired": 1, "active": 0, "waiting": 0, "service_time": None,
+    }
+
+
+def test_async_streams_stay_async_and_release_at_the_end():
+    queue = AdmissionQueue(slots=1, max_queue=0)
+
+    async def body():
+        yield "a"
+        yield "b"
+
+    async def read():
+        ticket = await queue.aacquire("interactive", time.monotonic() + 5)
+        response = _held(StreamingHttpResponse(body()), ticket)
+        assert response.is_async and queue.stats()["active"] == 1
+        return [chunk async for chunk in response.streaming_content]
+
+    assert asyncio.run(read()) == [b"a", b"b"]
+    assert queue.stats()["active"] == 0
@@ -0,0 +1,164 @@
+# tests/test_archive.py
+import datetime
+import json
+
+import pytest
+from conftest import FAKE_PREDICTION
+from django.core.management import call_command
+from django.utils import timezone
+
+from career import archive, payloads
+from career.models import CareerPrediction, CareerSuggestion, PayloadBlob
+
+
+def backdate(model, pk, days):
+    model.objects.filter(pk=pk).update(created_at=timezone.now() - datetime.timedelta(days=days))
+
+
+def pages(api_client, query=""):
+    seen, url = [], f"/api/history/?limit=3{query}"
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == 200
+        seen.extend(response.json())
+        cursor = response.get("X-Next-Cursor")
+        url = f"/api/history/?limit=3{query}&cursor={cursor}" if cursor else None
+    return seen
+
+
+def pages_of(api_client, url):
+    seen = []
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == 200
+        seen.extend(response.json())
+        cursor = response.get("X-Next-Cursor")
+        url = f"{url.split('&cursor=')[0]}&cursor={cursor}" if cursor else None
+    return seen
+
+
+@pytest.mark.django_db
+def test_history_pages_through_table_then_archive(api_client, django_user_model):
+    user = django_user_model.objects.create_user(username="veteran", password="testpass")
+    other = django_user_model.objects.create_user(username="neighbour", password="testpass")
+    for i in range(8):
+        # Old rows a month apart, the newest three still recent
+        row = CareerPrediction.objects.create(user=user, user_input={"ug_course": f"c{i}"}, prediction=FAKE_PREDICTION)
+        backdate(CareerPrediction, row.pk, 520 - i * 31 if i < 5 else 8 - i)
+        CareerPrediction.objects.create(user=other, user_input={"ug_course": "x"}, prediction=FAKE_PREDICTION)
+    suggestion = CareerSuggestion.objects.create(user=user, career="Data Analyst", suggestion={"overview": "old"})
+    backdate(CareerSuggestion, suggestion.pk, 500)
+
+    api_client.force_authenticate(user=user)
+    before = pages(api_client)
+    call_command("archive_history", "--days", "365", "--batch-size", "2")
+
+    assert CareerPrediction.objects.filter(user=user).count() == 3
+    assert not CareerSuggestion.objects.exists()
+    # Archived rows' own blobs are freed; the shared prediction payload is still referenced
+    inputs = {payloads.digest_of({"ug_course": f"c{i}"}) for i in range(8)}
+    assert PayloadBlob.objects.filter(pk__in=inputs).count() == 3
+    assert PayloadBlob.objects.filter(pk=payloads.digest_of(FAKE_PREDICTION)).exists()
+    assert not PayloadBlob.objects.filter(pk=payloads.digest_of({"overview": "old"})).exists()
+    assert len(archive.segments("predictions")) >= 4
+    assert archive.history("suggestions", user.pk)[0]["suggestion"] == {"overview": "old"}
+
+    # Same rows, same order, same rendering; the cursor crosses from table to archive
+    assert pages(api_client) == before
+    assert [row["user_input"]["ug_course"] for row in before] == [f"c{i}" for i in range(7, -1, -1)]
+    projected = pages(api_client, "&fields=id,prediction")
+    assert [row["id"] for row in projected] == [row["id"] for row in before]
+    assert projected[-1]["prediction"] == FAKE_PREDICTION
+
+
+@pytest.mark.django_db
+def test_compaction_drops_deleted_users(django_user_model):
+    keep = django_user_model.objects.create_user(username="stays", password="testpass")
+    leave = django_user_model.objects.create_user(username="leaves", password="testpass")
+    old = timezone.now() - datetime.timedelta(days=400)
+    for user in (keep, leave, keep):
+        row = CareerPrediction.objects.create(user=user, user_input={"ug_course": user.username}, prediction=FAKE_PREDICTION)
+        CareerPrediction.objects.filter(pk=row.pk).update(created_at=old)
+    call_command("archive_history", "--kind", "predictions")
+    [segment] = archive.segments("predictions")
+    size = segment.data_path.stat().st_size
+    leave_pk = leave.pk
+    leave.delete()
+
+    call_command("compact_archive")
+    [compacted] = archive.segments("predictions")
+    assert compacted.generation == segment.generation + 1 and not segment.index_path.exists()
+    assert compacted.data_path.stat().st_size < size
+    assert archive.history("predictions", leave_pk) == []
+    assert [row["user_input"] for row in archive.history("predictions", keep.pk)] == [{"ug_course": "stays"}] * 2
+
+    # Later batches append to the compacted generation
+    row = CareerPrediction.objects.create(user=keep, user_input={"ug_course": "late"}, prediction=FAKE_PREDICTION)
+    CareerPrediction.objects.filter(pk=row.pk).update(created_at=old)
+    call_command("archive_history", "--kind", "predictions")
+    assert [segment.generation for segment in archive.segments("predictions")] == [compacted.generation]
+    assert [row["user_input"]["ug_course"] for row in archive.history("predictions", keep.pk)] == ["late", "stays", "stays"]
+
+
+@pytest.mark.django_db
+def test_feed_and_export_continue_into_the_archive(api_client, django_user_model):
+    user = django_user_model.objects.create_user(username="exporter", password="testpass")
+    for i, days in enumerate((600, 400, 2)):
+        row = CareerPrediction.objects.create(user=user, user_input={"ug_course": f"c{i}"}, prediction=FAKE_PREDICTION)
+        backdate(CareerPrediction, row.pk, days)
+        suggestion = CareerSuggestion.objects.create(user=user, career=f"Career {i}", suggestion={"step": i})
+        backdate(CareerSuggestion, suggestion.pk, days)
+    api_client.force_authenticate(user=user)
+    before = pages_of(api_client, "/api/activity/?limit=2")
+    call_command("archive_history", "--days", "365")
+    assert CareerPrediction.objects.count() == CareerSuggestion.objects.count() == 1
+
+    assert pages_of(api_client, "/api/activity/?limit=2") == before
+    assert [item["career"] for item in before if item["kind"] == "suggestion"] == ["Career 2", "Career 1", "Career 0"]
+    response = api_client.get("/api/activity/export/")
+    lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+    assert [(line["kind"], line["id"]) for line in lines] == [(item["kind"], item["id"]) for item in before]
+    oldest = {line["kind"]: line for line in lines}  # the last line of each kind
+    assert oldest["suggestion"]["payload"] == {"step": 0} and oldest["prediction"]["input"] == {"ug_course": "c0"}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_rearchiving_a_batch_does_not_duplicate_rows(django_user_model, monkeypatch):
+    user = django_user_model.objects.create_user(username="retried", password="testpass")
+    for i in range(3):
+        row = CareerPrediction.objects.create(user=user, user_input={"ug_course": f"c{i}"}, prediction=FAKE_PREDICTION)
+        backdate(CareerPrediction, row.pk, 400)
+    append = archive.append
+
+    def append_then_fail(*args):
+        append(*args)
+        raise RuntimeError("database went away before the delete committed")
+
+    monkeypatch.setattr(archive, "append", append_then_fail)
+    with pytest.raises(RuntimeError):
+        call_command("archive_history", "--kind", "predictions")
+    assert CareerPrediction.objects.count() == 3 and len(archive.history("predictions", user.pk)) == 3
+
+    monkeypatch.setattr(archive, "append", append)
+    call_command("archive_history", "--kind", "predictions")
+    assert not CareerPrediction.objects.exists()
+    assert sorted(row["user_input"]["ug_course"] for row in archive.history("predictions", user.pk)) == ["c0", "c1", "c2"]
+
+
+@pytest.mark.django_db
+def test_history_of_unarchived_users_skips_listing_and_scans(django_user_model, monkeypatch):
+    archived = django_user_model.objects.create_user(username="archived", password="testpass")
+    fresh = django_user_model.objects.create_user(username="fresh", password="testpass")
+    row = CareerPrediction.objects.create(user=archived, user_input={"ug_course": "old"}, prediction=FAKE_PREDICTION)
+    backdate(CareerPrediction, row.pk, 400)
+    call_command("archive_history", "--kind", "predictions")
+    monkeypatch.setattr(archive, "MTIME_GRANULARITY", 0)
+    assert len(archive.history("predictions", archived.pk)) == 1
+
+    listings, scans = [], []
+    listdir, user_frames = archive.os.listdir, archive.Segment.user_frames
+    monkeypatch.setattr(archive.os, "listdir", lambda path: listings.append(path) or listdir(path))
+    monkeypatch.setattr(archive.Segment, "user_frames", lambda self, user_id: scans.append(user_id) or user_frames(self, user_id))
+    assert archive.history("predictions", fresh.pk) == []
+    assert (listings, scans) == ([], [])
+    assert len(archive.history("predictions", archived.pk)) == 1 and scans == [archived.pk]
@@ -0,0 +1,103 @@
+# tests/test_async_views.py
+import json
+from types import SimpleNamespace
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from career import llm
+from career.async_views import AsyncCareerDetailsView, AsyncCareerPredictView
+from career.models import CareerPrediction, CareerSuggestion
+
+from conftest import FAKE_DETAILS, FAKE_PREDICTION
+
+
+class FakeAsyncCompletions:
+    def __init__(self, payload):
+        self.payload = payload
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        content = json.dumps(self.payload)
+        if kwargs.get("stream"):
+            return self.chunks(content)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def chunks(self, content):
+        for i in range(0, len(content), 16):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + 16]))])
+
+
+@pytest.fixture
+def fake_async_llm(monkeypatch):
+    completions = FakeAsyncCompletions(FAKE_PREDICTION)
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(llm, "get_async_client", lambda: fake_client)
+    return completions
+
+
+def call(view, user, data, path="/"):
+    token = RefreshToken.for_user(user).access_token if user else None
+    headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"} if token else {}
+    request = RequestFactory().post(path, json.dumps(data), content_type="application/json", **headers)
+    return async_to_sync(view.as_view())(request)
+
+
+@pytest.mark.django_db
+def test_async_predict_generates_then_hits_cache(fake_async_llm, django_user_model):
+    user = django_user_model.objects.create_user(username="async", password="testpass")
+    profile = {"ug_course": "BSc", "skills": ["Python"]}
+
+    first = call(AsyncCareerPredictView, user, profile)
+    second = call(AsyncCareerPredictView, user, profile)
+
+    assert first.status_code == second.status_code == 200
+    assert json.loads(first.content)["career_paths"] == FAKE_PREDICTION["career_paths"]
+    assert (first["X-Cache"], second["X-Cache"]) == ("MISS", "HIT")
+    assert len(fake_async_llm.calls) == 1
+    assert CareerPrediction.objects.filter(user=user).count() == 2
+
+
+@pytest.mark.django_db
+def test_async_career_details_use_catalog(fake_async_llm, django_user_model):
+    fake_async_llm.payload = FAKE_DETAILS
+    user = django_user_model.objects.create_user(username="async", password="testpass")
+
+    response = call(AsyncCareerDetailsView, user, {"career": "Data Scientist"})
+
+    assert response.status_code == 200
+    assert json.loads(response.content)["roadmap"] == FAKE_DETAILS["roadmap"]
+    assert CareerSuggestion.objects.get(user=user).payload == FAKE_DETAILS
+
+
+@pytest.mark.django_db
+def test_async_views_require_authentication(fake_async_llm):
+    response = call(AsyncCareerPredictView, None, {"ug_course": "BSc"})
+    assert response.status_code == 401
+    assert fake_async_llm.calls == []
+
+
+@pytest.mark.django_db
+def test_async_views_reject_non_object_bodies(fake_async_llm, django_user_model):
+    user = django_user_model.objects.create_user(username="async", password="testpass")
+    for body in (["Data Scientist"], "Data Scientist", 42):
+        assert call(AsyncCareerDetailsView, user, body).status_code == 400
+    assert fake_async_llm.calls == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_predict_stream_persists_the_generation(fake_async_llm, django_user_model):
+    user = django_user_model.objects.create_user(username="async", password="testpass")
+    response = call(AsyncCareerPredictView, user, {"ug_course": "BSc"}, path="/?stream=1")
+
+    async def body():
+        return b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+    events = async_to_sync(body)()
+    assert events.startswith("event: career_path") and "event: done" in events
+    assert fake_async_llm.calls[0]["stream"] is True
+    assert CareerPrediction.objects.get(user=user).prediction == FAKE_PREDICTION
@@ -0,0 +1,78 @@
+# tests/test_authentication.py
+import pytest
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from career.authentication import issue_tokens
+from career.middleware import WebSessionMiddleware
+from career.models import CareerPrediction
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(username="jwtuser", password="testpass")
+
+
+@pytest.fixture
+def jwt_client(api_client, user):
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    return api_client
+
+
+def user_queries(captured):
+    return [q["sql"] for q in captured.captured_queries if 'FROM "auth_user"' in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_user_cache_skips_lookup_until_user_changes(jwt_client, user, settings):
+    settings.JWT_USER_CACHE_TTL = 60
+    assert jwt_client.get("/api/history/").status_code == 200
+    with CaptureQueriesContext(connection) as captured:
+        assert jwt_client.get("/api/history/").status_code == 200
+    assert user_queries(captured) == []
+
+    user.is_active = False
+    user.save()  # post_save drops the cached row
+    assert jwt_client.get("/api/history/").status_code == 401
+
+
+@pytest.mark.django_db
+def test_stateless_user_needs_no_query(jwt_client, user, fake_llm, settings):
+    settings.JWT_STATELESS_USER = True
+    with CaptureQueriesContext(connection) as captured:
+        assert jwt_client.post("/api/predict/", {"ug_course": "BSc"}, format="json").status_code == 200
+    assert user_queries(captured) == []
+    assert CareerPrediction.objects.get().user_id == user.pk
+
+
+@pytest.mark.django_db
+def test_stateless_user_carries_flags_and_is_read_only(api_client, django_user_model, settings):
+    settings.JWT_STATELESS_USER = True
+    admin = django_user_model.objects.create_user(username="admin", password="testpass", is_staff=True)
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(admin).access_token}")
+    response = api_client.get("/api/stats/")
+    assert response.status_code == 200
+    assert response.wsgi_request.user.username == "admin"
+    with pytest.raises(TypeError):
+        response.wsgi_request.user.save()
+
+    admin.is_active = False
+    api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {issue_tokens(admin).access_token}")
+    assert api_client.get("/api/stats/").status_code == 401
+
+
+def test_api_only_profile_skips_sessions(settings):
+    settings.API_ONLY_MIDDLEWARE = True
+    seen = {}
+
+    def view(request):
+        seen[request.path] = hasattr(request, "session")
+        return HttpResponse()
+
+    middleware = WebSessionMiddleware(view)
+    middleware(RequestFactory().get("/api/history/"))
+    middleware(RequestFactory().get("/admin/"))
+    assert seen == {"/api/history/": False, "/admin/": True}
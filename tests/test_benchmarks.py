@@ -0,0 +1,39 @@
+# tests/test_benchmarks.py
+import random
+
+import pytest
+
+from benchmarks.fake_openai import FakeOpenAIServer, parse_latency
+from benchmarks.run import drive, summarize
+
+
+def test_latency_specs():
+    rng = random.Random(1)
+    assert parse_latency("0.25")() == 0.25
+    assert all(0.1 <= parse_latency("uniform:0.1:0.2", rng)() <= 0.2 for _ in range(100))
+    assert parse_latency("lognormal:0.8:0.3", rng)() > 0
+    with pytest.raises(ValueError):
+        parse_latency("gamma:1")
+
+
+def test_summarize_percentiles():
+    summary = summarize([i / 1000 for i in range(1, 101)], errors=2, elapsed=2.0)
+    assert summary["requests"] == 102
+    assert summary["p50_ms"] == 51.0
+    assert summary["p95_ms"] == 96.0
+    assert summary["p99_ms"] == 100.0
+    assert summary["throughput_rps"] == 50.0
+
+
+class ChatScenario:
+    def request(self, i):
+        return "POST", "/v1/chat/completions", {"json": {"model": "m", "messages": [{"role": "user", "content": "hi"}]}}
+
+
+def test_drive_counts_errors_against_fake_server():
+    with FakeOpenAIServer(latency="uniform:0.001:0.005") as server:
+        server.script(500, 500)
+        summary = drive(server.url.removesuffix("/v1"), ChatScenario(), requests=20, concurrency=4)
+    assert summary["requests"] == 20
+    assert summary["errors"] == 2
+    assert summary["p95_ms"] is not None
@@ -0,0 +1,72 @@
+# tests/test_cache.py
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from career.cache import LRUCache, normalize_profile, prediction_cache, profile_key
+from career.models import PredictionCacheEntry
+
+
+def test_equivalent_profiles_share_a_key():
+    a = {"ug_course": "BTech ", "skills": ["Python", "sql", "python"], "ug_cgpa": 7.1}
+    b = {"ug_course": "btech", "skills": ["SQL", "Python"], "ug_cgpa": 7.4}
+    assert normalize_profile(a) == {"ug_course": "btech", "skills": ["python", "sql"], "ug_cgpa": 7.0}
+    assert profile_key(a) == profile_key(b)
+    assert profile_key(a) != profile_key({**b, "ug_cgpa": 7.6})
+
+
+def test_lru_evicts_oldest_and_expires():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    cache.set("d", 4, ttl=-1)
+    assert cache.get("d") is None
+
+
+@pytest.mark.django_db
+def test_repeat_profile_is_served_from_cache(api_client, fake_llm, django_user_model):
+    user = django_user_model.objects.create_user(username="cacheuser", password="testpass")
+    api_client.force_authenticate(user=user)
+    profile = {"ug_course": "BSc", "skills": ["Python", "SQL"], "ug_cgpa": "8.2"}
+
+    first = api_client.post("/api/predict/", profile, format="json")
+    assert first.status_code == 200
+    assert first["X-Cache"] == "MISS"
+
+    second = api_client.post("/api/predict/", {**profile, "skills": ["sql", "python"]}, format="json")
+    assert second.status_code == 200
+    assert second["X-Cache"] == "HIT"
+    assert second["X-Cache-Tier"] == "memory"
+    assert len(fake_llm.calls) == 1
+
+    prediction_cache.local.clear()
+    third = api_client.post("/api/predict/", profile, format="json")
+    assert third["X-Cache-Tier"] == "db"
+    assert user.career_predictions.count() == 3
+    assert PredictionCacheEntry.objects.get().hits == 1
+
+
+@pytest.mark.django_db
+def test_long_expired_entries_are_purged(settings):
+    settings.PREDICTION_CACHE_STALE_DAYS = 7
+    now = timezone.now()
+    for key, expired_days_ago in (("fresh", -1), ("stale", 3), ("old", 10)):
+        PredictionCacheEntry.objects.create(key=key, payload={}, expires_at=now - timedelta(days=expired_days_ago))
+    call_command("purge_expired", "--only", "cache")
+    # Recently expired entries are kept for the stale fallback
+    assert sorted(PredictionCacheEntry.objects.values_list("key", flat=True)) == ["fresh", "stale"]
+
+
+@pytest.mark.django_db
+def test_invalid_profile_is_rejected(api_client, fake_llm, django_user_model):
+    user = django_user_model.objects.create_user(username="cacheuser", password="testpass")
+    api_client.force_authenticate(user=user)
+    response = api_client.post("/api/predict/", {"skills": ["Python"]}, format="json")
+    assert response.status_code == 400
+    assert fake_llm.calls == []
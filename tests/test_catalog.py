@@ -0,0 +1,53 @@
+# tests/test_catalog.py
+from datetime import timedelta
+
+import pytest
+
+from career.catalog import normalize_career_name
+from career.models import CareerCatalogEntry, CareerSuggestion
+from conftest import FAKE_DETAILS
+
+
+def test_normalize_career_name():
+    assert normalize_career_name("  Data   Scientist ") == normalize_career_name("data scientist")
+
+
+@pytest.mark.django_db
+def test_catalog_is_shared_between_users(api_client, fake_llm, django_user_model):
+    fake_llm.payload = FAKE_DETAILS
+    first_user = django_user_model.objects.create_user(username="first", password="testpass")
+    second_user = django_user_model.objects.create_user(username="second", password="testpass")
+
+    api_client.force_authenticate(user=first_user)
+    first = api_client.post("/api/career/", {"career": "Data Scientist"}, format="json")
+    assert first.status_code == 200
+    assert first["X-Cache"] == "MISS"
+
+    api_client.force_authenticate(user=second_user)
+    second = api_client.post("/api/career/", {"career": "data scientist "}, format="json")
+    assert second.status_code == 200
+    assert second["X-Cache"] == "HIT"
+    assert second.json()["free_courses"] == FAKE_DETAILS["free_courses"]
+
+    assert len(fake_llm.calls) == 1
+    assert CareerCatalogEntry.objects.count() == 1
+    assert not CareerSuggestion.objects.filter(suggestion_json__isnull=False).exists()
+    assert not CareerSuggestion.objects.filter(suggestion_blob__isnull=False).exists()
+    assert CareerSuggestion.objects.get(user=second_user).payload == FAKE_DETAILS
+
+
+@pytest.mark.django_db
+def test_expired_entry_is_regenerated(api_client, fake_llm, django_user_model, settings):
+    fake_llm.payload = FAKE_DETAILS
+    user = django_user_model.objects.create_user(username="first", password="testpass")
+    api_client.force_authenticate(user=user)
+    api_client.post("/api/career/", {"career": "Data Scientist"}, format="json")
+
+    entry = CareerCatalogEntry.objects.get()
+    entry.generated_at -= timedelta(seconds=settings.CAREER_CATALOG_TTL + 1)
+    entry.save()
+
+    response = api_client.post("/api/career/", {"career": "Data Scientist"}, format="json")
+    assert response["X-Cache"] == "MISS"
+    assert len(fake_llm.calls) == 2
+    assert CareerCatalogEntry.objects.count() == 1
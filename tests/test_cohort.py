@@ -0,0 +1,110 @@
+# tests/test_cohort.py
+import json
+import threading
+import time
+
+import pytest
+from django.core.management import call_command
+from django.db import OperationalError
+
+from career.cohort import predict_cohort
+from career.models import CareerPrediction
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(username="cohortuser", password="testpass")
+
+
+def ndjson(response):
+    return [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_batch_dedupes_and_reports_per_item(api_client, fake_llm, user):
+    api_client.force_authenticate(user=user)
+    profiles = [
+        {"ref": "s1", "profile": {"ug_course": "BTech", "skills": ["Python"]}},
+        {"ug_course": "BSc"},
+        {"skills": ["no course"]},
+        {"ref": "s4", "profile": {"ug_course": "btech ", "skills": ["python"]}},
+    ]
+
+    response = api_client.post("/api/predict/batch/", {"profiles": profiles}, format="json")
+    assert response.status_code == 200
+    lines = ndjson(response)
+    summary = lines.pop()["summary"]
+    results = {line["index"]: line for line in lines}
+
+    assert summary["ok"] == 3 and summary["invalid"] == 1 and summary["unique"] == 2
+    assert len(fake_llm.calls) == 2
+    assert results[2]["status"] == "invalid"
+    assert results[0]["ref"] == "s1"
+    assert results[3]["status"] == "ok" and results[3]["duplicate_of"] == 0
+    assert CareerPrediction.objects.filter(user=user).count() == 3
+    assert CareerPrediction.objects.get(pk=results[1]["id"]).career_titles == ["Data Analyst"]
+
+
+@pytest.mark.django_db
+def test_batch_rejects_empty_body(api_client, user):
+    api_client.force_authenticate(user=user)
+    assert api_client.post("/api/predict/batch/", {"profiles": []}, format="json").status_code == 400
+
+
+@pytest.mark.django_db(transaction=True)
+def test_fan_out_is_bounded_by_concurrency(fake_llm, user):
+    create = fake_llm.create
+    lock = threading.Lock()
+    active = {"now": 0, "max": 0}
+
+    def slow_create(**kwargs):
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        time.sleep(0.2)
+        with lock:
+            active["now"] -= 1
+        return create(**kwargs)
+
+    fake_llm.create = slow_create
+    profiles = [{"ug_course": f"Course {i}"} for i in range(6)]
+
+    started = time.monotonic()
+    results = list(predict_cohort(user, profiles, concurrency=3, chunk_size=2))
+    elapsed = time.monotonic() - started
+
+    assert results[-1]["summary"]["ok"] == 6
+    assert active["max"] == 3
+    assert elapsed < 6 * 0.2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_predict_cohort_command(fake_llm, user, tmp_path):
+    source = tmp_path / "cohort.jsonl"
+    source.write_text('{"ug_course": "BA"}\n\n{"ref": "x", "profile": {"ug_course": "BCom"}}\n')
+    output = tmp_path / "results.jsonl"
+
+    call_command("predict_cohort", str(source), "--user", "cohortuser", "--output", str(output))
+
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert lines[-1]["summary"]["ok"] == 2
+    assert CareerPrediction.objects.filter(user=user).count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_database_errors_are_retried(fake_llm, user, monkeypatch):
+    from career import services
+
+    resolve = services.resolve_prediction
+    failures = {"left": 2}
+
+    def flaky(*args, **kwargs):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise OperationalError("database table is locked")
+        return resolve(*args, **kwargs)
+
+    monkeypatch.setattr(services, "resolve_prediction", flaky)
+    results = list(predict_cohort(user, [{"ug_course": "BA"}], concurrency=1))
+    assert results[-1]["summary"]["ok"] == 1
+    assert results[-1]["summary"]["error"] == 0
@@ -0,0 +1,89 @@
+# tests/test_google_auth.py
+import pytest
+
+from benchmarks.fake_google import AUDIENCE, KEY_ID, FakeGoogleKeySource, fake_google_token, jwks
+from career import google_auth
+from career.google_auth import GoogleTokenVerifier, InvalidGoogleToken, StaticKeySource, max_age
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_verifies_locally_with_cached_keys():
+    source = FakeGoogleKeySource(max_age=3600)
+    verifier = GoogleTokenVerifier(source, AUDIENCE)
+    for n in range(5):
+        claims = verifier.verify(fake_google_token(f"user{n}@example.com"))
+        assert claims["email"] == f"user{n}@example.com"
+    assert source.fetches == 1
+
+    with pytest.raises(InvalidGoogleToken):
+        verifier.verify(fake_google_token("a@example.com", audience="someone-else"))
+    with pytest.raises(InvalidGoogleToken):
+        verifier.verify(fake_google_token("a@example.com", lifetime=-60))
+    with pytest.raises(InvalidGoogleToken):
+        verifier.verify("not-a-jwt")
+
+
+def test_refreshes_before_expiry_and_on_unknown_keys(monkeypatch):
+    clock = Clock()
+    source = FakeGoogleKeySource(max_age=3600)
+    verifier = GoogleTokenVerifier(source, AUDIENCE, refresh_margin=300, clock=clock)
+    token = fake_google_token("a@example.com")
+    verifier.verify(token)
+
+    started = []
+    monkeypatch.setattr(google_auth.threading, "Thread", lambda target, **kwargs: started.append(target) or _Started())
+    clock.now += 3400  # inside the refresh margin: keys still served, refresh in the background
+    verifier.verify(token)
+    assert source.fetches == 1 and len(started) == 1
+    started[0]()
+    assert source.fetches == 2
+
+    # A key id missing from the cached set triggers one (rate-limited) refetch
+    verifier._keys = {"rotated-out": verifier._keys[KEY_ID]}
+    clock.now += 60
+    verifier.verify(token)
+    assert source.fetches == 3
+
+
+def test_fetch_failure_keeps_previous_keys():
+    clock = Clock()
+    source = StaticKeySource(jwks(), max_age=600)
+    verifier = GoogleTokenVerifier(source, AUDIENCE, refresh_margin=60, clock=clock)
+    token = fake_google_token("a@example.com")
+    verifier.verify(token)
+
+    def broken():
+        raise OSError("network down")
+
+    source.fetch = broken
+    clock.now += 700
+    assert verifier.verify(token)["sub"] == "a@example.com"
+    assert max_age("public, max-age=19930, must-revalidate") == 19930
+
+
+@pytest.mark.django_db
+def test_google_auth_view(api_client, settings):
+    settings.GOOGLE_KEY_SOURCE = "benchmarks.fake_google.FakeGoogleKeySource"
+    settings.GOOGLE_CLIENT_ID = AUDIENCE
+    google_auth._verifier["instance"] = None
+    try:
+        response = api_client.post("/api/auth/google/", {"credential": fake_google_token("g@example.com", name="G")}, format="json")
+        assert response.status_code == 200
+        assert response.json()["is_new_user"] is True and response.json()["access"]
+
+        forged = fake_google_token("g@example.com", audience="another-app")
+        assert api_client.post("/api/auth/google/", {"credential": forged}, format="json").status_code == 400
+    finally:
+        google_auth._verifier["instance"] = None
+
+
+class _Started:
+    def start(self):
+        pass
@@ -0,0 +1,55 @@
+# tests/test_history.py
+import pytest
+
+from career.models import CareerPrediction
+from conftest import FAKE_PREDICTION
+
+
+@pytest.fixture
+def history_user(django_user_model):
+    user = django_user_model.objects.create_user(username="historian", password="testpass")
+    for i in range(5):
+        CareerPrediction.objects.create(user=user, user_input={"ug_course": f"c{i}"}, prediction=FAKE_PREDICTION)
+    return user
+
+
+@pytest.mark.django_db
+def test_keyset_pages_cover_history_once(api_client, history_user):
+    api_client.force_authenticate(user=history_user)
+
+    seen, url = [], "/api/history/?limit=2"
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == 200
+        seen.extend(row["id"] for row in response.json())
+        cursor = response.get("X-Next-Cursor")
+        url = f"/api/history/?limit=2&cursor={cursor}" if cursor else None
+
+    expected = list(CareerPrediction.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+    assert seen == expected
+    # Storage and accounting columns stay out of the response
+    row = api_client.get("/api/history/?limit=1").json()[0]
+    assert set(row) == {"id", "user_input", "prediction", "created_at", "user", "career_titles"}
+
+
+@pytest.mark.django_db
+def test_summary_projection(api_client, history_user):
+    api_client.force_authenticate(user=history_user)
+    rows = api_client.get("/api/history/?fields=summary").json()
+    assert set(rows[0]) == {"id", "created_at", "career_titles"}
+    assert rows[0]["career_titles"] == ["Data Analyst"]
+
+    assert api_client.get("/api/history/?fields=id,bogus").status_code == 400
+    assert api_client.get("/api/history/?cursor=not-a-cursor").status_code == 400
+
+
+@pytest.mark.django_db
+def test_unchanged_page_returns_304(api_client, history_user):
+    api_client.force_authenticate(user=history_user)
+    first = api_client.get("/api/history/?limit=3")
+    etag = first["ETag"]
+
+    assert api_client.get("/api/history/?limit=3", HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    CareerPrediction.objects.create(user=history_user, user_input={}, prediction=FAKE_PREDICTION)
+    assert api_client.get("/api/history/?limit=3", HTTP_IF_NONE_MATCH=etag).status_code == 200
@@ -0,0 +1,111 @@
+# tests/test_jobs.py
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import OperationalError
+from django.utils import timezone
+
+from career import jobs
+from career.models import CareerPrediction, GenerationJob
+from conftest import FAKE_PREDICTION
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(username="jobuser", password="testpass")
+
+
+@pytest.mark.django_db
+def test_job_mode_returns_202_and_worker_completes_it(api_client, fake_llm, user):
+    api_client.force_authenticate(user=user)
+
+    response = api_client.post("/api/predict/?mode=job", {"ug_course": "BTech"}, format="json")
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response["Location"].endswith(f"/api/jobs/{job_id}/")
+    assert fake_llm.calls == []
+
+    status_response = api_client.get(f"/api/jobs/{job_id}/")
+    assert status_response.json()["status"] == GenerationJob.PENDING
+
+    claimed = jobs.claim(10)
+    assert [job.id for job in claimed] == [GenerationJob.objects.get().id]
+    assert jobs.claim(10) == []
+    assert jobs.run(claimed[0]) == GenerationJob.SUCCEEDED
+
+    body = api_client.get(f"/api/jobs/{job_id}/?wait=1").json()
+    assert body["status"] == GenerationJob.SUCCEEDED
+    assert body["attempts"] == 1
+    assert body["result"]["career_paths"] == FAKE_PREDICTION["career_paths"]
+    assert CareerPrediction.objects.filter(user=user).count() == 1
+
+
+@pytest.mark.django_db
+def test_failed_generation_is_retried_then_failed(fake_llm, user, settings):
+    settings.JOB_MAX_ATTEMPTS = 2
+    fake_llm.payload = "not json"
+    job = jobs.enqueue(user, GenerationJob.KIND_CAREER, {"career": "Pilot"})
+
+    assert jobs.run(jobs.claim(1)[0]) == GenerationJob.PENDING
+    assert jobs.run(jobs.claim(1)[0]) == GenerationJob.FAILED
+    job.refresh_from_db()
+    assert job.attempts == 2 and job.finished_at is not None
+    assert "parse JSON" in job.error
+
+
+@pytest.mark.django_db
+def test_jobs_are_private(api_client, user, django_user_model):
+    job = jobs.enqueue(user, GenerationJob.KIND_CAREER, {"career": "Pilot"})
+    other = django_user_model.objects.create_user(username="other", password="testpass")
+    api_client.force_authenticate(user=other)
+    assert api_client.get(f"/api/jobs/{job.id}/").status_code == 404
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_command_drains_queue(fake_llm, user):
+    for course in ("BTech", "BSc", "BA"):
+        jobs.enqueue(user, GenerationJob.KIND_PREDICT, {"ug_course": course})
+
+    call_command("run_generation_worker", "--once", "--threads", "2", "--poll-interval", "0.01")
+
+    assert set(GenerationJob.objects.values_list("status", flat=True)) == {GenerationJob.SUCCEEDED}
+    assert CareerPrediction.objects.count() == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_survives_database_errors(fake_llm, user, monkeypatch):
+    jobs.enqueue(user, GenerationJob.KIND_PREDICT, {"ug_course": "BTech"})
+    requeue_stale = jobs.requeue_stale
+    failures = {"left": 2}
+
+    def flaky():
+        if failures["left"]:
+            failures["left"] -= 1
+            raise OperationalError("database table is locked")
+        return requeue_stale()
+
+    monkeypatch.setattr(jobs, "requeue_stale", flaky)
+    call_command("run_generation_worker", "--once", "--threads", "1", "--poll-interval", "0.01")
+
+    assert failures["left"] == 0
+    assert GenerationJob.objects.get().status == GenerationJob.SUCCEEDED
+
+
+@pytest.mark.django_db
+def test_stale_jobs_fail_after_max_attempts_and_are_purged(user, settings):
+    settings.JOB_MAX_ATTEMPTS = 2
+    long_ago = timezone.now() - timedelta(days=60)
+    crashed = jobs.enqueue(user, GenerationJob.KIND_CAREER, {"career": "Pilot"})
+    retried = jobs.enqueue(user, GenerationJob.KIND_CAREER, {"career": "Chef"})
+    GenerationJob.objects.filter(pk=crashed.pk).update(status=GenerationJob.RUNNING, started_at=long_ago, attempts=2)
+    GenerationJob.objects.filter(pk=retried.pk).update(status=GenerationJob.RUNNING, started_at=long_ago, attempts=1)
+
+    assert jobs.requeue_stale() == 1
+    crashed.refresh_from_db()
+    assert crashed.status == GenerationJob.FAILED and crashed.finished_at is not None
+    assert GenerationJob.objects.get(pk=retried.pk).status == GenerationJob.PENDING
+
+    GenerationJob.objects.filter(pk=crashed.pk).update(finished_at=long_ago)
+    call_command("purge_expired", "--only", "jobs")
+    assert list(GenerationJob.objects.values_list("pk", flat=True)) == [retried.pk]
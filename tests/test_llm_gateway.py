@@ -0,0 +1,161 @@
+# tests/test_llm_gateway.py
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from openai import AsyncOpenAI, OpenAI
+
+from benchmarks.fake_openai import FakeOpenAIServer
+from career import llm
+from career.cache import prediction_cache, profile_key
+from career.llm import CircuitBreaker, LLMGateway, LLMUnavailable
+from career.models import PredictionCacheEntry
+from career.services import validate_profile
+from career.streaming import delta_text
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+@pytest.fixture
+def fake_server():
+    with FakeOpenAIServer() as server:
+        yield server
+
+
+@pytest.fixture
+def gateway(fake_server, settings):
+    settings.LLM_RETRY_BASE_DELAY = 0
+    settings.LLM_HEDGE_AFTER = ""
+    return LLMGateway(client=OpenAI(api_key="fake", base_url=fake_server.url, max_retries=0))
+
+
+def test_retries_5xx_then_succeeds(gateway, fake_server):
+    fake_server.script(503, 429)
+    response = gateway.chat(MESSAGES)
+    assert "career_paths" in response.choices[0].message.content
+    assert len(fake_server.requests) == 3
+    assert gateway.stats()["retries"] == 2
+
+
+def test_exhausted_retries_raise_unavailable(gateway, fake_server, settings):
+    settings.LLM_MAX_RETRIES = 1
+    fake_server.script(500, 500)
+    with pytest.raises(LLMUnavailable):
+        gateway.chat(MESSAGES)
+    assert len(fake_server.requests) == 2
+
+
+def test_breaker_opens_fails_fast_and_recovers():
+    now = [0.0]
+    breaker = CircuitBreaker(threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+    assert breaker.retry_after() == 10
+
+    now[0] = 11
+    assert breaker.allow()        # half-open trial
+    assert not breaker.allow()    # only one at a time
+    now[0] = 21
+    assert breaker.allow()        # the trial never reported back: it is retaken
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_open_breaker_skips_the_provider(gateway, fake_server, settings):
+    settings.LLM_MAX_RETRIES = 0
+    gateway.breaker.threshold = 1
+    fake_server.script(503)
+    with pytest.raises(LLMUnavailable):
+        gateway.chat(MESSAGES)
+    with pytest.raises(LLMUnavailable) as excinfo:
+        gateway.chat(MESSAGES)
+    assert excinfo.value.retry_after
+    assert len(fake_server.requests) == 1
+
+
+def test_slow_request_is_hedged_to_fallback_model(gateway, fake_server, settings):
+    settings.LLM_HEDGE_AFTER = "0.05"
+    settings.LLM_HEDGE_MODEL = "gpt-cheap"
+    delays = iter([1.0])
+    fake_server.latency = lambda: next(delays, 0.0)
+
+    started = time.monotonic()
+    response = gateway.chat(MESSAGES)
+    assert time.monotonic() - started < 0.8
+    assert response.model == "gpt-cheap"
+    assert gateway.stats()["hedged"] == 1
+
+
+def test_stream_through_gateway(gateway):
+    chunks = list(gateway.chat(MESSAGES, stream=True))
+    text = "".join(delta_text(chunk) for chunk in chunks)
+    assert text.startswith('{"career_paths"')
+    assert chunks[-1].usage.completion_tokens > 0  # stream_options.include_usage
+
+
+def test_stream_holds_its_slot_until_read(fake_server, settings):
+    settings.LLM_MAX_CONCURRENCY = 1
+    settings.LLM_QUEUE_TIMEOUT = 0.05
+    gateway = LLMGateway(client=OpenAI(api_key="fake", base_url=fake_server.url, max_retries=0))
+    stream = gateway.chat(MESSAGES, stream=True)
+    with pytest.raises(LLMUnavailable):
+        gateway.chat(MESSAGES)
+    list(stream)
+    assert gateway.chat(MESSAGES).choices[0].message.content
+
+    gateway.chat(MESSAGES, stream=True).close()  # abandoned streams give it back too
+    assert gateway.chat(MESSAGES).choices[0].message.content
+
+
+def test_malformed_hedge_setting_fails_at_startup(settings):
+    settings.LLM_HEDGE_AFTER = "soon"
+    with pytest.raises(ImproperlyConfigured):
+        LLMGateway()
+
+
+def test_async_gateway_retries(fake_server, settings):
+    settings.LLM_RETRY_BASE_DELAY = 0
+    fake_server.script(502)
+
+    async def run():
+        gateway = LLMGateway(async_client=AsyncOpenAI(api_key="fake", base_url=fake_server.url, max_retries=0))
+        return await gateway.achat(MESSAGES)
+
+    response = asyncio.run(run())
+    assert response.choices[0].message.content
+    assert len(fake_server.requests) == 2
+
+
+@pytest.fixture
+def provider_down(monkeypatch):
+    def chat(messages, stream=False, **overrides):
+        raise LLMUnavailable("The AI provider is unavailable, try again later.", 30)
+
+    monkeypatch.setattr(llm.gateway, "chat", chat)
+
+
+@pytest.mark.django_db
+def test_stale_prediction_served_while_provider_down(api_client, provider_down, django_user_model):
+    user = django_user_model.objects.create_user(username="staleuser", password="testpass")
+    api_client.force_authenticate(user=user)
+    profile = {"ug_course": "BSc", "skills": ["Python"], "ug_cgpa": "8.2"}
+
+    response = api_client.post("/api/predict/", profile, format="json")
+    assert response.status_code == 503
+    assert response["Retry-After"] == "30"
+
+    PredictionCacheEntry.objects.create(
+        key=profile_key(validate_profile(profile)),
+        payload={"career_paths": [{"title": "Old"}]},
+        expires_at=timezone.now() - timedelta(days=1),
+    )
+    prediction_cache.local.clear()
+    response = api_client.post("/api/predict/", profile, format="json")
+    assert response.status_code == 200
+    assert response["X-Cache-Tier"] == "stale"
+    assert response.data["career_paths"] == [{"title": "Old"}]
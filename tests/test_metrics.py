@@ -0,0 +1,67 @@
+# tests/test_metrics.py
+import json
+import os
+
+import pytest
+
+from career import metrics
+
+
+@pytest.fixture
+def metrics_on(settings, tmp_path):
+    settings.METRICS_ENABLED = True
+    settings.METRICS_DIR = str(tmp_path)
+    metrics.registry.clear()
+    yield tmp_path
+    metrics._enabled = False
+    metrics.registry.clear()
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(username="metricsuser", password="testpass")
+
+
+@pytest.mark.django_db
+def test_predict_reports_phases_and_metrics(api_client, fake_llm, user, metrics_on):
+    api_client.force_authenticate(user=user)
+    response = api_client.post("/api/predict/", {"ug_course": "BSc"}, format="json")
+    assert response.status_code == 200
+
+    timing = response["Server-Timing"]
+    for entry in ("validate;dur=", "llm;dur=", 'desc="100+', "parse;dur=", "save;dur=", "db;dur=", "total;dur="):
+        assert entry in timing
+    assert 'cache-prediction;desc="miss"' in timing
+
+    # Another worker's flushed snapshot is merged into the scrape
+    (metrics_on / "99999.json").write_text(json.dumps({
+        "counters": [["career_cache_lookups_total", [["cache", "prediction"], ["result", "memory"]], 4]],
+        "histograms": [],
+    }))
+    body = api_client.get("/metrics").content.decode()
+    assert 'career_request_seconds_count{method="POST",status="2xx",view="predict"} 1' in body
+    assert 'career_llm_tokens_total{kind="prompt",model="gpt-4o-mini"} 100' in body
+    assert 'career_cache_lookups_total{cache="prediction",result="memory"} 4' in body
+    assert 'career_cache_lookups_total{cache="prediction",result="miss"} 1' in body
+    assert (metrics_on / f"{os.getpid()}.json").exists()
+
+
+def test_histogram_rendering_is_cumulative():
+    registry = metrics.Registry()
+    for value in (0.002, 0.02, 0.02, 100):
+        registry.observe("t", {"a": 'x"y'}, value, buckets=(0.01, 0.1))
+    snapshot = registry.snapshot()
+    name, labels, buckets, counts, total, count = snapshot["histograms"][0]
+    text = metrics.render({}, {(name, tuple(map(tuple, labels))): {"buckets": buckets, "counts": counts, "sum": total, "count": count}})
+    assert 't_bucket{a="x\\"y",le="0.01"} 1' in text
+    assert 't_bucket{a="x\\"y",le="0.1"} 3' in text
+    assert 't_bucket{a="x\\"y",le="+Inf"} 4' in text
+
+
+@pytest.mark.django_db
+def test_disabled_metrics_add_nothing(api_client, fake_llm, user):
+    api_client.force_authenticate(user=user)
+    response = api_client.post("/api/predict/", {"ug_course": "BSc"}, format="json")
+    assert "Server-Timing" not in response
+    assert api_client.get("/metrics").status_code == 404
+    assert metrics.phase("llm") is metrics._NO_PHASE
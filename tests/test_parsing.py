@@ -0,0 +1,47 @@
+# tests/test_parsing.py
+import json
+
+import pytest
+
+from career.parsing import extract_json, find_json_object, parse_career_details, parse_prediction
+from career.services import generate_prediction
+from conftest import FAKE_PREDICTION
+
+
+def test_scanner_finds_outermost_object():
+    text = 'Sure! ```json\n{"a": "} not the end {", "b": {"c": [1, 2]}}\n``` hope this helps {"x": 1}'
+    assert find_json_object(text) == '{"a": "} not the end {", "b": {"c": [1, 2]}}'
+    assert extract_json(text) == {"a": "} not the end {", "b": {"c": [1, 2]}}
+    assert extract_json('{"truncated": [1, 2') is None
+
+
+def test_schema_repairs_scalars_and_rejects_missing_keys():
+    result = parse_prediction('{"career_paths": [{"title": "Pilot", "roadmap": {"short_term": "Get a licence"}}]}')
+    assert result.payload["career_paths"][0]["roadmap"]["short_term"] == ["Get a licence"]
+
+    assert not parse_prediction('{"career_paths": []}')
+    missing = parse_career_details('{"career": "Pilot"}')
+    assert missing.payload is None and "roadmap" in missing.error
+
+
+def test_malformed_reply_is_retried_once(fake_llm):
+    replies = iter(['{"career_paths": [{"description": "no title"}]}', json.dumps(FAKE_PREDICTION)])
+    create = fake_llm.create
+
+    def create_in_turn(**kwargs):
+        fake_llm.payload = next(replies)
+        return create(**kwargs)
+
+    fake_llm.create = create_in_turn
+    assert generate_prediction({"ug_course": "BSc"}) == FAKE_PREDICTION
+    assert len(fake_llm.calls) == 2
+    assert fake_llm.calls[1]["messages"][-2] == {
+        "role": "assistant", "content": '{"career_paths": [{"description": "no title"}]}'
+    }
+
+
+def test_retry_respects_token_budget(fake_llm, settings):
+    settings.LLM_REPAIR_TOKEN_BUDGET = 0
+    fake_llm.payload = "not json at all"
+    assert generate_prediction({"ug_course": "BSc"}) is None
+    assert len(fake_llm.calls) == 1
@@ -0,0 +1,63 @@
+# tests/test_payloads.py
+import pytest
+from conftest import FAKE_PREDICTION
+from django.core.management import call_command
+
+from benchmarks.payload_store import run
+from career import payloads
+from career.models import CareerPrediction, PayloadBlob, PayloadDictionary
+
+
+@pytest.mark.django_db
+def test_repeated_payloads_are_stored_once(api_client, django_user_model):
+    user = django_user_model.objects.create_user(username="repeat", password="testpass")
+    first = CareerPrediction.objects.create(user=user, user_input={"ug_course": "BSc"}, prediction=FAKE_PREDICTION)
+    second = CareerPrediction.objects.create(user=user, user_input={"ug_course": "BA"}, prediction=FAKE_PREDICTION)
+    assert first.prediction_blob_id == second.prediction_blob_id
+    assert first.prediction_json is None
+    assert PayloadBlob.objects.count() == 3
+
+    row = CareerPrediction.objects.get(pk=first.pk)
+    assert "_payloads" not in row.__dict__  # nothing decoded until read
+    assert row.prediction == FAKE_PREDICTION and row.user_input == {"ug_course": "BSc"}
+
+    # Rows not backfilled yet read the JSON column
+    CareerPrediction.objects.filter(pk=first.pk).update(prediction_blob=None, prediction_json={"legacy": True})
+    assert CareerPrediction.objects.get(pk=first.pk).prediction == {"legacy": True}
+
+    api_client.force_authenticate(user=user)
+    rows = api_client.get("/api/history/?fields=id,user_input,prediction").json()
+    assert [row["user_input"] for row in rows] == [{"ug_course": "BA"}, {"ug_course": "BSc"}]
+    assert rows[0]["prediction"] == FAKE_PREDICTION and rows[1]["prediction"] == {"legacy": True}
+    assert api_client.get("/api/history/").json()[0]["prediction"] == FAKE_PREDICTION
+
+
+@pytest.mark.django_db
+def test_trained_dictionary_recompresses_blobs(django_user_model):
+    user = django_user_model.objects.create_user(username="trainer", password="testpass")
+    for i in range(20):
+        prediction = {"career_paths": [dict(path, title=f"{path['title']} {i}") for path in FAKE_PREDICTION["career_paths"]]}
+        CareerPrediction.objects.create(user=user, user_input={"ug_course": f"c{i}"}, prediction=prediction)
+    before = sum(len(data) for data in PayloadBlob.objects.values_list("data", flat=True))
+
+    call_command("train_payload_dictionary", "--recompress", "--chunk-size", "7")
+    dictionary = PayloadDictionary.objects.get()
+    assert 0 < len(dictionary.data) <= payloads.MAX_DICTIONARY_SIZE
+    assert sum(len(data) for data in PayloadBlob.objects.values_list("data", flat=True)) < before
+
+    # Old and re-encoded blobs decode in a fresh process; new ones use the dictionary
+    payloads.clear()
+    rows = list(CareerPrediction.objects.order_by("pk"))
+    assert [row.user_input for row in rows] == [{"ug_course": f"c{i}"} for i in range(20)]
+    assert rows[-1].prediction["career_paths"][0]["title"].endswith(" 19")
+    created = CareerPrediction.objects.create(user=user, user_input={"ug_course": "new"}, prediction=FAKE_PREDICTION)
+    data = bytes(PayloadBlob.objects.get(pk=created.input_blob_id).data)
+    assert payloads.HEADER.unpack_from(data) == (payloads.CODEC_DEFLATE, dictionary.pk)
+
+
+@pytest.mark.django_db
+def test_payload_benchmark_runs():
+    result = run(rows=200, distinct=20, reads=50)
+    assert result["distinct_payloads"] <= 220
+    assert result["blobs_mb"] < result["json_mb"]
+    assert result["read_blob_p50_us"] > 0
@@ -1,10 +1,11 @@
 # tests/test_predict.py
+import json
+import os
+
 import pytest
-from django.urls import reverse
-from career.models import CareerPrediction   # <-- replace myapp with your app name
 
-# Load test cases
-import json, os
+from career.models import CareerPrediction
+
 here = os.path.dirname(__file__)
 with open(os.path.join(here, "test_data.json"), "r", encoding="utf-8") as f:
     TEST_CASES = json.load(f)
@@ -12,21 +13,19 @@ with open(os.path.join(here, "test_data.json"), "r", encoding="utf-8") as f:
 
 @pytest.mark.django_db
 @pytest.mark.parametrize("input_data", TEST_CASES)
-def test_predict_and_save(api_client, input_data, django_user_model):
+def test_predict_and_save(api_client, input_data, django_user_model, fake_llm):
     """
     Test prediction API with multiple test cases.
     """
-    # Create and login user (if API requires auth)
     user = django_user_model.objects.create_user(username="testuser", password="testpass")
     api_client.force_authenticate(user=user)
 
-    url = "/api/predict/"   # or reverse("career-predict") if named in urls.py
-
-    response = api_client.post(url, input_data, format="json")
+    response = api_client.post("/api/predict/", input_data, format="json")
     assert response.status_code == 200, f"status {response.status_code} body: {response.content!r}"
 
     json_resp = response.json()
     assert "career_paths" in json_resp and isinstance(json_resp["career_paths"], list)
+    assert len(fake_llm.calls) == 1
 
     # Verify DB saved a CareerPrediction record linked to this user
     prediction = CareerPrediction.objects.filter(user=user).first()
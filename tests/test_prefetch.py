@@ -0,0 +1,77 @@
+# tests/test_prefetch.py
+import threading
+
+import pytest
+from conftest import FAKE_DETAILS
+from django.core.management import call_command
+
+from career import llm, prefetch
+from career.management.commands.prefetch_report import prefetch_report
+from career.models import CareerCatalogEntry
+
+
+class DeferredExecutor:
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, fn, *args):
+        self.tasks.append((fn, args))
+
+    def run(self):
+        tasks, self.tasks = self.tasks, []
+        for fn, args in tasks:
+            # In a thread of its own, like the real pool: the task closes its connection
+            thread = threading.Thread(target=fn, args=args)
+            thread.start()
+            thread.join()
+
+
+@pytest.fixture
+def executor(monkeypatch, settings):
+    settings.PREFETCH_ENABLED = True
+    settings.ADMISSION_BUCKET_STORE = "local"
+    deferred = DeferredExecutor()
+    monkeypatch.setattr(prefetch, "_executor", lambda: deferred)
+    return deferred
+
+
+@pytest.mark.django_db(transaction=True)
+def test_predicted_careers_are_served_from_the_prefetch(api_client, django_user_model, fake_llm, executor):
+    user = django_user_model.objects.create_user(username="clicker", password="testpass")
+    api_client.force_authenticate(user=user)
+    assert api_client.post("/api/predict/", {"ug_course": "BSc"}, format="json").status_code == 200
+    assert len(executor.tasks) == 1
+
+    fake_llm.payload = FAKE_DETAILS
+    executor.run()
+    entry = CareerCatalogEntry.objects.get(key="data analyst")
+    assert entry.prefetched_at is not None and entry.prefetch_tokens > 100
+    calls = len(fake_llm.calls)
+
+    response = api_client.post("/api/career/", {"career": "Data Analyst"}, format="json")
+    assert response.status_code == 200 and response["X-Cache-Tier"] == "catalog"
+    assert len(fake_llm.calls) == calls
+    assert prefetch_report() == {
+        "prefetched": 1, "used": 1, "hit_rate": 1.0, "tokens": entry.prefetch_tokens, "wasted_tokens": 0,
+    }
+
+    # Already in the catalog: queued, then skipped without an LLM call
+    assert api_client.post("/api/predict/", {"ug_course": "BSc"}, format="json").status_code == 200
+    executor.run()
+    assert len(fake_llm.calls) == calls
+    call_command("prefetch_report", "--json")
+
+
+@pytest.mark.django_db(transaction=True)
+def test_prefetch_dedupes_and_respects_budget_and_load(fake_llm, executor, settings, monkeypatch):
+    fake_llm.payload = FAKE_DETAILS
+    settings.PREFETCH_RATE = 1
+    settings.PREFETCH_BURST = 1
+    assert prefetch.schedule(["Data Scientist", " data  scientist", "Web Developer"]) == 2
+    assert prefetch.schedule(["Data Scientist"]) == 0  # already queued
+    executor.run()
+    assert len(fake_llm.calls) == 1  # the budget allowed one generation
+    assert prefetch_report()["wasted_tokens"] > 0
+
+    monkeypatch.setattr(llm.gateway.breaker, "state", llm.CircuitBreaker.OPEN)
+    assert prefetch.schedule(["Web Developer"]) == 0
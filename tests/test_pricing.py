@@ -0,0 +1,16 @@
+# tests/test_pricing.py
+import pytest
+
+from career.pricing import cost
+
+
+def test_dated_snapshots_take_their_models_price(settings):
+    settings.LLM_PRICING = {"gpt-4.1": [2.0, 8.0]}
+    assert cost("gpt-4o-mini", 1_000_000, 1_000_000) == pytest.approx(0.75)
+    # The longest listed name wins: gpt-4o-mini, not gpt-4o
+    assert cost("gpt-4o-mini-2024-07-18", 1_000_000, 1_000_000) == pytest.approx(0.75)
+    assert cost("gpt-4o-2024-08-06", 1_000_000, 0) == pytest.approx(2.5)
+    assert cost("gpt-4.1-2025-04-14", 0, 1_000_000) == pytest.approx(8.0)
+    assert cost("gpt-4", 1, 1) is None
+    assert cost("o3-mini-2025-01-31", 1, 1) is None
+    assert cost("", 1, 1) is None
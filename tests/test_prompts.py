@@ -0,0 +1,92 @@
+# tests/test_prompts.py
+import json
+
+import pytest
+from django.core.management import call_command
+
+from career.models import CareerPrediction, CareerSuggestion
+from career.prompts import estimate_tokens, get_prompt
+
+
+PROFILE = {
+    "ug_course": "BSc",
+    "ug_specialization": "  Computer   Science ",
+    "skills": ["Python", "SQL", "python"],
+    "interests": ["Data"],
+    "ug_cgpa": 8.1,
+    "experience_years": 1,
+}
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(username="promptuser", password="testpass")
+
+
+def test_compact_rendering_is_smaller_than_v1():
+    v1 = get_prompt("prediction", 1).render(PROFILE)
+    v2 = get_prompt("prediction", 2).render(PROFILE)
+    assert "Skills: ['Python', 'SQL', 'python']" in v1
+    assert "Skills: Python, SQL\n" in v2  # case-insensitive dedupe, no Python repr
+    assert "Specialization: Computer Science" in v2
+    assert "Certifications: -" in v2
+    assert "  " not in v2
+    assert estimate_tokens(v2) < estimate_tokens(v1) * 0.6
+
+
+def test_budget_truncates_longest_list_deterministically(settings):
+    settings.PROMPT_INPUT_TOKEN_BUDGET = 60
+    profile = {**PROFILE, "skills": [f"skill-{i}" for i in range(40)], "interests": ["a", "b", "c"]}
+    prompt = get_prompt("prediction", 2)
+    rendered = prompt.render(profile)
+    assert rendered == prompt.render(dict(profile))
+    assert "skill-0, skill-1" in rendered and "skill-39" not in rendered
+    assert "Interests: a, b, c" in rendered
+
+
+def test_version_pin(settings):
+    settings.PROMPT_VERSIONS = {"prediction": 1}
+    assert get_prompt("prediction").id == "prediction@v1"
+    assert get_prompt("career_details").id == "career_details@v2"
+
+
+@pytest.mark.django_db
+def test_usage_is_persisted_and_reported(api_client, fake_llm, user, capsys):
+    api_client.force_authenticate(user=user)
+    assert api_client.post("/api/predict/", PROFILE, format="json").status_code == 200
+    assert api_client.post("/api/predict/", PROFILE, format="json").status_code == 200  # cached
+
+    generated, cached = CareerPrediction.objects.order_by("id")
+    assert generated.prompt_version == "prediction@v2"
+    assert generated.llm_model == "gpt-4o-mini"
+    assert generated.prompt_tokens == 100 and generated.completion_tokens > 0
+    assert generated.latency_ms is not None
+    assert cached.prompt_tokens is None and cached.llm_model == ""
+
+    fake_llm.payload = json.dumps({
+        "career": "Data Scientist", "required_skills": ["Python"],
+        "free_courses": [], "roadmap": {"short_term": [], "medium_term": [], "long_term": []},
+    })
+    response = api_client.post("/api/career/?stream=1", {"career": "Data Scientist"}, format="json")
+    b"".join(response.streaming_content)
+    suggestion = CareerSuggestion.objects.get()
+    assert suggestion.prompt_version == "career_details@v2"
+    assert suggestion.prompt_tokens == 100  # from the stream's usage chunk
+
+    call_command("llm_usage_report", "--json")
+    rows = json.loads(capsys.readouterr().out)
+    predict = next(row for row in rows if row["endpoint"] == "predict")
+    assert predict["generations"] == 1 and predict["rows"] == 2
+    assert predict["cost_usd"] > 0
+
+
+@pytest.mark.django_db
+def test_dated_model_snapshots_are_priced(api_client, fake_llm, user, capsys):
+    fake_llm.model = "gpt-4o-mini-2024-07-18"  # as the API answers
+    api_client.force_authenticate(user=user)
+    assert api_client.post("/api/predict/", PROFILE, format="json").status_code == 200
+    assert CareerPrediction.objects.get().llm_model == "gpt-4o-mini-2024-07-18"
+
+    call_command("llm_usage_report", "--json")
+    (row,) = json.loads(capsys.readouterr().out)
+    assert row["model"] == "gpt-4o-mini-2024-07-18" and row["cost_usd"] > 0
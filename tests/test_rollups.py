@@ -0,0 +1,83 @@
+# tests/test_rollups.py
+import datetime
+
+import pytest
+from conftest import FAKE_DETAILS
+from django.core.management import call_command
+from django.utils import timezone
+
+from career import rollups
+from career.models import CareerPrediction, CareerTitleRollup, SkillCourseRollup, TokenUsageRollup
+
+
+def snapshot():
+    return {
+        "titles": sorted(CareerTitleRollup.objects.values_list("day", "key", "title", "predictions", "suggestions")),
+        "skills": sorted(SkillCourseRollup.objects.values_list("day", "course", "skill", "predictions")),
+        "usage": sorted(TokenUsageRollup.objects.values_list(
+            "day", "endpoint", "llm_model", "rows", "generations", "prompt_tokens", "completion_tokens", "latency_ms",
+        )),
+    }
+
+
+@pytest.mark.django_db
+def test_writes_update_rollups_and_stats(api_client, fake_llm, django_user_model, django_capture_on_commit_callbacks):
+    user = django_user_model.objects.create_user(username="analyst", password="testpass")
+    api_client.force_authenticate(user=user)
+    with django_capture_on_commit_callbacks(execute=True):
+        for course in ("BSc", "BSc", "BCom"):
+            profile = {"ug_course": course, "skills": ["SQL", " sql", "Excel"], "interests": [course]}
+            assert api_client.post("/api/predict/", profile, format="json").status_code == 200
+        fake_llm.payload = FAKE_DETAILS
+        assert api_client.post("/api/career/", {"career": "data analyst"}, format="json").status_code == 200
+
+    today = timezone.now().date()
+    title = CareerTitleRollup.objects.get()
+    assert (title.day, title.key, title.title, title.predictions, title.suggestions) == (
+        today, "data analyst", "Data Analyst", 3, 1,
+    )
+    assert SkillCourseRollup.objects.get(course="bsc", skill="sql").predictions == 2
+    # The repeated profile is served from the prediction cache: a row without a generation
+    generated, cached = TokenUsageRollup.objects.filter(endpoint="predict").order_by("-llm_model")
+    assert (generated.rows, generated.generations, generated.prompt_tokens) == (2, 2, 200)
+    assert (cached.llm_model, cached.rows, cached.generations) == ("", 1, 0)
+
+    assert api_client.get("/api/stats/").status_code == 403
+    admin = django_user_model.objects.create_user(username="boss", password="testpass", is_staff=True)
+    api_client.force_authenticate(user=admin)
+    stats = api_client.get("/api/stats/?days=7&limit=5").json()
+    assert stats["top_careers"] == [{"title": "Data Analyst", "key": "data analyst", "predictions": 3, "suggestions": 1}]
+    assert stats["top_skills_by_course"][0] == {
+        "course": "bsc", "skills": [{"skill": "excel", "predictions": 2}, {"skill": "sql", "predictions": 2}],
+    }
+    assert {row["endpoint"] for row in stats["token_usage"]} == {"predict", "career"}
+    assert all(row["cost_usd"] > 0 for row in stats["token_usage"] if row["llm_model"])
+    assert api_client.get("/api/stats/?days=0").status_code == 400
+
+    # A bulk rebuild lands on the same counters
+    before = snapshot()
+    CareerTitleRollup.objects.update(predictions=0)
+    call_command("rebuild_rollups", "--until", (today + datetime.timedelta(days=1)).isoformat())
+    assert snapshot() == before
+
+
+@pytest.mark.django_db
+def test_deltas_are_buffered_until_flush(settings, monkeypatch, django_user_model, django_capture_on_commit_callbacks):
+    settings.ROLLUP_FLUSH_INTERVAL = 60
+    settings.ROLLUP_MAX_PENDING = 3
+    monkeypatch.setattr(rollups, "_start_flusher", lambda interval: None)
+    user = django_user_model.objects.create_user(username="buffered", password="testpass")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        CareerPrediction.objects.create(user=user, user_input={"ug_course": "BA"}, prediction={"career_paths": []})
+        CareerPrediction.objects.create(user=user, user_input={"ug_course": "BA"}, prediction={"career_paths": []})
+    assert not TokenUsageRollup.objects.exists()
+
+    rollups.flush()
+    assert TokenUsageRollup.objects.get().rows == 2
+
+    # Enough distinct keys flush without waiting for the interval
+    with django_capture_on_commit_callbacks(execute=True):
+        CareerPrediction.objects.create(user=user, user_input={"ug_course": "BA", "skills": ["Go", "Rust"]}, prediction={"career_paths": []})
+    assert TokenUsageRollup.objects.get().rows == 3
+    assert SkillCourseRollup.objects.count() == 2
@@ -0,0 +1,105 @@
+# tests/test_roster.py
+import json
+
+import pytest
+from django.contrib.auth.hashers import check_password
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from career import roster
+from career.models import UserImport
+
+
+ROSTER = """name,username,email,password
+Asha Rao,asha,asha@uni.edu,Str0ng-pass-1
+Ben Lee,ben,ben@uni.edu,
+Dup,asha,other@uni.edu,Str0ng-pass-2
+Existing,taken,taken2@uni.edu,Str0ng-pass-3
+Bad Mail,carl,not-an-email,Str0ng-pass-4
+Weak,dina,dina@uni.edu,password
+"""
+
+
+@pytest.fixture(autouse=True)
+def fast_hashing(settings):
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    settings.USER_IMPORT_HASH_WORKERS = 0
+
+
+@pytest.fixture
+def admin(django_user_model):
+    django_user_model.objects.create_user(username="taken", email="taken@uni.edu", password="x")
+    return django_user_model.objects.create_user(username="registrar", password="testpass", is_staff=True)
+
+
+@pytest.mark.django_db
+def test_import_api_reports_every_row(api_client, admin, django_user_model):
+    api_client.force_authenticate(user=admin)
+    with CaptureQueriesContext(connection) as captured:
+        response = api_client.generic("POST", "/api/users/import/", ROSTER, content_type="text/csv")
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+    summary = lines.pop()["summary"]
+
+    statuses = {line["line"]: (line["status"], sorted(line.get("errors", {}))) for line in lines}
+    assert statuses == {
+        2: ("created", []), 3: ("created", []), 4: ("error", ["username"]),
+        5: ("error", ["username"]), 6: ("error", ["email"]), 7: ("error", ["password"]),
+    }
+    assert summary["created"] == 2 and summary["error"] == 4
+    asha = django_user_model.objects.get(username="asha")
+    assert check_password("Str0ng-pass-1", asha.password) and asha.first_name == "Asha Rao"
+    assert not django_user_model.objects.get(username="ben").has_usable_password()
+
+    lookups = [q for q in captured.captured_queries if q["sql"].startswith('SELECT "auth_user"."username"')
+               or q["sql"].startswith('SELECT "auth_user"."email"')]
+    assert len(lookups) == 2  # one IN query per field for the chunk
+    assert UserImport.objects.get(pk=response["X-Import-Id"]).status == UserImport.COMPLETED
+    url = "/api/users/import/?resume={}"
+    assert api_client.generic("POST", url.format("not-a-uuid"), ROSTER, content_type="text/csv").status_code == 400
+    assert api_client.generic("POST", url.format(response["X-Import-Id"]), ROSTER, content_type="text/csv").status_code == 404
+
+    user = django_user_model.objects.create_user(username="student", password="testpass")
+    api_client.force_authenticate(user=user)
+    assert api_client.generic("POST", "/api/users/import/", ROSTER, content_type="text/csv").status_code == 403
+
+
+@pytest.mark.django_db
+def test_interrupted_import_resumes(tmp_path, django_user_model):
+    path = tmp_path / "roster.jsonl"
+    path.write_text("".join(
+        json.dumps({"name": f"S{n}", "username": f"s{n}", "email": f"s{n}@uni.edu"}) + "\n" for n in range(10)
+    ))
+    user_import = UserImport.objects.create()
+    with open(path) as f:
+        results = roster.import_roster(user_import, roster.read_roster(f, "jsonl"), chunk_size=4)
+        assert [next(results)["status"] for _ in range(4)] == ["created"] * 4
+        results.close()  # interrupted after the first chunk committed
+
+    report = tmp_path / "report.jsonl"
+    call_command("import_users", str(path), "--resume", str(user_import.pk), "--chunk-size", "4", "--report", str(report))
+    assert [json.loads(line)["line"] for line in report.read_text().splitlines()] == list(range(5, 11))
+    assert django_user_model.objects.filter(username__startswith="s").count() == 10
+    user_import.refresh_from_db()
+    assert (user_import.created, user_import.failed, user_import.lines_done) == (10, 0, 10)
+
+
+@pytest.mark.django_db
+def test_existing_emails_match_case_insensitively(django_user_model):
+    django_user_model.objects.create_user(username="foo", email="Foo@Uni.edu", password="x")
+    rows = roster.read_roster(["name,username,email", "Foo Two,foo2,foo@uni.edu", "Bar,bar,bar@uni.edu"], "csv")
+    results = list(roster.import_roster(UserImport.objects.create(), rows))[:-1]  # without the summary
+    assert [(r["status"], r.get("errors")) for r in results] == [
+        ("error", {"email": "Email already attached to another account."}), ("created", None),
+    ]
+
+
+def test_passwords_hash_in_a_process_pool(settings):
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.PBKDF2PasswordHasher"]  # what the worker uses
+    pool = roster.hash_pool(workers=1)
+    try:
+        hashes = roster.hash_passwords(["first-secret", "", "second-secret"], pool)
+    finally:
+        pool.shutdown()
+    assert check_password("first-secret", hashes[0]) and check_password("second-secret", hashes[2])
+    assert hashes[1].startswith("!")
@@ -0,0 +1,77 @@
+# tests/test_similarity.py
+import numpy as np
+import pytest
+
+from benchmarks.similarity import run as run_benchmark
+from career import similarity
+from career.models import CareerPrediction
+from career.similarity import ProfileIndex, vectorize
+
+
+PROFILE = {
+    "ug_course": "BSc",
+    "ug_specialization": "Computer Science",
+    "skills": ["Python", "SQL", "Excel", "Statistics"],
+    "interests": ["Data"],
+    "ug_cgpa": 8.1,
+}
+
+
+@pytest.fixture
+def reuse_on(settings, tmp_path):
+    settings.SIMILARITY_REUSE_THRESHOLD = 0.85
+    settings.SIMILARITY_INDEX_DIR = str(tmp_path)
+    similarity._index["pid"] = None
+    yield tmp_path
+    similarity._index["pid"] = None
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(username="similaruser", password="testpass")
+
+
+def test_vectors_are_stable_and_close_for_minor_changes():
+    vector = vectorize(PROFILE, 256)
+    assert np.isclose(np.linalg.norm(vector), 1.0)
+    assert np.array_equal(vector, vectorize({**PROFILE, "skills": ["sql", " python ", "Excel", "Statistics"]}, 256))
+    variant = {**PROFILE, "skills": ["Python", "SQL", "Excel", "Tableau"], "ug_cgpa": 8.2}
+    assert vector @ vectorize(variant, 256) > 0.85
+    other = {"ug_course": "BA", "ug_specialization": "History", "skills": ["Writing"], "interests": ["Museums"]}
+    assert vector @ vectorize(other, 256) < 0.3
+
+
+def test_index_grows_and_is_shared_through_the_files(tmp_path):
+    index = ProfileIndex(tmp_path, dim=64)
+    index.add((pk, {**PROFILE, "ug_course": f"Course {pk}"}) for pk in range(1, 1501))  # past INITIAL_CAPACITY
+    reader = ProfileIndex(tmp_path, dim=64)
+    assert len(reader) == 1500 and reader.last_id == 1500
+    index.add([(2000, PROFILE)])
+    (best, score), *_ = reader.query(PROFILE, k=3)
+    assert best == 2000 and score == pytest.approx(1.0, abs=1e-5)
+
+
+@pytest.mark.django_db
+def test_predict_reuses_similar_profile(api_client, fake_llm, user, reuse_on, django_capture_on_commit_callbacks):
+    api_client.force_authenticate(user=user)
+    with django_capture_on_commit_callbacks(execute=True):
+        first = api_client.post("/api/predict/", PROFILE, format="json")
+    assert first["X-Cache"] == "MISS"
+
+    variant = {**PROFILE, "skills": ["Python", "SQL", "Excel", "Tableau"], "ug_cgpa": 8.2}
+    second = api_client.post("/api/predict/", variant, format="json")
+    assert len(fake_llm.calls) == 1
+    assert second["X-Cache-Tier"] == "similar"
+    assert second.json()["reused_from"]["id"] == first.json()["id"]
+    assert second.json()["reused_from"]["similarity"] >= 0.85
+    reused = CareerPrediction.objects.get(pk=second.json()["id"])
+    assert reused.reused_from_id == first.json()["id"] and reused.llm_model == ""
+
+    api_client.post("/api/predict/", {"ug_course": "BA", "skills": ["Writing"]}, format="json")
+    assert len(fake_llm.calls) == 2
+
+
+def test_similarity_benchmark_runs():
+    result = run_benchmark(rows=500, queries=20, threshold=0.85, dim=64)
+    assert result["reuse_rate"] > 0.8
+    assert result["query_p50_ms"] > 0
@@ -0,0 +1,131 @@
+# tests/test_singleflight.py
+import threading
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.utils import timezone
+
+from career.models import GenerationLease
+from career.singleflight import SingleFlight, idempotent
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight(distributed=False)
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(2)
+        return {"value": 42}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"value": 42}] * 8
+
+
+@pytest.mark.django_db
+def test_result_from_another_worker_is_shared():
+    flight = SingleFlight()
+    now = timezone.now()
+    GenerationLease.objects.create(
+        key="k", owner="other:1:1", expires_at=now + timedelta(seconds=30), result={"value": 1}, completed_at=now
+    )
+    assert flight.do("k", lambda: {"value": 2}, replay=True) == {"value": 1}
+    # A result finished before this call started is stale for a plain call
+    assert flight.do("k", lambda: {"value": 2}) == {"value": 2}
+
+
+@pytest.mark.django_db
+def test_dead_leader_is_taken_over():
+    flight = SingleFlight()
+    GenerationLease.objects.create(key="k", owner="dead:1:1", expires_at=timezone.now() - timedelta(seconds=1))
+    assert flight.do("k", lambda: {"value": 3}) == {"value": 3}
+    lease = GenerationLease.objects.get(key="k")
+    assert lease.owner == flight.owner and lease.result == {"value": 3}
+
+
+@pytest.mark.django_db
+def test_failed_call_releases_the_lease():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do("k", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert not GenerationLease.objects.filter(key="k").exists()
+
+
+@pytest.mark.django_db
+def test_idempotency_key_replays_the_first_response(api_client, fake_llm, django_user_model):
+    user = django_user_model.objects.create_user(username="idem", password="testpass")
+    api_client.force_authenticate(user=user)
+    profile = {"ug_course": "BSc", "skills": ["Python"]}
+
+    first = api_client.post("/api/predict/", profile, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+    retry = api_client.post("/api/predict/", profile, format="json", HTTP_IDEMPOTENCY_KEY="abc")
+
+    assert first.status_code == retry.status_code == 200
+    assert retry["Idempotent-Replayed"] == "true"
+    assert retry.json()["id"] == first.json()["id"]
+    assert user.career_predictions.count() == 1
+
+
+@pytest.mark.django_db
+def test_expired_leases_are_purged():
+    now = timezone.now()
+    GenerationLease.objects.create(key="old", owner="a:1:1", expires_at=now - timedelta(seconds=1), result={}, completed_at=now)
+    GenerationLease.objects.create(key="live", owner="a:1:1", expires_at=now + timedelta(seconds=30))
+    call_command("purge_expired", "--only", "leases")
+    assert list(GenerationLease.objects.values_list("key", flat=True)) == ["live"]
+
+
+@pytest.mark.django_db
+def test_idempotency_key_reused_with_another_body_is_rejected(api_client, fake_llm, django_user_model):
+    user = django_user_model.objects.create_user(username="idem2", password="testpass")
+    api_client.force_authenticate(user=user)
+
+    first = api_client.post("/api/predict/", {"ug_course": "BSc"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+    other = api_client.post("/api/predict/", {"ug_course": "BA"}, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+    assert first.status_code == 200
+    assert other.status_code == 422
+    assert user.career_predictions.count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_followers_get_their_own_unstored_response():
+    release = threading.Event()
+    responses = []
+
+    class View:
+        @idempotent("test")
+        def post(self, request):
+            if not responses:
+                release.wait(2)
+            response = HttpResponse(status=409)
+            responses.append(response)
+            return response
+
+    request = SimpleNamespace(
+        headers={"Idempotency-Key": "same"}, data={"a": 1}, user=SimpleNamespace(pk=1), get_full_path=lambda: "/x/"
+    )
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(View().post(request))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(responses) == 3
+    assert {id(response) for response in results} == {id(response) for response in responses}
@@ -0,0 +1,35 @@
+# tests/test_startup.py
+import os
+import sys
+
+from benchmarks.cold_start import import_times
+from career import llm
+from career.startup import warm_up
+
+
+# Seconds `import career_project.wsgi` may take in a fresh interpreter (about 0.5s on a laptop)
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "2.0"))
+
+
+def test_wsgi_import_time_budget():
+    times = import_times("career_project.wsgi", {**os.environ, "OPENAI_API_KEY": "sk-test"})
+    assert times["career_project.wsgi"] < IMPORT_TIME_BUDGET, sorted(times.items(), key=lambda item: -item[1])[:15]
+    # The SDKs are imported by the first request that needs them (or by warm_up), not at startup
+    assert not {"openai", "httpx", "numpy"} & set(times)
+
+
+def test_clients_are_recreated_after_fork(monkeypatch):
+    # The key is read when career.llm is imported; the SDK refuses to build a client without one
+    monkeypatch.setattr(llm, "OPENAI_API_KEY", "sk-test")
+    first = llm.get_client()
+    assert llm.get_client() is first
+    executor = llm.gateway._pool()
+
+    monkeypatch.setattr(os, "getpid", lambda: -1)  # as seen from a forked worker
+    assert llm.get_client() is not first
+    assert llm.gateway._pool() is not executor
+
+
+def test_warm_up_imports_views():
+    assert warm_up() >= 0
+    assert {"career.views", "openai.resources.chat"} <= set(sys.modules)
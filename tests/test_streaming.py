@@ -0,0 +1,112 @@
+# tests/test_streaming.py
+import json
+import threading
+import time
+
+import pytest
+from django.db import connection
+
+from career.models import CareerPrediction, CareerSuggestion
+from career.streaming import JSONEventScanner, prediction_event_path
+from conftest import FAKE_DETAILS, FAKE_PREDICTION
+
+
+def parse_events(response):
+    body = b"".join(response.streaming_content).decode("utf-8")
+    events = []
+    for block in body.strip().split("\n\n"):
+        name, data = block.split("\n", 1)
+        events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_scanner_emits_each_path_when_it_closes():
+    text = '```json\n{"career_paths": [{"title": "A \\"}\\"", "n": [1, 2.5]}, {"title": "B"}], "x": null}\n```'
+    scanner = JSONEventScanner(prediction_event_path)
+    events = []
+    for ch in text:
+        new_events = scanner.feed(ch)
+        if new_events and not events:
+            # The first path is available before the second one has arrived
+            assert '"B"' not in scanner.text
+        events.extend(new_events)
+    assert events == [(("career_paths", 0), {"title": 'A "}"', "n": [1, 2.5]}), (("career_paths", 1), {"title": "B"})]
+    assert scanner.finished
+
+
+@pytest.mark.django_db
+def test_predict_stream_emits_paths_and_persists(api_client, fake_llm, django_user_model):
+    user = django_user_model.objects.create_user(username="streamer", password="testpass")
+    api_client.force_authenticate(user=user)
+
+    response = api_client.post("/api/predict/?stream=1", {"ug_course": "BSc"}, format="json")
+
+    assert response["Content-Type"] == "text/event-stream"
+    events = parse_events(response)
+    assert events[0] == ("career_path", {"index": 0, "value": FAKE_PREDICTION["career_paths"][0]})
+    assert events[-1][0] == "done"
+    assert CareerPrediction.objects.get(user=user).id == events[-1][1]["id"]
+    assert fake_llm.calls[0]["stream"] is True
+
+
+@pytest.mark.django_db
+def test_career_stream_emits_sections(api_client, fake_llm, django_user_model):
+    fake_llm.payload = FAKE_DETAILS
+    user = django_user_model.objects.create_user(username="streamer", password="testpass")
+    api_client.force_authenticate(user=user)
+
+    response = api_client.post("/api/career/?stream=1", {"career": "Data Scientist"}, format="json")
+
+    events = parse_events(response)
+    keys = [data["key"] for name, data in events if name == "section"]
+    assert keys == ["career", "required_skills", "free_courses", "roadmap.short_term", "roadmap.medium_term",
+                    "roadmap.long_term"]
+    assert CareerSuggestion.objects.get(user=user).payload == FAKE_DETAILS
+
+
+@pytest.mark.django_db
+def test_malformed_stream_is_repaired(api_client, fake_llm, django_user_model):
+    user = django_user_model.objects.create_user(username="streamer", password="testpass")
+    api_client.force_authenticate(user=user)
+    replies = iter(["not json at all", json.dumps(FAKE_PREDICTION)])
+    create = fake_llm.create
+
+    def create_in_turn(**kwargs):
+        fake_llm.payload = next(replies)
+        return create(**kwargs)
+
+    fake_llm.create = create_in_turn
+    events = parse_events(api_client.post("/api/predict/?stream=1", {"ug_course": "BSc"}, format="json"))
+
+    assert [name for name, _ in events] == ["career_path", "done"]
+    assert events[0][1]["value"] == FAKE_PREDICTION["career_paths"][0]
+    assert [call.get("stream", False) for call in fake_llm.calls] == [True, False]
+    assert CareerPrediction.objects.get(user=user).prediction == FAKE_PREDICTION
+
+
+@pytest.mark.django_db(transaction=True)
+def test_identical_streams_share_one_generation(api_client, fake_llm, django_user_model):
+    user = django_user_model.objects.create_user(username="streamer", password="testpass")
+    api_client.force_authenticate(user=user)
+    profile = {"ug_course": "BSc", "skills": ["SQL"]}
+
+    leader = iter(api_client.post("/api/predict/?stream=1", profile, format="json").streaming_content)
+    first = next(leader)  # the leader is streaming and holds the flight
+    followed = []
+
+    def follow():
+        try:
+            followed.append(parse_events(api_client.post("/api/predict/?stream=1", profile, format="json")))
+        finally:
+            connection.close()
+
+    follower = threading.Thread(target=follow)
+    follower.start()
+    time.sleep(0.1)
+    rest = b"".join(leader)
+    follower.join(5)
+
+    assert len(fake_llm.calls) == 1
+    assert first.startswith(b"event: career_path") and b"event: done" in rest
+    assert [name for name, _ in followed[0]] == ["career_path", "done"]
+    assert CareerPrediction.objects.filter(user=user).count() == 2
@@ -0,0 +1,71 @@
+# tests/test_titles.py
+import pytest
+from conftest import FAKE_DETAILS
+from django.core.management import call_command
+
+from career import titles
+from career.models import CareerPrediction, CareerSuggestion
+
+
+TITLES = [
+    "Data Analyst", "Data Analyst", "Data Scientist", "Data Engineer", "Machine Learning Engineer",
+    "Senior Machine Learning Engineer", "Backend Developer", "Financial Analyst", "UX Designer",
+]
+
+
+def best(index, query):
+    return [title for title, _, _ in index.search(query, 3)]
+
+
+def test_prefix_typo_and_initials_matches():
+    index = titles.TitleIndex()
+    index.add(TITLES)
+    assert len(index) == 8
+    # Ties go to the more frequent title
+    assert best(index, "data")[0] == "Data Analyst"
+    assert best(index, "learning eng")[0] == "Machine Learning Engineer"
+    assert best(index, "anaylst")[:2] == ["Data Analyst", "Financial Analyst"]
+    assert best(index, "ml engineer")[0] == "Machine Learning Engineer"
+    assert best(index, "backend devloper") == ["Backend Developer"]
+    assert index.search("zzz qqq") == []
+    assert index.search("  ") == []
+
+
+@pytest.mark.django_db
+def test_snapshot_and_catch_up(django_user_model, api_client):
+    user = django_user_model.objects.create_user(username="searcher", password="testpass")
+    CareerPrediction.objects.create(user=user, user_input={}, prediction={}, career_titles=["Data Analyst", "UX Designer"])
+    CareerSuggestion.objects.create(user=user, career="Data Analyst", suggestion={})
+
+    call_command("build_title_index")
+    index = titles.TitleIndex.load(titles.snapshot_path())
+    assert index.search("data", 1) == [("Data Analyst", 0.9, 2)]
+    assert index.watermark == [CareerPrediction.objects.get().pk, CareerSuggestion.objects.get().pk]
+
+    # Rows saved after the snapshot are caught up from its watermark
+    CareerSuggestion.objects.create(user=user, career="Cloud Architect", suggestion={})
+    call_command("build_title_index")
+    loaded = titles.TitleIndex.load(titles.snapshot_path())
+    assert (len(loaded), loaded.search("cloud", 1)[0][0]) == (3, "Cloud Architect")
+    assert loaded.suffixes == sorted(loaded.suffixes)
+
+    api_client.force_authenticate(user=user)
+    response = api_client.get("/api/careers/search/?q=ux%20desi&limit=5")
+    assert response.status_code == 200
+    assert response.json()["results"][0] == {"title": "UX Designer", "score": 0.96, "count": 1}
+    assert api_client.get("/api/careers/search/?q=").status_code == 400
+
+
+@pytest.mark.django_db
+def test_snapping_reuses_catalog_entry(api_client, fake_llm, django_user_model, settings):
+    settings.CAREER_TITLE_SNAP = True
+    settings.TITLE_INDEX_REFRESH = 0
+    user = django_user_model.objects.create_user(username="snapper", password="testpass")
+    api_client.force_authenticate(user=user)
+    fake_llm.payload = FAKE_DETAILS
+
+    assert api_client.post("/api/career/", {"career": "Data Scientist"}, format="json").status_code == 200
+    response = api_client.post("/api/career/", {"career": "data scientst"}, format="json")
+    assert response.status_code == 200
+    assert len(fake_llm.calls) == 1
+    assert list(CareerSuggestion.objects.values_list("career", flat=True)) == ["Data Scientist", "Data Scientist"]